@@ -0,0 +1,23 @@
+# gunicorn.conf.py
+# Gunicorn settings, read automatically when gunicorn starts in this directory.
+#
+# DJANGO_SERVER_MODE picks how requests are served:
+#   wsgi (default): sync workers, one request per worker process at a time.
+#   asgi: uvicorn workers running sms_backend.asgi, where the read endpoints are
+#         async views, so one process interleaves many concurrent requests.
+# WEB_CONCURRENCY sets the number of worker processes in both modes, so the two
+# can be compared at the same memory footprint (see `manage.py bench_servers`).
+
+import os
+
+SERVER_MODE = os.environ.get('DJANGO_SERVER_MODE', 'wsgi').lower()
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'sms_backend.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'sms_backend.wsgi:application'
+    worker_class = 'sync'
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
@@ -2,6 +2,9 @@
 ASGI config for sms_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with uvicorn workers under gunicorn (see gunicorn.conf.py):
+
+    DJANGO_SERVER_MODE=asgi gunicorn
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -12,5 +15,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sms_backend.settings')
+# Serving over ASGI turns on the async read views (see SERVER_MODE in settings.py)
+os.environ.setdefault('DJANGO_SERVER_MODE', 'asgi')
 
 application = get_asgi_application()
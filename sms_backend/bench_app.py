@@ -0,0 +1,20 @@
+# sms_backend/bench_app.py
+# Application factory of the servers started by `manage.py bench_servers`: the
+# regular WSGI or ASGI application, optionally with a simulated database round trip
+# added to every query. Deployed servers load sms_backend.wsgi / sms_backend.asgi
+# (see gunicorn.conf.py) and never import this module.
+
+
+def application(mode, db_latency_ms=0):
+    """Returns the application for `mode` ('wsgi' or 'asgi'), slowing every query by `db_latency_ms`."""
+    if mode == 'asgi':
+        from .asgi import application as app
+    else:
+        from .wsgi import application as app
+    if db_latency_ms:
+        from django.db.backends.signals import connection_created
+        from students.benchmarking import simulated_latency
+
+        # weak=False: the receiver is a closure nothing else keeps alive
+        connection_created.connect(simulated_latency(db_latency_ms), weak=False)
+    return app
@@ -0,0 +1,65 @@
+# sms_backend/metrics.py
+# This file holds the in-process store for per-endpoint request metrics.
+# Each endpoint keeps a bounded window of recent samples, from which rolling
+# percentiles are computed on demand. The store is per worker process.
+
+import math
+import threading
+from collections import deque
+
+# Metrics recorded for every sample, in order
+METRIC_NAMES = ('total_ms', 'db_ms', 'queries', 'render_ms', 'bytes')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class EndpointMetrics:
+    """Thread-safe rolling window of request samples, keyed by endpoint."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, endpoint, **values):
+        sample = tuple(values.get(name, 0) for name in METRIC_NAMES)
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(sample)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def snapshot(self):
+        """Returns p50/p95/p99/max and the mean of each metric for every endpoint."""
+        with self._lock:
+            items = [(endpoint, list(samples), self._counts[endpoint]) for endpoint, samples in self._samples.items()]
+
+        report = {}
+        for endpoint, samples, count in sorted(items):
+            metrics = {}
+            for position, name in enumerate(METRIC_NAMES):
+                values = sorted(sample[position] for sample in samples)
+                metrics[name] = {
+                    'p50': round(percentile(values, 0.50), 2),
+                    'p95': round(percentile(values, 0.95), 2),
+                    'p99': round(percentile(values, 0.99), 2),
+                    'max': round(values[-1], 2),
+                    'mean': round(sum(values) / len(values), 2),
+                }
+            report[endpoint] = {'requests': count, 'window': len(samples), **metrics}
+        return report
+
+
+# Process-wide store used by the middleware and the metrics endpoint
+endpoint_metrics = EndpointMetrics()
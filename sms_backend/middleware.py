@@ -0,0 +1,336 @@
+# sms_backend/middleware.py
+# Request instrumentation: wall time, SQL query count, database time, render
+# (serialization) time and response size for every resolved view. Results are
+# sent back as a Server-Timing header and aggregated in sms_backend.metrics.
+#
+# Enabled with the PERF_METRICS_ENABLED setting. When it is off the middleware
+# removes itself at startup (MiddlewareNotUsed), so it adds no per-request cost.
+#
+# Also holds the read-replica routing middleware, the response compression
+# middleware and an async-capable WhiteNoise middleware for the ASGI server mode.
+
+import gzip
+import re
+import time
+import zlib
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:  # Optional; responses are then only gzip-compressed
+    brotli = None
+
+from .metrics import endpoint_metrics
+from .routers import RequestRouting, active_routing, choose_replica, replica_aliases
+
+
+class QueryTimer:
+    """Database execute wrapper that counts queries and accumulates their duration."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+# QueryTimer of the request being handled. A context variable rather than a wrapper
+# installed per request, because under ASGI the queries run in worker threads with
+# connections of their own; asgiref carries the context over into those threads.
+active_query_timer = ContextVar('active_query_timer', default=None)
+
+
+def timed_execute(execute, sql, params, many, context):
+    """Execute wrapper kept on every connection; times the query for the active request, if any."""
+    timer = active_query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    """Adds timed_execute to a connection once (also used as a connection_created receiver)."""
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Records per-endpoint timings and adds a Server-Timing header, e.g.
+    `Server-Timing: total;dur=12.4, db;dur=3.1;desc="4 queries", render;dur=1.2`.
+    Works on both the sync (WSGI) and async (ASGI) request paths.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_timer)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            active_query_timer.reset(token)
+        return self.finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            active_query_timer.reset(token)
+        return self.finish(request, response, timer, started)
+
+    def start(self, request):
+        # Connections opened before this middleware was loaded miss connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection=connection)
+        timer = QueryTimer()
+        request._render_seconds = 0.0
+        return timer, active_query_timer.set(timer), time.perf_counter()
+
+    def finish(self, request, response, timer, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = timer.seconds * 1000
+        render_ms = request._render_seconds * 1000
+        response['Server-Timing'] = (
+            f'total;dur={total_ms:.1f}, db;dur={db_ms:.1f};desc="{timer.queries} queries", render;dur={render_ms:.1f}'
+        )
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            endpoint_metrics.record(
+                f'{request.method} {match.view_name or match._func_path}',
+                total_ms=total_ms,
+                db_ms=db_ms,
+                queries=timer.queries,
+                render_ms=render_ms,
+                bytes=0 if response.streaming else len(response.content),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Responses are rendered (JSON-encoded) after this hook; time that step
+        started = time.perf_counter()
+
+        def finished(rendered):
+            request._render_seconds += time.perf_counter() - started
+            return None
+
+        response.add_post_render_callback(finished)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that can also sit on the async request path. The stock
+    middleware is sync-only, which would make Django run every async view below it
+    through a thread under ASGI. Static file lookups are in-memory dict hits (or a
+    stat() with autorefresh in DEBUG), so they are fine to do on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Tracks where the current request reads from, for sms_backend.routers.ReplicaRouter.
+    The replica is chosen once the view is known (API viewset reads only). Removes
+    itself at startup when no replicas are configured. Works on both the sync (WSGI)
+    and async (ASGI) request paths.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = active_routing.set(RequestRouting())
+        try:
+            return self.get_response(request)
+        finally:
+            active_routing.reset(token)
+
+    async def __acall__(self, request):
+        token = active_routing.set(RequestRouting())
+        try:
+            return await self.get_response(request)
+        finally:
+            active_routing.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        active_routing.get().replica = choose_replica(request, view_func)
+        return None
+
+
+# Content types worth compressing: the API's JSON, CSV and NDJSON bodies. Images barely
+# shrink, static files are precompressed by WhiteNoise, and HTML pages are left alone
+# because admin pages carry CSRF tokens, which compression can leak (BREACH)
+COMPRESSIBLE_TYPES = re.compile(r'^(application/(json|x-ndjson)|text/(csv|plain))\b')
+
+
+def accepted_encodings(header):
+    """Returns the codings of an Accept-Encoding header that are not refused with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """Picks the coding for a response: brotli when available and accepted, then gzip, else None."""
+    accepted = accepted_encodings(header)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(content, encoding):
+    """Compresses a whole body with the given coding ('br' or 'gzip')."""
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+    return gzip.compress(content, compresslevel=getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+def stream_compressor(encoding):
+    """
+    Returns `(compress, finish)` functions for compressing a body chunk by chunk into a
+    single stream, so a streamed JSON array is not compressed one row at a time.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        return compressor.process, compressor.finish
+    # wbits=31: zlib's deflate stream wrapped in a gzip header and trailer
+    compressor = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+class CompressionMiddleware:
+    """
+    Compresses API responses (JSON, CSV, NDJSON) of at least COMPRESSION_MIN_SIZE
+    bytes with brotli or gzip, as negotiated with the Accept-Encoding header. Smaller
+    bodies are sent as they are: they fit in a packet or two anyway, and compressing
+    them would only cost CPU. Streamed responses are compressed as they are sent.
+
+    Like Django's GZipMiddleware, strong ETags are made weak, since the bytes on the
+    wire differ per coding; ConditionalCacheMixin compares them weakly.
+    Works on both the sync (WSGI) and async (ASGI) request paths.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = (
+                self.acompress_stream(response.streaming_content, encoding) if response.is_async
+                else self.compress_stream(response.streaming_content, encoding)
+            )
+            # The compressed size is only known once the stream has been sent
+            del response.headers['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress_stream(self, chunks, encoding):
+        compress, finish = stream_compressor(encoding)
+        for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
+
+    async def acompress_stream(self, chunks, encoding):
+        compress, finish = stream_compressor(encoding)
+        async for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
@@ -0,0 +1,86 @@
+# sms_backend/routers.py
+# Database routing for read replicas (see DATABASE_REPLICA_URLS in settings.py).
+#
+# ReplicaRoutingMiddleware decides, once per request, where its reads go: safe
+# (GET/HEAD) requests to the API viewsets read from one replica, picked at random
+# per request so a paginated listing does not mix replicas; everything else
+# (writes, the admin, management commands, background work) uses the primary.
+# ReplicaRouter applies that decision to every query. As soon as a request writes,
+# it sticks to the primary for the rest of the request, so it reads its own writes.
+#
+# Replicas lag behind the primary. Right after any committed write, reads stay on
+# the primary for DATABASE_REPLICA_LAG_SECONDS. Otherwise a response could be
+# rendered from pre-write replica data and cached under the post-write collection
+# version. The time of the last write is the newest CollectionVersion row on the
+# primary (see students/caching.py), so writes made by every process count, at the
+# cost of one small query per replica-eligible request.
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from students.caching import seconds_since_last_write
+
+# Routing decision of the request being handled, set by ReplicaRoutingMiddleware.
+# A mutable object rather than a plain value, so a write made in a worker thread
+# (asgiref copies the context into it) still pins the rest of the request.
+active_routing = ContextVar('active_routing', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class RequestRouting:
+    """Where the reads of one request go: `replica` (an alias), or None for the primary."""
+
+    def __init__(self):
+        self.replica = None
+
+    def pin_to_primary(self):
+        self.replica = None
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def choose_replica(request, view_func):
+    """Returns the replica alias a request should read from, or None for the primary."""
+    replicas = replica_aliases()
+    view_class = getattr(view_func, 'cls', None)
+    if not replicas or request.method not in SAFE_METHODS or view_class is None:
+        return None
+    # Views whose correctness depends on fresh data (e.g. the delta sync cursor) opt out
+    if not getattr(view_class, 'read_from_replica', True):
+        return None
+    elapsed = seconds_since_last_write()
+    if elapsed is not None and elapsed < getattr(settings, 'DATABASE_REPLICA_LAG_SECONDS', 5):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen for the current request; writes always go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        routing = active_routing.get()
+        if routing is None or routing.replica is None:
+            return DEFAULT_DB_ALIAS
+        # select_for_update() and get_or_create() lookups are routed as writes
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = active_routing.get()
+        if routing is not None:
+            routing.pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Real replicas get their schema from the primary; local stand-ins can be
+        # migrated explicitly with `migrate --database replica1`
+        return None
@@ -5,6 +5,8 @@ import os
 import dj_database_url
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Use environment variable for SECRET_KEY for security
@@ -47,8 +49,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sms_backend.middleware.PerformanceMetricsMiddleware', # Server-Timing + per-endpoint metrics (off unless PERF_METRICS_ENABLED)
+    'sms_backend.middleware.CompressionMiddleware', # brotli/gzip for API bodies of COMPRESSION_MIN_SIZE bytes or more
+    'sms_backend.middleware.ReplicaRoutingMiddleware', # API reads from DATABASE_REPLICAS (off without replicas)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', # Add WhiteNoise middleware
+    'sms_backend.middleware.AsyncWhiteNoiseMiddleware', # WhiteNoise, usable on the async (ASGI) request path too
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,14 +86,82 @@ ASGI_APPLICATION = 'sms_backend.asgi.application'
 
 # Database configuration for PostgreSQL on Render
 # Render automatically sets DATABASE_URL for PostgreSQL databases.
-DATABASES = {
-    'default': dj_database_url.config(
-        default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'), # Fallback for local development
-        conn_max_age=600,
-        # Ensure that the DATABASE_URL environment variable is picked up correctly
-        # from Render's PostgreSQL service.
+# How the app is served: 'wsgi' (gunicorn sync workers, the default) or 'asgi'
+# (uvicorn workers under gunicorn; set automatically by sms_backend/asgi.py).
+# See gunicorn.conf.py. In ASGI mode the list/retrieve/summary endpoints use
+# async views backed by the async ORM (students/async_reads.py).
+SERVER_MODE = os.environ.get('DJANGO_SERVER_MODE', 'wsgi').lower()
+ASYNC_READ_VIEWS = SERVER_MODE == 'asgi'
+
+def database_settings(url):
+    """
+    Connection settings for one database URL. Connections are kept open between requests
+    and checked (health checks) before being reused after an error or restart. With
+    DATABASE_POOL_SIZE set, PostgreSQL connections come from a psycopg 3 pool instead
+    (psycopg[binary,pool] in requirements.txt), which also shares them under ASGI.
+    """
+    config = dj_database_url.parse(
+        url,
+        # Persistent connections are per thread, and under ASGI each request runs its
+        # queries in a thread of its own, so they would only pile up there
+        conn_max_age=0 if ASYNC_READ_VIEWS else 600,
+        conn_health_checks=True,
     )
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        # Write-ahead logging lets the job worker (`manage.py run_worker`) and the web
+        # process write while the other reads, instead of failing with "database is locked"
+        config.setdefault('OPTIONS', {})['init_command'] = 'PRAGMA journal_mode=WAL;'
+    pool_size = int(os.environ.get('DATABASE_POOL_SIZE', '0'))
+    if pool_size and config['ENGINE'] == 'django.db.backends.postgresql':
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise ImproperlyConfigured('DATABASE_POOL_SIZE requires psycopg 3: pip install "psycopg[binary,pool]".')
+
+        config['CONN_MAX_AGE'] = 0 # The pool keeps the connections; Django must not
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': 1,
+            'max_size': pool_size,
+            'check': ConnectionPool.check_connection, # Health check on every checkout
+        }
+    return config
+
+
+# Ensure that the DATABASE_URL environment variable is picked up correctly
+# from Render's PostgreSQL service.
+DATABASES = {
+    'default': database_settings(
+        os.environ.get('DATABASE_URL') or 'sqlite:///' + str(BASE_DIR / 'db.sqlite3'), # Fallback for local development
+    ),
+}
+
+# Read replicas: a comma-separated list of database URLs in DATABASE_REPLICA_URLS adds the
+# aliases replica1, replica2, ... GET/HEAD requests to the API read from one of them (see
+# sms_backend/routers.py); writes, and reads for DATABASE_REPLICA_LAG_SECONDS after any write,
+# use the primary. To try it locally, point both URLs at SQLite files and migrate both:
+#   python manage.py migrate && python manage.py migrate --database replica1
+DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {
+        **database_settings(url.strip()),
+        'TEST': {'MIRROR': 'default'}, # Tests read and write one database
+    }
+DATABASE_ROUTERS = ['sms_backend.routers.ReplicaRouter']
+DATABASE_REPLICA_LAG_SECONDS = float(os.environ.get('DATABASE_REPLICA_LAG_SECONDS', '5'))
+
+# Cache used for rendered API responses (students/caching.py). Responses are keyed by ETags
+# built from the collection versions in the database, so every process sees every write even
+# with the per-process local-memory default. A shared backend (e.g.
+# django.core.cache.backends.db.DatabaseCache with DJANGO_CACHE_LOCATION=api_cache after
+# `manage.py createcachetable`, or a Redis/Memcached URL) only lets workers reuse each other's bodies.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'sms-api'),
+    }
 }
+RESPONSE_CACHE_TIMEOUT = 300 # Seconds a rendered list/retrieve response stays cached
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -149,10 +222,58 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny', # Adjust permissions as needed for authentication
     ],
+    # orjson-backed JSON (students/renderers.py); identical output to the stock classes
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'students.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'students.renderers.FastJSONParser',
     ],
+    # Keyset pagination: deep pages cost the same as the first one.
+    # Clients can pass ?page_size= (max 1000) or ?paginate=false to stream everything.
+    'DEFAULT_PAGINATION_CLASS': 'students.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
+
+# JSON encoder/decoder for API bodies: 'orjson' (used when installed) or 'stdlib'.
+JSON_BACKEND = os.environ.get('DJANGO_JSON_BACKEND', 'orjson').lower()
+
+# Response compression (sms_backend.middleware.CompressionMiddleware). Bodies smaller than
+# COMPRESSION_MIN_SIZE bytes are sent uncompressed. Brotli (used when the Brotli package is
+# installed and the client accepts it) is kept at a quality suited to dynamic responses.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Admin changelists of unfiltered tables estimated above this many rows show the
+# PostgreSQL planner's estimate as their total instead of counting (students/admin.py).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Minimum average score for a student to be counted as passing in grade summaries.
+GRADE_PASSING_THRESHOLD = 75
+
+# Relative weight of each grade type in a final grade, for subjects without their own
+# GradingPolicy (see students/grading.py).
+DEFAULT_GRADE_WEIGHTS = {'activity': 1, 'quiz': 1, 'exam': 1}
+
+# Delta sync (/api/sync/, see students/sync.py). Cursors trail the clock by the overlap,
+# so transactions shorter than it are never missed. Clients further behind than the
+# tombstone retention, or than SYNC_MAX_CHANGES rows, are told to reload everything.
+SYNC_OVERLAP_SECONDS = 5
+SYNC_MAX_CHANGES = 5000
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Background jobs (students/jobs.py), run by `manage.py run_worker` (the Procfile `worker`
+# process). Running jobs whose worker has sent no heartbeat for JOB_STALE_SECONDS are queued
+# again, at most JOB_MAX_ATTEMPTS times in all; finished jobs and their output are deleted
+# after JOB_RESULT_RETENTION_HOURS.
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 2))
+JOB_POLL_SECONDS = 1
+JOB_STALE_SECONDS = 60
+JOB_MAX_ATTEMPTS = 3
+JOB_RESULT_RETENTION_HOURS = 24
+
+# Per-request instrumentation (query count, DB time, render time, response size).
+# Adds a Server-Timing header and feeds the admin-only /metrics/ endpoint.
+# The middleware unloads itself at startup when this is False.
+PERF_METRICS_ENABLED = os.environ.get('DJANGO_PERF_METRICS', 'False').lower() == 'true'
@@ -22,6 +22,9 @@ urlpatterns = [
     # A simple API status endpoint at the project root (e.g., /)
     # This will now serve the api_root_status view when the root URL is accessed.
     path('', project_views.api_root_status, name='api_status'), # Added this line!
+
+    # Admin-only per-endpoint performance metrics (see sms_backend/middleware.py)
+    path('metrics/', project_views.performance_metrics, name='performance_metrics'),
 ]
 
 # IMPORTANT: Remove this block for production deployment.
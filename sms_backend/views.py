@@ -2,9 +2,13 @@
 # This file can contain simple views for the main Django project,
 # not necessarily related to a specific app.
 
+from django.conf import settings
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+
+from .metrics import endpoint_metrics
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -21,6 +25,27 @@ def api_root_status(request):
             'students': '/api/students/',
             'subjects': '/api/subjects/',
             'grades': '/api/grades/',
-            'admin': '/admin/'
+            'grades_summary': '/api/grades/summary/',
+            'admin': '/admin/',
+            'metrics': '/metrics/'
         }
     })
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def performance_metrics(request):
+    """
+    Admin-only report of rolling per-endpoint request metrics collected by
+    PerformanceMetricsMiddleware in this worker process: p50/p95/p99 of wall time,
+    database time, query count, render time and response bytes.
+    DELETE clears the collected samples.
+    """
+    if request.method == 'DELETE':
+        endpoint_metrics.reset()
+        return Response(status=204)
+    return Response({
+        'enabled': settings.PERF_METRICS_ENABLED,
+        'window': endpoint_metrics.window,
+        'endpoints': endpoint_metrics.snapshot(),
+    })
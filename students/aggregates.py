@@ -0,0 +1,206 @@
+# students/aggregates.py
+# This file contains the server-side grade aggregation used by the summary
+# endpoints. Averages are computed from a single grouped SQL query so the work
+# (and the response size) grows with the number of students and subjects,
+# not with the number of individual grade rows.
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from .models import Grade
+
+
+def default_passing_threshold():
+    """Returns the configured passing score (settings.GRADE_PASSING_THRESHOLD, default 75)."""
+    return getattr(settings, 'GRADE_PASSING_THRESHOLD', 75)
+
+
+def _average(total, count):
+    """Returns the rounded average for a total/count pair, or None when there are no grades."""
+    if not count:
+        return None
+    return round(float(total) / count, 2)
+
+
+# Columns identifying the student and subject of each grouped row
+GROUP_FIELDS = (
+    'student', 'student__student_id', 'student__first_name', 'student__last_name',
+    'subject', 'subject__code', 'subject__name',
+)
+
+
+def summarize_grades(queryset, passing_threshold=None):
+    """
+    Computes per-student, per-subject and overall averages for a Grade queryset.
+
+    A single GROUP BY (student, subject) query returns one row per pair with its
+    score total and grade count. Per-student, per-subject and overall figures are
+    then rolled up from those rows, so no individual grade is ever loaded.
+    """
+    rows = (
+        queryset
+        .order_by()  # Drop Meta.ordering so it does not leak into the GROUP BY
+        .values(*GROUP_FIELDS)
+        .annotate(total=Sum('score'), count=Count('id'))
+    )
+    return rollup(rows, passing_threshold)
+
+
+def statistic_rows(queryset):
+    """Groups a GradeStatistic queryset into (student, subject) rows with `total` and `count`."""
+    return (
+        queryset
+        .order_by()
+        .values(*GROUP_FIELDS)
+        .annotate(total=Sum('total'), count=Sum('count'))
+    )
+
+
+def summarize_statistics(queryset, passing_threshold=None):
+    """
+    Same result as summarize_grades, but read from the materialized GradeStatistic
+    table: each (student, subject) group adds up at most one row per grade_type.
+    """
+    return rollup(statistic_rows(queryset), passing_threshold)
+
+
+async def asummarize_statistics(queryset, passing_threshold=None):
+    """Async counterpart of summarize_statistics, for the ASGI read path."""
+    rows = [row async for row in statistic_rows(queryset)]
+    return rollup(rows, passing_threshold)
+
+
+def rollup(rows, passing_threshold=None):
+    """Rolls (student, subject) rows carrying `total` and `count` up into the summary payload."""
+    students = {}
+    subjects = {}
+    overall_total = Decimal('0')
+    overall_count = 0
+
+    for row in rows:
+        student = students.setdefault(row['student'], {
+            'student': row['student'],
+            'student_id': row['student__student_id'],
+            'full_name': f"{row['student__first_name']} {row['student__last_name']}",
+            'sort_key': (row['student__last_name'], row['student__first_name']),
+            'total': Decimal('0'),
+            'count': 0,
+        })
+        student['total'] += row['total']
+        student['count'] += row['count']
+
+        subject = subjects.setdefault(row['subject'], {
+            'subject': row['subject'],
+            'code': row['subject__code'],
+            'name': row['subject__name'],
+            'total': Decimal('0'),
+            'count': 0,
+        })
+        subject['total'] += row['total']
+        subject['count'] += row['count']
+
+        overall_total += row['total']
+        overall_count += row['count']
+
+    if passing_threshold is None:
+        passing_threshold = default_passing_threshold()
+    threshold = float(passing_threshold)
+    student_results = []
+    passed = failed = 0
+    # Match Student.Meta.ordering (last_name, first_name)
+    for student in sorted(students.values(), key=lambda s: s['sort_key']):
+        del student['sort_key']
+        average = _average(student['total'], student['count'])
+        student['passed'] = average >= threshold
+        if student['passed']:
+            passed += 1
+        else:
+            failed += 1
+        student['average'] = average
+        student['total'] = float(student['total'])
+        student_results.append(student)
+
+    subject_results = []
+    for subject in sorted(subjects.values(), key=lambda s: s['name']):
+        subject['average'] = _average(subject['total'], subject['count'])
+        subject['total'] = float(subject['total'])
+        subject_results.append(subject)
+
+    overall_average = _average(overall_total, overall_count)
+    return {
+        'passing_threshold': threshold,
+        'overall': {
+            'average': overall_average,
+            'count': overall_count,
+            'total': float(overall_total),
+            'passed': None if overall_average is None else overall_average >= threshold,
+            'passed_students': passed,
+            'failed_students': failed,
+        },
+        'students': student_results,
+        'subjects': subject_results,
+    }
+
+
+def report_card(grades, cells):
+    """
+    Builds a student's report card from their grades (with `subject` loaded) and the
+    per-(subject, grade_type) aggregates of those grades (see statistics.cell_aggregates).
+    Grades are grouped by subject, then grade type; averages and totals come from `cells`.
+    """
+    cells = {(cell['subject_id'], cell['grade_type']): cell for cell in cells}
+    type_order = {value: position for position, (value, _) in enumerate(Grade.GRADE_TYPES)}
+
+    subjects = {}
+    for grade in grades:
+        subject = subjects.setdefault(grade.subject_id, {
+            'subject': {'id': grade.subject_id, 'code': grade.subject.code, 'name': grade.subject.name},
+            'grade_types': {},
+        })
+        group = subject['grade_types'].setdefault(grade.grade_type, {'grade_type': grade.grade_type, 'grades': []})
+        group['grades'].append({
+            'id': grade.id,
+            'score': str(grade.score),
+            'date_recorded': grade.date_recorded.isoformat(),
+            'notes': grade.notes,
+        })
+
+    subject_results = []
+    overall_total = Decimal('0')
+    overall_count = 0
+    for subject in sorted(subjects.values(), key=lambda s: (s['subject']['name'], s['subject']['id'])):
+        subject_total = Decimal('0')
+        subject_count = 0
+        grade_types = []
+        for grade_type, group in sorted(subject['grade_types'].items(), key=lambda item: type_order.get(item[0], len(type_order))):
+            cell = cells.get((subject['subject']['id'], grade_type), {'total': Decimal('0'), 'count': 0})
+            group.update({
+                'average': _average(cell['total'], cell['count']),
+                'count': cell['count'],
+                'total': float(cell['total']),
+                'min_score': None if cell.get('min_score') is None else float(cell['min_score']),
+                'max_score': None if cell.get('max_score') is None else float(cell['max_score']),
+            })
+            grade_types.append(group)
+            subject_total += cell['total']
+            subject_count += cell['count']
+        subject_results.append({
+            'subject': subject['subject'],
+            'average': _average(subject_total, subject_count),
+            'count': subject_count,
+            'total': float(subject_total),
+            'grade_types': grade_types,
+        })
+        overall_total += subject_total
+        overall_count += subject_count
+
+    return {
+        'overall': {
+            'average': _average(overall_total, overall_count),
+            'count': overall_count,
+            'total': float(overall_total),
+        },
+        'subjects': subject_results,
+    }
@@ -0,0 +1,347 @@
+# students/analytics.py
+# This file computes the class standing analytics behind `/api/grades/analytics/`:
+# per-subject and overall rank and percentile of every student, top-N lists and
+# score distribution histograms per subject and grade type.
+#
+# Ranks and percentiles come from one SQL query per level using window functions
+# (RANK() and PERCENT_RANK() over each student's aggregated average), so the
+# database orders the averages. On SQLite, and backends without window functions,
+# the grouped averages are ranked with a vectorized NumPy sort instead, with the
+# same results (or a plain Python sort when NumPy is not installed).
+#
+# Without a date range, averages are read from the GradeStatistic table (one row
+# per student/subject/grade type) rather than from Grade rows. A date range
+# reaching into archived terms (see students/terms.py) also reads their
+# ArchivedGrade rows. The computed analytics of each term (date range) are kept
+# in process and reused until the Grade collection version (see
+# students/caching.py) changes.
+
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from django.db import connections
+from django.db.models import Count, F, FloatField, Sum, Window
+from django.db.models.functions import Cast, Floor, PercentRank, Rank
+
+from .caching import collection_version
+from .models import Grade, GradeStatistic, Student, Subject
+from .terms import grades_between
+
+try:
+    import numpy as np
+except ImportError:  # Optional; rank_rows falls back to pure Python
+    np = None
+
+# Width of the histogram score buckets: [0, 10), [10, 20), ...
+BUCKET_SIZE = 10
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+# Terms whose analytics are kept in memory at once, per process
+CACHED_TERMS = 8
+
+
+def ranking_rows(queryset, total, count, partition=None, in_database=None):
+    """
+    Groups `queryset` per student (and `partition`, e.g. 'subject_id') and returns
+    `(partition_value, student_id, average, rank, percentile)` tuples, in rank order
+    within each partition. `total` and `count` are the aggregates of each group.
+    `percentile` is the share (0 to 1) of the other students whose average is not higher.
+
+    Ranks are computed by window functions in the database, except on SQLite (or when
+    `in_database` is False), where sorting the grouped rows in process (rank_rows) is
+    faster than SQLite's window implementation.
+    """
+    keys = ['student_id'] if partition is None else ['student_id', partition]
+    rows = (
+        queryset
+        .order_by()
+        .values(*keys)
+        .annotate(average=Cast(total, FloatField()) / Cast(count, FloatField()))
+    )
+    connection = connections[queryset.db]
+    if in_database is None:
+        in_database = connection.features.supports_over_clause and connection.vendor != 'sqlite'
+    if not in_database:
+        return rank_rows(
+            [(row[partition] if partition else None, row['student_id'], row['average']) for row in rows.iterator(chunk_size=5000)]
+        )
+
+    # Both windows share one PARTITION BY/ORDER BY, so the database sorts the groups once
+    partition_by = None if partition is None else [F(partition)]
+    order_by = F('average').desc()
+    rows = rows.annotate(
+        rank=Window(Rank(), partition_by=partition_by, order_by=order_by),
+        percent_rank=Window(PercentRank(), partition_by=partition_by, order_by=order_by),
+    ).order_by(*keys[1:], 'rank', 'student_id')
+    return [
+        (row[partition] if partition else None, row['student_id'], row['average'], row['rank'], 1 - row['percent_rank'])
+        for row in rows.iterator(chunk_size=5000)
+    ]
+
+
+def rank_rows(rows, use_numpy=None):
+    """
+    Ranks `(partition_value, student_id, average)` rows like ranking_rows() does with
+    RANK() and PERCENT_RANK() over each partition, ordered by average descending.
+    Uses NumPy when it is installed (or `use_numpy` is True), else rank_in_python().
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and rows:
+        return _rank_with_numpy(rows)
+    return rank_in_python(rows)
+
+
+def _rank_with_numpy(rows):
+    partitioned = rows[0][0] is not None  # Either every row has a partition or none has
+    partitions = np.fromiter((row[0] if partitioned else 0 for row in rows), dtype=np.int64, count=len(rows))
+    students = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    averages = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+
+    # By partition, then average descending, then student (the last key sorts first)
+    order = np.lexsort((students, -averages, partitions))
+    partitions, students, averages = partitions[order], students[order], averages[order]
+    positions = np.arange(len(order))
+    group_starts = np.ones(len(order), dtype=bool)
+    group_starts[1:] = partitions[1:] != partitions[:-1]
+    # A tie run starts at every new average; its students share the first one's rank
+    run_starts = group_starts.copy()
+    run_starts[1:] |= averages[1:] != averages[:-1]
+    first_in_group = np.maximum.accumulate(np.where(group_starts, positions, 0))
+    first_in_run = np.maximum.accumulate(np.where(run_starts, positions, 0))
+    ranks = first_in_run - first_in_group + 1
+    groups = np.cumsum(group_starts) - 1
+    sizes = np.bincount(groups)[groups]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentiles = np.where(sizes > 1, (sizes - ranks) / (sizes - 1), 1.0)
+
+    return list(zip(
+        partitions.tolist() if partitioned else [None] * len(order),
+        students.tolist(), averages.tolist(), ranks.tolist(), percentiles.tolist(),
+    ))
+
+
+def rank_in_python(rows):
+    """rank_rows() without NumPy: one sort of the rows, then a pass assigning ranks."""
+    sizes = Counter(row[0] for row in rows)
+    ranked = []
+    previous = None
+    for partition, student_id, average in sorted(rows, key=lambda row: (row[0], -row[2], row[1])):
+        if previous is None or partition != previous[0]:
+            position, rank = 0, 1
+        elif average != previous[2]:
+            rank = position + 1  # Students tied on the same average share the first one's rank
+        size = sizes[partition]
+        ranked.append((partition, student_id, average, rank, (size - rank) / (size - 1) if size > 1 else 1.0))
+        position += 1
+        previous = (partition, student_id, average)
+    return ranked
+
+
+def combined_ranking_rows(querysets, total, count, partition=None):
+    """
+    ranking_rows() over the union of several querysets (e.g. live and archived grades):
+    each is grouped in the database, and the groups are merged and ranked in process.
+    """
+    if len(querysets) == 1:
+        return ranking_rows(querysets[0], total, count, partition)
+    keys = ['student_id'] if partition is None else ['student_id', partition]
+    sums = defaultdict(lambda: [0.0, 0])
+    for queryset in querysets:
+        rows = queryset.order_by().values(*keys).annotate(group_total=total, group_count=count)
+        for row in rows.iterator(chunk_size=5000):
+            group = sums[(row[partition] if partition else None, row['student_id'])]
+            group[0] += float(row['group_total'])
+            group[1] += row['group_count']
+    return rank_rows([
+        (partition_value, student_id, group_total / group_count)
+        for (partition_value, student_id), (group_total, group_count) in sums.items()
+    ])
+
+
+def histogram_rows(grades):
+    """Counts `grades` per (subject, grade_type, score bucket), in one grouped query."""
+    return (
+        grades
+        .order_by()
+        .annotate(bucket=Floor(F('score') / BUCKET_SIZE))
+        .values('subject_id', 'grade_type', 'bucket')
+        .annotate(count=Count('id'))
+    )
+
+
+class Ranking:
+    """The students of one ranking (overall or one subject) in rank order."""
+
+    def __init__(self):
+        self.rows = []
+        self.positions = {}
+
+    def add(self, student_id, average, rank, percentile):
+        self.positions[student_id] = len(self.rows)
+        self.rows.append((student_id, average, rank, percentile))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def top(self, n):
+        """Rows ranked n or better; ties at the boundary are all included."""
+        result = []
+        for row in self.rows:
+            if row[2] > n:
+                break
+            result.append(row)
+        return result
+
+    def standing(self, student_id):
+        position = self.positions.get(student_id)
+        return None if position is None else self.rows[position]
+
+
+class TermAnalytics:
+    """Rankings and histograms for the grades of one term (an optional date range)."""
+
+    def __init__(self, date_from=None, date_to=None):
+        if date_from is None and date_to is None:
+            grades = [Grade.objects.all()]
+            sources, total, count = [GradeStatistic.objects.all()], Sum('total'), Sum('count')
+        else:
+            grades = grades_between(date_from, date_to)
+            sources, total, count = grades, Sum('score'), Count('id')
+
+        self.overall = Ranking()
+        for _, student_id, average, rank, percentile in combined_ranking_rows(sources, total, count):
+            self.overall.add(student_id, average, rank, percentile)
+
+        subjects = defaultdict(Ranking)
+        for subject_id, student_id, average, rank, percentile in combined_ranking_rows(sources, total, count, 'subject_id'):
+            subjects[subject_id].add(student_id, average, rank, percentile)
+        self.subjects = dict(subjects)
+
+        histograms = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        for queryset in grades:
+            for row in histogram_rows(queryset).iterator():
+                histograms[row['subject_id']][row['grade_type']][int(row['bucket'])] += row['count']
+        # Plain dicts: instances are shared between threads and must not grow on lookup
+        self.histograms = {
+            pk: {grade_type: dict(buckets) for grade_type, buckets in types.items()}
+            for pk, types in histograms.items()
+        }
+
+
+class AnalyticsCache:
+    """
+    Per-process cache of TermAnalytics, keyed by term and checked against the Grade
+    collection version, like the typeahead indexes in students/suggest.py. Thread-safe.
+    """
+
+    def __init__(self, size=CACHED_TERMS):
+        self.size = size
+        self._lock = threading.Lock()
+        self._terms = OrderedDict()
+
+    def get(self, date_from=None, date_to=None, version=None):
+        """The analytics of a term. Pass the Grade `version` when it has already been read."""
+        key = (date_from, date_to)
+        version = version or collection_version(Grade)
+        with self._lock:
+            cached = self._terms.get(key)
+            if cached is not None and cached[0] == version:
+                self._terms.move_to_end(key)
+                return cached[1]
+        # Computed outside the lock, so a slow term does not hold up cached ones
+        analytics = TermAnalytics(date_from, date_to)
+        with self._lock:
+            self._terms[key] = (version, analytics)
+            self._terms.move_to_end(key)
+            while len(self._terms) > self.size:
+                self._terms.popitem(last=False)
+        return analytics
+
+
+# Process-wide cache used by GradeViewSet.analytics
+term_analytics = AnalyticsCache()
+
+
+def _entry(row, students=None):
+    student_id, average, rank, percentile = row
+    entry = {
+        'average': round(average, 2),
+        'rank': rank,
+        'percentile': round(percentile * 100, 1),
+    }
+    if students is not None:
+        entry = {'student': students.get(student_id), **entry}
+    return entry
+
+
+def _histogram(buckets):
+    """Every bucket from 0 up to the highest non-empty one, so charts get a continuous axis."""
+    if not buckets:
+        return []
+    return [
+        {'from': bucket * BUCKET_SIZE, 'to': (bucket + 1) * BUCKET_SIZE, 'count': buckets.get(bucket, 0)}
+        for bucket in range(min(0, min(buckets)), max(buckets) + 1)
+    ]
+
+
+def analytics_payload(analytics, top=DEFAULT_TOP, subject_id=None, student_id=None):
+    """
+    Builds the analytics response from a TermAnalytics: top-`top` students overall and
+    per subject (optionally only `subject_id`), histograms per subject and grade type,
+    and, when `student_id` is given, that student's standing in every ranking.
+    Costs two small queries for the student and subject details.
+    """
+    subject_ids = sorted(analytics.subjects.keys() | analytics.histograms.keys())
+    if subject_id is not None:
+        subject_ids = [pk for pk in subject_ids if pk == subject_id]
+
+    rankings = {pk: analytics.subjects.get(pk) or Ranking() for pk in subject_ids}
+    histograms = {pk: analytics.histograms.get(pk, {}) for pk in subject_ids}
+    tops = {None: analytics.overall.top(top)}
+    tops.update((pk, rankings[pk].top(top)) for pk in subject_ids)
+    wanted = {row[0] for rows in tops.values() for row in rows}
+    if student_id is not None:
+        wanted.add(student_id)
+    students = {
+        row['id']: {
+            'id': row['id'], 'student_id': row['student_id'],
+            'full_name': f"{row['first_name']} {row['last_name']}",
+        }
+        for row in Student.objects.filter(pk__in=wanted).values('id', 'student_id', 'first_name', 'last_name')
+    }
+    subjects = {row['id']: row for row in Subject.objects.filter(pk__in=subject_ids).values('id', 'code', 'name')}
+
+    payload = {
+        'bucket_size': BUCKET_SIZE,
+        'overall': {
+            'students': len(analytics.overall),
+            'top': [_entry(row, students) for row in tops[None]],
+        },
+        'subjects': [
+            {
+                'subject': subjects.get(pk),
+                'students': len(rankings[pk]),
+                'top': [_entry(row, students) for row in tops[pk]],
+                'histograms': {
+                    grade_type: _histogram(histograms[pk][grade_type])
+                    for grade_type, _ in Grade.GRADE_TYPES if grade_type in histograms[pk]
+                },
+            }
+            for pk in subject_ids
+        ],
+    }
+    if student_id is not None:
+        overall = analytics.overall.standing(student_id)
+        payload['student'] = {
+            'student': students.get(student_id),
+            'overall': None if overall is None else _entry(overall),
+            'subjects': [
+                {'subject_id': pk, **_entry(standing)}
+                for pk in subject_ids
+                if (standing := rankings[pk].standing(student_id)) is not None
+            ],
+        }
+    return payload
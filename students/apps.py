@@ -8,3 +8,7 @@ class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
     verbose_name = 'Student Management' # A human-readable name for the app in admin
+
+    def ready(self):
+        # Register signal handlers (grade statistics maintenance)
+        from . import signals  # noqa: F401
@@ -0,0 +1,92 @@
+# students/async_reads.py
+# This file implements the async read path used when the project is served over
+# ASGI (see DJANGO_SERVER_MODE in settings.py and gunicorn.conf.py).
+#
+# DRF views are synchronous, so under ASGI every request would otherwise hold a
+# thread for as long as its queries run. Here, GET requests for the viewset
+# actions that have an async counterpart (`alist`, `aretrieve`, `asummary`, ...)
+# are dispatched to coroutines that read through Django's async ORM, leaving the
+# event loop free to serve other requests while the database works. Everything
+# else (writes, actions without an async version) runs the regular DRF view in a
+# worker thread, exactly as Django does for any sync view under ASGI.
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.urls import URLPattern
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """Viewset mixin with async versions of the `list` and `retrieve` actions."""
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([row async for row in queryset], many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        """Async counterpart of GenericAPIView.get_object()."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            # order_by(): afirst() falls back to the primary key, no JOIN for Meta.ordering
+            instance = await queryset.order_by().filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).afirst()
+        except (TypeError, ValueError, ValidationError):
+            instance = None
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+
+def async_read_view(view):
+    """
+    Wraps a view produced by `ViewSet.as_view(actions)` in a coroutine view that serves
+    GET through the viewset's async action and hands every other method to `view`.
+    """
+    cls, actions, initkwargs = view.cls, view.actions, view.initkwargs
+    sync_view = sync_to_async(view)
+
+    async def dispatch(request, *args, **kwargs):
+        handler_name = actions.get('get')
+        if request.method != 'GET' or not hasattr(cls, f'a{handler_name}'):
+            return await sync_view(request, *args, **kwargs)
+
+        # Same setup as ViewSetMixin.as_view() and APIView.dispatch()
+        self = cls(**initkwargs)
+        self.action_map = actions
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # Authentication may read the session from the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, f'a{handler_name}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(request, response, *args, **kwargs)
+
+    dispatch.cls = cls
+    dispatch.initkwargs = initkwargs
+    dispatch.actions = actions
+    dispatch.csrf_exempt = True # As for every DRF view; DRF enforces CSRF for session auth itself
+    return dispatch
+
+
+def async_read_urls(urls):
+    """Returns router URL patterns with each viewset view wrapped by async_read_view."""
+    patterns = []
+    for pattern in urls:
+        if isinstance(pattern, URLPattern) and hasattr(pattern.callback, 'actions'):
+            pattern = URLPattern(pattern.pattern, async_read_view(pattern.callback), pattern.default_args, pattern.name)
+        patterns.append(pattern)
+    return patterns
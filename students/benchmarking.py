@@ -0,0 +1,321 @@
+# students/benchmarking.py
+# This file contains the request scenarios and timing helpers used by
+# `manage.py bench`. Requests go through the full Django/DRF stack in-process
+# (middleware, routing, serialization, rendering) via DRF's APIClient, so the
+# numbers reflect server-side cost without network noise.
+#
+# Also holds the renderer/compression comparison behind `manage.py bench_render`.
+
+import http.client
+import itertools
+import os
+import statistics as pystats
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from sms_backend.metrics import percentile
+from sms_backend.middleware import compress_bytes
+from .models import Student, Subject, Grade
+from .renderers import dumps
+
+
+def summarize_timings(seconds):
+    """Returns latency percentiles (ms) and throughput for a list of request durations."""
+    values = sorted(value * 1000 for value in seconds)
+    total = sum(seconds)
+    return {
+        'requests': len(values),
+        'p50_ms': round(percentile(values, 0.50), 3),
+        'p95_ms': round(percentile(values, 0.95), 3),
+        'p99_ms': round(percentile(values, 0.99), 3),
+        'mean_ms': round(pystats.fmean(values), 3),
+        'max_ms': round(values[-1], 3),
+        'throughput_rps': round(len(values) / total, 1) if total else None,
+    }
+
+
+def build_scenarios():
+    """
+    Returns `(name, method, path_factory, payload_factory)` tuples covering list, retrieve,
+    search, create and filtered-grade requests on the three viewsets.
+    Factories receive the iteration number so every create uses fresh unique values.
+    """
+    student = Student.objects.order_by('pk').first()
+    subject = Subject.objects.order_by('pk').first()
+    grade = Grade.objects.order_by('pk').first()
+    search_term = student.last_name[:6]
+    # Analytics requests for many different students miss the response cache but share the term's rankings
+    ranked_students = list(Student.objects.order_by('pk').values_list('pk', flat=True)[:1000])
+
+    def student_payload(number):
+        return {
+            'student_id': f'BENCH{number:08d}', 'first_name': 'Bench', 'last_name': f'Create{number}',
+            'email': f'bench{number}@example.com',
+        }
+
+    def subject_payload(number):
+        return {'name': f'Bench subject {number}', 'code': f'BN{number:06d}'}
+
+    # Grades are unique per (student, subject, grade_type, day), so creates go to a
+    # dedicated subject and walk through distinct (student, grade_type) pairs
+    grade_subject, _ = Subject.objects.get_or_create(code='BENCHGR', defaults={'name': 'Benchmark grades'})
+    slots = itertools.product(
+        Student.objects.order_by('pk').values_list('pk', flat=True)[:5000], ('activity', 'quiz', 'exam'),
+    )
+
+    def grade_payload(number):
+        student_pk, grade_type = next(slots)
+        return {
+            'student_id': student_pk, 'subject_id': grade_subject.pk,
+            'grade_type': grade_type, 'score': '88.00', 'notes': 'bench',
+        }
+
+    return [
+        ('students.list', 'get', lambda n: '/api/students/', None),
+        ('students.retrieve', 'get', lambda n: f'/api/students/{student.pk}/', None),
+        ('students.search', 'get', lambda n: f'/api/students/?search={search_term}', None),
+        ('students.create', 'post', lambda n: '/api/students/', student_payload),
+        ('subjects.list', 'get', lambda n: '/api/subjects/', None),
+        ('subjects.retrieve', 'get', lambda n: f'/api/subjects/{subject.pk}/', None),
+        ('subjects.search', 'get', lambda n: f'/api/subjects/?search={subject.code}', None),
+        ('subjects.create', 'post', lambda n: '/api/subjects/', subject_payload),
+        ('grades.list', 'get', lambda n: '/api/grades/', None),
+        ('grades.retrieve', 'get', lambda n: f'/api/grades/{grade.pk}/', None),
+        ('grades.filter_student', 'get', lambda n: f'/api/grades/?student_id={grade.student_id}', None),
+        ('grades.filter_subject', 'get', lambda n: f'/api/grades/?subject_id={grade.subject_id}', None),
+        ('grades.summary', 'get', lambda n: '/api/grades/summary/', None),
+        ('grades.analytics', 'get', lambda n: '/api/grades/analytics/', None),
+        ('grades.analytics_student', 'get', lambda n: f'/api/grades/analytics/?student_id={ranked_students[n % len(ranked_students)]}', None),
+        ('grades.analytics_term', 'get', lambda n: f'/api/grades/analytics/?date_from=2000-01-01&student_id={ranked_students[n % len(ranked_students)]}', None),
+        ('grades.create', 'post', lambda n: '/api/grades/', grade_payload),
+    ]
+
+
+def run_scenarios(iterations=50, warmup=5, only=None):
+    """
+    Runs every scenario `warmup + iterations` times and returns timing summaries keyed
+    by scenario name. Non-2xx responses are counted as errors. The response cache is
+    disabled, so repeated GETs measure the work of building the response, not cache hits.
+    """
+    # 'localhost' is always in ALLOWED_HOSTS ('testserver' is only added by the test runner)
+    client = APIClient(HTTP_HOST='localhost')
+    results = {}
+    counter = itertools.count()
+    with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+        for name, method, path_factory, payload_factory in build_scenarios():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            timings = []
+            errors = 0
+            for iteration in range(warmup + iterations):
+                number = next(counter)
+                path = path_factory(number)
+                kwargs = {'format': 'json'}
+                if payload_factory is not None:
+                    kwargs['data'] = payload_factory(number)
+                started = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+                if iteration < warmup:
+                    continue
+                if response.status_code >= 300:
+                    errors += 1
+                timings.append(elapsed)
+            results[name] = {**summarize_timings(timings), 'errors': errors}
+    return results
+
+
+def compare_results(current, baseline):
+    """Returns the relative change (%) of p50/p95 latency per scenario present in both runs."""
+    changes = {}
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            metric: round((result[metric] - previous[metric]) / previous[metric] * 100, 1) if previous[metric] else None
+            for metric in ('p50_ms', 'p95_ms')
+        }
+    return changes
+
+
+def simulated_latency(milliseconds):
+    """
+    Returns a connection_created receiver (installed by sms_backend/bench_app.py for
+    `manage.py bench_servers --db-latency-ms`): every query on a new connection first
+    sleeps for `milliseconds`, blocking its thread the way waiting on a remote database
+    server would.
+    """
+    delay = milliseconds / 1000
+
+    def delayed(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def add_simulated_latency(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delayed)
+
+    return add_simulated_latency
+
+
+def process_tree_rss(pid):
+    """
+    Returns the resident memory (MB) of a process and all its descendants, read from
+    /proc (Linux only). Returns None where /proc is not available.
+    """
+    total_kb = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f'/proc/{current}/status') as handle:
+                for line in handle:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as handle:
+                    pending.extend(int(child) for child in handle.read().split())
+    except (OSError, ValueError):
+        return None if not total_kb else round(total_kb / 1024, 1)
+    return round(total_kb / 1024, 1)
+
+
+def run_load(base_url, paths, concurrency=16, duration=10.0):
+    """
+    Sends GET requests for `paths` (cycled) from `concurrency` threads, each with its own
+    keep-alive connection, for `duration` seconds against a running server.
+    Returns timing summaries plus the error count, like run_scenarios.
+    """
+    url = urlsplit(base_url)
+    path_cycle = itertools.cycle(paths)
+    cycle_lock = threading.Lock()
+    timings = []
+    errors = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+        local_timings = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            with cycle_lock:
+                path = next(path_cycle)
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers={'Host': 'localhost', 'Accept': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 300:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+            local_timings.append(time.perf_counter() - started)
+        connection.close()
+        with cycle_lock:
+            timings.extend(local_timings)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = summarize_timings(timings) if timings else {'requests': 0}
+    # Requests overlap, so throughput is requests over wall time, not over summed latency
+    result['throughput_rps'] = round(len(timings) / elapsed, 1) if elapsed else None
+    result['errors'] = errors[0]
+    return result
+
+
+# Responses compared by `manage.py bench_render`: the largest pages (nested and compact
+# grade rows) and the student list. Encoding the whole grade table, as `?paginate=false`
+# streams it, is timed separately by time_encoding(); per request it is all serialization
+RENDER_PATHS = {
+    'grades.page': '/api/grades/?page_size=1000',
+    'grades.compact_page': '/api/grades/?page_size=1000&compact=true',
+    'students.page': '/api/students/?page_size=1000',
+}
+JSON_BACKENDS = ('stdlib', 'orjson')
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def time_encoding(data, backends=JSON_BACKENDS, encodings=ENCODINGS, iterations=5):
+    """
+    Times encoding `data` (e.g. a serialized grade table) with each JSON backend, and
+    compressing the result with each coding. Returns `{'json': ..., 'compression': ...}`
+    with the median time in ms and the output size in bytes.
+    """
+    results = {'json': {}, 'compression': {}}
+    content = b''
+    for backend in backends:
+        timings = []
+        with override_settings(JSON_BACKEND=backend):
+            for _ in range(iterations):
+                started = time.perf_counter()
+                content = dumps(data)
+                timings.append(time.perf_counter() - started)
+        results['json'][backend] = {'encode_ms': round(pystats.median(timings) * 1000, 2), 'bytes': len(content)}
+
+    for encoding in encodings:
+        if encoding == 'identity':
+            continue
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            compressed = compress_bytes(content, encoding)
+            timings.append(time.perf_counter() - started)
+        results['compression'][encoding] = {
+            'compress_ms': round(pystats.median(timings) * 1000, 2),
+            'bytes': len(compressed),
+            'ratio': round(len(content) / len(compressed), 2),
+        }
+    return results
+
+
+def run_render_scenarios(paths=RENDER_PATHS, backends=JSON_BACKENDS, encodings=ENCODINGS, iterations=20, warmup=2):
+    """
+    Requests every path with each JSON backend and Accept-Encoding, through the full
+    stack, and returns `{'<backend>/<encoding>': {path name: summary}}`. Besides latency,
+    each summary has the mean CPU time per request and the bytes sent on the wire.
+    The response cache is disabled, so every request is serialized, encoded and compressed.
+    """
+    client = APIClient(HTTP_HOST='localhost')
+    results = {}
+    with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+        for backend in backends:
+            for encoding in encodings:
+                variant = results[f'{backend}/{encoding}'] = {}
+                with override_settings(JSON_BACKEND=backend):
+                    for name, path in paths.items():
+                        timings, cpu = [], []
+                        errors = wire_bytes = 0
+                        for iteration in range(warmup + iterations):
+                            started, cpu_started = time.perf_counter(), time.process_time()
+                            response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                            body = b''.join(response.streaming_content) if response.streaming else response.content
+                            elapsed, cpu_elapsed = time.perf_counter() - started, time.process_time() - cpu_started
+                            if iteration < warmup:
+                                continue
+                            if response.status_code >= 300:
+                                errors += 1
+                            timings.append(elapsed)
+                            cpu.append(cpu_elapsed)
+                            wire_bytes = len(body)
+                        variant[name] = {
+                            **summarize_timings(timings),
+                            'cpu_ms': round(pystats.fmean(cpu) * 1000, 3),
+                            'wire_bytes': wire_bytes,
+                            'errors': errors,
+                        }
+    return results
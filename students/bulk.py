@@ -0,0 +1,228 @@
+# students/bulk.py
+# This file contains the batched write paths used by the bulk endpoints.
+# Each batch is validated with a fixed number of set-based queries and written
+# with bulk_create inside a single transaction, instead of one request (and
+# several queries) per row.
+
+import csv
+import time
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from django.utils import timezone
+
+from . import statistics
+from .caching import bump_version
+from .models import Student, Subject, Grade
+from .serializers import BulkGradeRowSerializer, StudentImportRowSerializer
+from .streaming import iter_chunks
+
+# Largest number of grade rows accepted in a single bulk request.
+MAX_BULK_GRADES = 5000
+
+# Fields that identify a grade (Grade.Meta.unique_together).
+GRADE_UNIQUE_FIELDS = ('student', 'subject', 'grade_type', 'date_recorded')
+
+
+def validate_row(validator, row):
+    """
+    Validates one row with a shared serializer instance and returns `(data, errors)`.
+    Reusing the instance avoids re-building (deep-copying) the serializer's fields for
+    every row, which dominates the cost of validating large batches.
+    """
+    try:
+        return validator.run_validation(row), None
+    except ValidationError as exc:
+        detail = exc.detail
+        return None, dict(detail) if isinstance(detail, dict) else {'non_field_errors': detail}
+
+
+def bulk_save_grades(rows, upsert=False, batch_size=500):
+    """
+    Validates and saves a list of grade dicts.
+
+    Returns `(result, errors)`. `errors` is a list of `{'index': i, 'errors': {...}}`
+    entries; when it is non-empty nothing has been written. Otherwise `result` holds
+    the number of created and updated grades.
+
+    Queries: one for students, one for subjects, one for existing unique_together
+    collisions, then the INSERT batches, independently of how many rows are sent.
+    """
+    # Field-level validation only; no queries are run per row
+    validator = BulkGradeRowSerializer()
+    valid = []
+    row_errors = []
+    for index, row in enumerate(rows):
+        data, errors = validate_row(validator, row)
+        if errors:
+            row_errors.append(errors)
+        else:
+            valid.append((index, data))
+            row_errors.append({})
+
+    student_ids = {data['student_id'] for _, data in valid}
+    subject_ids = {data['subject_id'] for _, data in valid}
+    # order_by() drops Meta.ordering, which would otherwise add sorts (and, for Grade, JOINs)
+    existing_students = set(Student.objects.filter(pk__in=student_ids).order_by().values_list('pk', flat=True))
+    existing_subjects = set(Subject.objects.filter(pk__in=subject_ids).order_by().values_list('pk', flat=True))
+
+    today = timezone.localdate()  # date_recorded is auto_now_add
+    existing_keys = set(
+        Grade.objects.filter(
+            student_id__in=existing_students, subject_id__in=existing_subjects, date_recorded=today,
+        ).order_by().values_list('student_id', 'subject_id', 'grade_type')
+    )
+
+    grades = []
+    seen = {}
+    updated = 0
+    for index, data in valid:
+        errors = {}
+        if data['student_id'] not in existing_students:
+            errors['student_id'] = [f"Invalid pk \"{data['student_id']}\" - object does not exist."]
+        if data['subject_id'] not in existing_subjects:
+            errors['subject_id'] = [f"Invalid pk \"{data['subject_id']}\" - object does not exist."]
+        key = (data['student_id'], data['subject_id'], data['grade_type'])
+        if key in seen:
+            errors['non_field_errors'] = [f'Duplicates row {seen[key]} (same student, subject, grade_type and date).']
+        elif key in existing_keys:
+            if upsert:
+                updated += 1
+            else:
+                errors['non_field_errors'] = ['The fields student, subject, grade_type, date_recorded must make a unique set.']
+        seen.setdefault(key, index)
+
+        if errors:
+            row_errors[index] = errors
+        else:
+            grades.append(Grade(
+                student_id=data['student_id'], subject_id=data['subject_id'],
+                grade_type=data['grade_type'], score=data['score'], notes=data.get('notes'),
+            ))
+
+    errors = [{'index': index, 'errors': error} for index, error in enumerate(row_errors) if error]
+    if errors:
+        return None, errors
+
+    with transaction.atomic():
+        if upsert:
+            Grade.objects.bulk_create(
+                grades, batch_size=batch_size, update_conflicts=True,
+                unique_fields=GRADE_UNIQUE_FIELDS, update_fields=['score', 'notes', 'updated_at'],
+            )
+        else:
+            Grade.objects.bulk_create(grades, batch_size=batch_size)
+        # bulk_create sends no signals, so bring the statistics cells up to date here
+        statistics.refresh_cells({(grade.student_id, grade.subject_id, grade.grade_type) for grade in grades})
+        bump_version(Grade)
+    return {'created': len(grades) - updated, 'updated': updated}, []
+
+
+# Columns a roster CSV must provide; `date_of_birth` is optional.
+STUDENT_IMPORT_COLUMNS = ('student_id', 'first_name', 'last_name', 'email')
+STUDENT_UPDATE_FIELDS = [
+    'first_name', 'last_name', 'email', 'date_of_birth',
+    'first_name_key', 'last_name_key',  # Keep the normalized search columns in step
+    'updated_at',  # So the delta sync endpoint reports the change
+]
+
+# Only the first errors are reported in detail, so a bad file cannot blow up the response.
+MAX_REPORTED_ERRORS = 100
+
+
+class RosterImportError(ValueError):
+    """Raised when a roster file cannot be imported at all (e.g. missing columns)."""
+
+
+def import_students_csv(text_stream, batch_size=1000, update_existing=False):
+    """
+    Imports students from a CSV text stream, one chunk of `batch_size` rows at a time.
+
+    The file is parsed incrementally, so memory grows with the chunk size rather than
+    the file size (plus one set of seen ids/emails for duplicate detection). For each
+    chunk, existing `student_id`s and `email`s are looked up with one `IN` query each,
+    and new rows are written with bulk_create inside a per-chunk transaction.
+
+    Rows whose `student_id` already exists are skipped, or updated when
+    `update_existing` is true. Invalid rows are reported and do not stop the import.
+    """
+    started = time.perf_counter()
+    reader = csv.DictReader(text_stream)
+    missing = [column for column in STUDENT_IMPORT_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise RosterImportError(f"Missing required column(s): {', '.join(missing)}")
+
+    stats = {'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+    validator = StudentImportRowSerializer()
+    seen_ids = set()
+    seen_emails = set()
+
+    def fail(line, errors):
+        stats['failed'] += 1
+        if len(stats['errors']) < MAX_REPORTED_ERRORS:
+            stats['errors'].append({'line': line, 'errors': errors})
+
+    # Pair every row with its line number before chunking (reader.line_num moves on as we read)
+    numbered_rows = ((reader.line_num, row) for row in reader)
+    for chunk in iter_chunks(numbered_rows, batch_size):
+        valid = []
+        for line, row in chunk:
+            stats['rows'] += 1
+            data, errors = validate_row(validator, row)
+            if errors:
+                fail(line, errors)
+                continue
+            email = data['email'].lower()
+            if data['student_id'] in seen_ids:
+                fail(line, {'student_id': ['Duplicate student_id earlier in the file.']})
+                continue
+            if email in seen_emails:
+                fail(line, {'email': ['Duplicate email earlier in the file.']})
+                continue
+            seen_ids.add(data['student_id'])
+            seen_emails.add(email)
+            valid.append((line, data))
+
+        student_ids = [data['student_id'] for _, data in valid]
+        emails = [data['email'] for _, data in valid]
+        existing_ids = set(
+            Student.objects.filter(student_id__in=student_ids).order_by().values_list('student_id', flat=True)
+        )
+        # Maps each email already in use to the student_id that owns it
+        email_owners = dict(
+            Student.objects.filter(email__in=emails).order_by().values_list('email', 'student_id')
+        )
+
+        to_create = []
+        to_update = []
+        for line, data in valid:
+            owner = email_owners.get(data['email'])
+            if data['student_id'] in existing_ids:
+                if not update_existing:
+                    stats['skipped'] += 1
+                    continue
+                if owner is not None and owner != data['student_id']:
+                    fail(line, {'email': ['student with this email already exists.']})
+                    continue
+                to_update.append(Student(**data))
+            elif owner is not None:
+                fail(line, {'email': ['student with this email already exists.']})
+            else:
+                to_create.append(Student(**data))
+
+        with transaction.atomic():
+            Student.objects.bulk_create(to_create, batch_size=batch_size)
+            if to_update:
+                Student.objects.bulk_create(
+                    to_update, batch_size=batch_size, update_conflicts=True,
+                    unique_fields=['student_id'], update_fields=STUDENT_UPDATE_FIELDS,
+                )
+            if to_create or to_update:
+                bump_version(Student)
+        stats['created'] += len(to_create)
+        stats['updated'] += len(to_update)
+
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = round(elapsed, 3)
+    stats['rows_per_second'] = round(stats['rows'] / elapsed) if elapsed > 0 else None
+    return stats
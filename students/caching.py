@@ -0,0 +1,176 @@
+# students/caching.py
+# This file implements HTTP conditional requests and a versioned response cache
+# for the read endpoints.
+#
+# Every model collection (Student, Subject, Grade, ...) has a change version, a row
+# of the CollectionVersion table replaced with a fresh token after each committed
+# write. The table is shared by every process (gunicorn workers, the job worker,
+# management commands run from cron), so a write made anywhere invalidates the
+# others. An endpoint's ETag is derived from the versions of the collections it
+# reads plus the request path and query string, so it costs one primary-key lookup
+# on that small table: a matching If-None-Match is answered with 304 straight away,
+# and a cached body rendered under the same ETag is returned as-is. Bodies can then
+# live in any cache, even a per-process one, since a stale worker computes a new
+# ETag rather than serving them.
+
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from .models import CollectionVersion
+
+# Version of a collection that has not been written since the table was created
+INITIAL_VERSION = 'initial'
+RESPONSE_KEY = 'api-response:{}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def collection_versions(*models):
+    """Returns the current change tokens of the given models' collections, keyed by model, in one query."""
+    names = {model: model._meta.label_lower for model in models}
+    # On a replica, the versions come from the same snapshot as the rows the request reads.
+    # They are written after the data they describe, so a version is never newer than the data
+    stored = dict(CollectionVersion.objects.filter(name__in=set(names.values())).values_list('name', 'version'))
+    return {model: stored.get(name, INITIAL_VERSION) for model, name in names.items()}
+
+
+def collection_version(model):
+    """Returns the current change token for a model's collection."""
+    return collection_versions(model)[model]
+
+
+def store_new_versions(names):
+    now = timezone.now()
+    CollectionVersion.objects.bulk_create(
+        [CollectionVersion(name=name, version=uuid.uuid4().hex, changed_at=now) for name in sorted(names)],
+        update_conflicts=True, unique_fields=['name'], update_fields=['version', 'changed_at'],
+    )
+
+
+def bump_version(*models):
+    """
+    Gives each model's collection a new change token once the current transaction commits
+    (immediately when not in a transaction), so a concurrent reader cannot cache data
+    from before the commit under the new version.
+    """
+    if not models:
+        return
+    names = {model._meta.label_lower for model in models}
+    transaction.on_commit(lambda: store_new_versions(names))
+
+
+def seconds_since_last_write():
+    """
+    Seconds since the last committed write bumped a collection version, in any process
+    (None if none has). Read from the primary: a lagging replica would report an older write.
+    """
+    written_at = CollectionVersion.objects.using(DEFAULT_DB_ALIAS).aggregate(latest=Max('changed_at'))['latest']
+    return None if written_at is None else (timezone.now() - written_at).total_seconds()
+
+
+class ConditionalCacheMixin:
+    """
+    Viewset mixin adding ETag/If-None-Match support and a response cache to the
+    `list` and `retrieve` actions. Set `cache_dependencies` to every model whose
+    data appears in the responses.
+    """
+    cache_dependencies = ()
+
+    def get_cache_dependencies(self):
+        """Models whose data the current action returns; override for actions that read more."""
+        return self.cache_dependencies
+
+    def etag_context(self):
+        """Values besides the request and the collections that select the response (e.g. a default term)."""
+        return ()
+
+    def dependency_versions(self):
+        """The versions of get_cache_dependencies(), read once per request."""
+        if getattr(self, '_dependency_versions', None) is None:
+            self._dependency_versions = collection_versions(*self.get_cache_dependencies())
+        return self._dependency_versions
+
+    def get_etag(self, request):
+        parts = [self.dependency_versions()[model] for model in self.get_cache_dependencies()]
+        parts += [str(value) for value in self.etag_context()]
+        # The absolute URI covers host/scheme too, since paginated bodies embed absolute links
+        parts += [request.build_absolute_uri(), request.accepted_renderer.format]
+        return '"{}"'.format(hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest())
+
+    def cached_response(self, request, compute):
+        response, etag = self.lookup_response(request)
+        if response is not None:
+            return response
+        return self.store_response(compute(), etag)
+
+    async def acached_response(self, request, compute):
+        """Async counterpart of cached_response; `compute` is a coroutine function."""
+        # Cache backends are synchronous (their async API runs every call in a thread),
+        # so all lookups are done in a single thread hop
+        response, etag = await sync_to_async(self.lookup_response)(request)
+        if response is not None:
+            return response
+        return self.store_response(await compute(), etag)
+
+    def lookup_response(self, request):
+        """
+        Returns `(response, etag)`: a 304 or the cached body when one applies,
+        otherwise `(None, etag)` and the response has to be computed.
+        """
+        etag = self.get_etag(request)
+        # Weak comparison: CompressionMiddleware sends compressed bodies with a W/ ETag
+        if etag in (tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))):
+            return self.not_modified(etag), etag
+        cached = get_cache().get(RESPONSE_KEY.format(etag.strip('"')))
+        if cached is not None:
+            return self.cached_body(etag, cached), etag
+        return None, etag
+
+    def not_modified(self, etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    def cached_body(self, etag, cached):
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    def store_response(self, response, etag):
+        """Tags a freshly computed response and caches its body once it has been rendered."""
+        response['ETag'] = etag
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            cache = get_cache()
+            key = RESPONSE_KEY.format(etag.strip('"'))
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+            def store(rendered):
+                cache.set(key, (rendered.content, rendered['Content-Type']), timeout)
+                return None  # A non-None return value would replace the response
+
+            response.add_post_render_callback(store)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ConditionalCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ConditionalCacheMixin, self).retrieve(request, *args, **kwargs))
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(request, lambda: super(ConditionalCacheMixin, self).alist(request, *args, **kwargs))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(request, lambda: super(ConditionalCacheMixin, self).aretrieve(request, *args, **kwargs))
@@ -0,0 +1,211 @@
+# students/grading.py
+# This file implements the weighted grading engine behind `/api/grades/final/`
+# and `manage.py compute_final_grades` (and the `final_grades` background job).
+#
+# A student's final grade in a subject is the weighted mean of their average per
+# grade type (activity, quiz, exam), using the subject's GradingPolicy weights
+# (or settings.DEFAULT_GRADE_WEIGHTS). Types without grades are left out and the
+# remaining weights renormalized, so a missing exam does not count as zero.
+#
+# Final grades are computed for a whole class or school in one batch: the
+# per-(student, subject, grade_type) averages are read in one query (from
+# GradeStatistic, or from Grade rows for a date range, plus one query for the
+# ArchivedGrade rows of archived terms it covers) with values_list, then
+# combined with grouped array arithmetic in NumPy. Without NumPy installed,
+# the same figures come from a plain Python pass over the rows.
+
+import csv
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Avg, Count, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import Grade, GradeStatistic, GradingPolicy, Student, Subject
+from .terms import grades_between
+
+try:
+    import numpy as np
+except ImportError:  # Optional; compute_final_grades falls back to pure Python
+    np = None
+
+GRADE_TYPE_NAMES = [grade_type for grade_type, _ in Grade.GRADE_TYPES]
+TYPE_INDEX = {grade_type: position for position, grade_type in enumerate(GRADE_TYPE_NAMES)}
+
+
+def default_weights():
+    """Returns the weights used by subjects without a GradingPolicy, in GRADE_TYPES order."""
+    configured = getattr(settings, 'DEFAULT_GRADE_WEIGHTS', {})
+    return tuple(float(configured.get(grade_type, 1)) for grade_type in GRADE_TYPE_NAMES)
+
+
+def policy_weights(subject_ids=None):
+    """Returns `{subject_id: weights}` for the subjects that have a GradingPolicy."""
+    policies = GradingPolicy.objects.order_by()
+    if subject_ids is not None:
+        policies = policies.filter(subject_id__in=subject_ids)
+    fields = [f'{grade_type}_weight' for grade_type in GRADE_TYPE_NAMES]
+    return {row[0]: tuple(float(weight) for weight in row[1:]) for row in policies.values_list('subject_id', *fields)}
+
+
+def cell_rows(student_ids=None, subject_ids=None, date_from=None, date_to=None):
+    """
+    Returns `(student_id, subject_id, grade_type, average)` tuples, one per statistics
+    cell: from GradeStatistic, or aggregated from grade rows when a date range is given
+    (GradeStatistic covers all dates), archived ones included (see terms.grades_between).
+    Averages are computed as floats by the database.
+    """
+    if date_from is None and date_to is None:
+        cells = GradeStatistic.objects.order_by().annotate(
+            average=Cast('total', FloatField()) / Cast('count', FloatField()),
+        )
+    else:
+        sources = grades_between(date_from, date_to)
+        if len(sources) > 1:
+            return _merged_cell_rows(sources, student_ids, subject_ids)
+        cells = sources[0].order_by().values('student_id', 'subject_id', 'grade_type').annotate(
+            average=Avg(Cast('score', FloatField())),
+        )
+    return list(_restricted(cells, student_ids, subject_ids).values_list('student_id', 'subject_id', 'grade_type', 'average'))
+
+
+def _restricted(queryset, student_ids, subject_ids):
+    if student_ids is not None:
+        queryset = queryset.filter(student_id__in=student_ids)
+    if subject_ids is not None:
+        queryset = queryset.filter(subject_id__in=subject_ids)
+    return queryset
+
+
+def _merged_cell_rows(sources, student_ids, subject_ids):
+    """cell_rows() over several grade querysets (live and archived): per-cell sums and counts are added up."""
+    sums = defaultdict(lambda: [0.0, 0])
+    for grades in sources:
+        cells = (
+            _restricted(grades.order_by(), student_ids, subject_ids)
+            .values('student_id', 'subject_id', 'grade_type')
+            .annotate(total=Sum(Cast('score', FloatField())), count=Count('id'))
+            .values_list('student_id', 'subject_id', 'grade_type', 'total', 'count')
+        )
+        for student_id, subject_id, grade_type, total, count in cells:
+            cell = sums[(student_id, subject_id, grade_type)]
+            cell[0] += total
+            cell[1] += count
+    return [(*key, total / count) for key, (total, count) in sums.items()]
+
+
+def compute_final_grades(rows, weights, default, use_numpy=None):
+    """
+    Computes weighted final grades from `(student_id, subject_id, grade_type, average)`
+    cell rows (see cell_rows). `weights` maps
+    subject ids to per-type weights (GRADE_TYPES order); other subjects use `default`.
+    Returns `(student_id, subject_id, final, type_averages)` tuples sorted by student
+    and subject, where `type_averages` holds the average per type (None if no grades)
+    and `final` is None when every type with grades has weight 0.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if not rows:
+        return []
+    if use_numpy:
+        return _compute_with_numpy(rows, weights, default)
+    return _compute_in_python(rows, weights, default)
+
+
+def _compute_with_numpy(rows, weights, default):
+    student_ids, subject_ids, grade_types, cell_averages = zip(*rows)
+    students = np.array(student_ids, dtype=np.int64)
+    subjects = np.array(subject_ids, dtype=np.int64)
+    types = np.array([TYPE_INDEX[grade_type] for grade_type in grade_types], dtype=np.int64)
+    averages = np.array(cell_averages, dtype=np.float64)
+
+    # Weight of every cell: one row of the weight table per distinct subject
+    subject_keys, subject_index = np.unique(subjects, return_inverse=True)
+    table = np.array([weights.get(int(subject), default) for subject in subject_keys], dtype=np.float64)
+    cell_weights = table[subject_index, types]
+
+    # Group the cells by (student, subject) through a single integer key, sorted like the Python path
+    pair_keys, pair_index = np.unique(students * len(subject_keys) + subject_index, return_inverse=True)
+    weighted = np.bincount(pair_index, weights=cell_weights * averages, minlength=len(pair_keys))
+    weight_sums = np.bincount(pair_index, weights=cell_weights, minlength=len(pair_keys))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        finals = weighted / weight_sums
+
+    type_averages = np.full((len(pair_keys), len(GRADE_TYPE_NAMES)), np.nan)
+    type_averages[pair_index, types] = averages
+
+    # Back to Python values: NaN (no grades, or zero total weight) becomes None
+    pair_students = (pair_keys // len(subject_keys)).tolist()
+    pair_subjects = subject_keys[pair_keys % len(subject_keys)].tolist()
+    finals = np.where(np.isnan(finals), None, finals).tolist()
+    type_averages = np.where(np.isnan(type_averages), None, type_averages).tolist()
+    return [
+        (student, subject, final, tuple(row))
+        for student, subject, final, row in zip(pair_students, pair_subjects, finals, type_averages)
+    ]
+
+
+def _compute_in_python(rows, weights, default):
+    pairs = {}
+    for student_id, subject_id, grade_type, average in rows:
+        type_averages = pairs.setdefault((student_id, subject_id), [None] * len(GRADE_TYPE_NAMES))
+        type_averages[TYPE_INDEX[grade_type]] = average
+
+    results = []
+    for (student_id, subject_id), type_averages in sorted(pairs.items()):
+        subject_weights = weights.get(subject_id, default)
+        present = [(weight, average) for weight, average in zip(subject_weights, type_averages) if average is not None]
+        weight_sum = sum(weight for weight, _ in present)
+        final = sum(weight * average for weight, average in present) / weight_sum if weight_sum else None
+        results.append((student_id, subject_id, final, tuple(type_averages)))
+    return results
+
+
+def final_grades(student_ids=None, subject_ids=None, date_from=None, date_to=None, use_numpy=None):
+    """
+    Final grades of the given students and subjects (default: everyone), in two queries:
+    the statistics cells and the grading policies.
+    """
+    rows = cell_rows(student_ids, subject_ids, date_from, date_to)
+    return compute_final_grades(rows, policy_weights(subject_ids), default_weights(), use_numpy)
+
+
+def _rounded(value):
+    return None if value is None else round(value, 2)
+
+
+def final_grade_payload(results):
+    """Formats compute_final_grades() results as response rows."""
+    return [
+        {
+            'student': student_id,
+            'subject': subject_id,
+            'final_grade': _rounded(final),
+            'averages': {grade_type: _rounded(average) for grade_type, average in zip(GRADE_TYPE_NAMES, type_averages)},
+        }
+        for student_id, subject_id, final, type_averages in results
+    ]
+
+
+def _formatted(value):
+    return '' if value is None else f'{value:.2f}'
+
+
+def write_final_grades_csv(results, handle, student_ids=None):
+    """
+    Writes compute_final_grades() results to a text file as CSV: the student ID, subject
+    code, the average of each grade type and the final grade. `student_ids` limits the
+    student ID lookup to the students the results were computed for.
+    """
+    students = Student.objects.order_by()
+    if student_ids is not None:
+        students = students.filter(pk__in=student_ids)
+    students = dict(students.values_list('pk', 'student_id').iterator(chunk_size=5000))
+    subjects = dict(Subject.objects.order_by().values_list('pk', 'code'))
+    writer = csv.writer(handle)
+    writer.writerow(['student_id', 'subject_code', *GRADE_TYPE_NAMES, 'final_grade'])
+    for student_id, subject_id, final, type_averages in results:
+        writer.writerow([
+            students.get(student_id), subjects.get(subject_id),
+            *(_formatted(average) for average in type_averages), _formatted(final),
+        ])
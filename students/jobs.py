@@ -0,0 +1,370 @@
+# students/jobs.py
+# This file implements the background job queue behind `/api/jobs/` and
+# `manage.py run_worker`.
+#
+# Work that can outlast a web request on a large school (exports, final grades,
+# statistics rebuilds) is queued as a Job row instead of running inside a
+# gunicorn worker, where it would be killed by the worker timeout. A separate
+# process (the `worker` entry of the Procfile) claims queued jobs and runs them
+# on a thread pool. The queue lives in the application database, so no Redis or
+# other broker is needed:
+#   * A job is claimed with a conditional UPDATE (status 'queued' -> 'running'),
+#     which succeeds for exactly one worker on every database backend.
+#   * Workers record a heartbeat on the jobs they run. Jobs whose worker stopped
+#     (a crash, a redeploy) are queued again after JOB_STALE_SECONDS, up to
+#     JOB_MAX_ATTEMPTS starts, then marked failed.
+#   * The output is stored gzip-compressed in the job row and served as is to
+#     clients that accept gzip. Finished jobs are deleted after
+#     JOB_RESULT_RETENTION_HOURS.
+
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from sms_backend.middleware import accepted_encodings
+from .aggregates import summarize_statistics
+from .grading import final_grades, write_final_grades_csv
+from .models import GradeStatistic, Job, Term
+from .renderers import dumps
+from .statistics import rebuild_all
+from .streaming import GRADE_EXPORT_FIELDS, grade_export_rows, stream_csv, stream_ndjson
+from .terms import grades_in
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from a stored result per chunk when it has to be decompressed for the client
+RESULT_CHUNK_SIZE = 64 * 1024
+
+
+# Parameter parsers: each returns the JSON-serializable value stored in Job.params,
+# or raises ValueError with the message reported to the client.
+
+def _positive_int(value):
+    if isinstance(value, bool) or not str(value).isdigit() or int(value) < 1:
+        raise ValueError('A positive integer is required.')
+    return int(value)
+
+
+def _date(value):
+    try:
+        parsed = parse_date(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError('A valid date (YYYY-MM-DD) is required.')
+    return parsed.isoformat()
+
+
+def _term(value):
+    if value == 'all':
+        return value
+    if isinstance(value, bool) or not str(value).isdigit() or not Term.objects.filter(pk=int(value)).exists():
+        raise ValueError('The id of an existing term, or "all", is required.')
+    return int(value)
+
+
+def _export_format(value):
+    if value not in ('csv', 'ndjson'):
+        raise ValueError('"csv" or "ndjson" is required.')
+    return value
+
+
+def _threshold(value):
+    try:
+        parsed = Decimal(str(value))
+    except InvalidOperation:
+        parsed = None
+    if parsed is None or not parsed.is_finite():
+        raise ValueError('A valid number is required.')
+    return str(parsed)
+
+
+def _optional_date(params, name):
+    return datetime.date.fromisoformat(params[name]) if name in params else None
+
+
+# Job handlers: each writes its output to a binary file object and returns the
+# (content type, file name) of what it wrote.
+
+def export_grades(params, output):
+    """Grades as CSV or NDJSON, with the filters of `/api/grades/export/` (same term default)."""
+    date_from, date_to = _optional_date(params, 'date_from'), _optional_date(params, 'date_to')
+    term = params.get('term')
+    # Read from the database rather than the per-process calendar: the worker serves no
+    # requests, and the term may have changed since the job was queued
+    if term is None:
+        today = timezone.localdate()
+        term = None if date_from or date_to else Term.objects.filter(start_date__lte=today, end_date__gte=today).first()
+    elif term == 'all':
+        term = None
+    else:
+        pk, term = term, Term.objects.filter(pk=term).first()
+        if term is None:
+            raise ValueError(f'Term {pk} no longer exists.')
+    queryset = grades_in(term)
+    if 'student_id' in params:
+        queryset = queryset.filter(student_id=params['student_id'])
+    if 'subject_id' in params:
+        queryset = queryset.filter(subject_id=params['subject_id'])
+    if date_from is not None:
+        queryset = queryset.filter(date_recorded__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(date_recorded__lte=date_to)
+
+    header = [column for column, _ in GRADE_EXPORT_FIELDS]
+    rows = grade_export_rows(queryset).iterator(chunk_size=2000)
+    if params.get('format') == 'ndjson':
+        output.writelines(stream_ndjson(header, rows))
+        return 'application/x-ndjson', 'grades.ndjson'
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    text.writelines(stream_csv(header, rows))
+    text.detach()  # Flushes, leaving `output` open for the caller
+    return 'text/csv; charset=utf-8', 'grades.csv'
+
+
+def export_final_grades(params, output):
+    """Weighted final grades as CSV, like `manage.py compute_final_grades`."""
+    student_ids = [params['student_id']] if 'student_id' in params else None
+    results = final_grades(
+        student_ids=student_ids,
+        subject_ids=[params['subject_id']] if 'subject_id' in params else None,
+        date_from=_optional_date(params, 'date_from'), date_to=_optional_date(params, 'date_to'),
+    )
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    write_final_grades_csv(results, text, student_ids)
+    text.detach()
+    return 'text/csv; charset=utf-8', 'final_grades.csv'
+
+
+def grade_summary(params, output):
+    """The school-wide `/api/grades/summary/` payload as JSON."""
+    threshold = Decimal(params['passing_threshold']) if 'passing_threshold' in params else None
+    output.write(dumps(summarize_statistics(GradeStatistic.objects.all(), threshold)))
+    return 'application/json', 'summary.json'
+
+
+def rebuild_statistics(params, output):
+    """Rebuilds the GradeStatistic table, like `manage.py rebuild_grade_stats`."""
+    output.write(dumps({'cells': rebuild_all()}))
+    return 'application/json', 'rebuild_grade_stats.json'
+
+
+# Job kinds that can be queued: name -> (handler, accepted parameters and their parsers)
+_FILTERS = {'student_id': _positive_int, 'subject_id': _positive_int, 'date_from': _date, 'date_to': _date}
+JOB_KINDS = {
+    'grade_export': (export_grades, {**_FILTERS, 'term': _term, 'format': _export_format}),
+    'final_grades': (export_final_grades, _FILTERS),
+    'grade_summary': (grade_summary, {'passing_threshold': _threshold}),
+    'rebuild_grade_stats': (rebuild_statistics, {}),
+}
+
+
+def clean_params(kind, params):
+    """
+    Validates the parameters of a job of the given kind. Returns the cleaned parameters
+    and a dict of error messages keyed by parameter name (empty when they are valid).
+    """
+    parsers = JOB_KINDS[kind][1]
+    cleaned, errors = {}, {}
+    for name, value in params.items():
+        if name not in parsers:
+            errors[name] = f'Not a parameter of {kind} jobs.'
+            continue
+        try:
+            cleaned[name] = parsers[name](value)
+        except ValueError as exc:
+            errors[name] = str(exc)
+    return cleaned, errors
+
+
+def job_key(kind, params):
+    return hashlib.sha256(json.dumps([kind, params], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def enqueue(kind, params):
+    """
+    Queues a job with cleaned parameters, unless an identical one is already queued or
+    running. Returns (job, created).
+    """
+    key = job_key(kind, params)
+    pending = Job.objects.defer('result').filter(key=key, status__in=(Job.QUEUED, Job.RUNNING)).first()
+    if pending is not None:
+        return pending, False
+    return Job.objects.create(kind=kind, params=params, key=key), True
+
+
+def claim_job(worker):
+    """Marks the oldest queued job as running for `worker`. Returns its id, or None when there is none."""
+    candidates = Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'id').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        now = timezone.now()
+        # Only one of the workers racing for the same row sees it still queued
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return pk
+    return None
+
+
+def run_job(pk):
+    """Runs a claimed job and stores its output, or its error when the handler fails."""
+    job = Job.objects.defer('result').get(pk=pk)
+    # Updates are conditional on the claim still being ours: a job given up for stale
+    # may already have been claimed again by another worker
+    ours = Job.objects.filter(pk=pk, status=Job.RUNNING, worker=job.worker)
+    started = time.perf_counter()
+    try:
+        if job.kind not in JOB_KINDS:
+            raise ValueError(f'Unknown job kind "{job.kind}".')
+        buffer = io.BytesIO()
+        # mtime=0: identical output gives identical bytes
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6, mtime=0) as output:
+            content_type, filename = JOB_KINDS[job.kind][0](job.params, output)
+            size = output.tell()
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed', pk, job.kind)
+        ours.update(status=Job.FAILED, finished_at=timezone.now(), error=f'{type(exc).__name__}: {exc}')
+        return
+    ours.update(
+        status=Job.SUCCEEDED, finished_at=timezone.now(), error='',
+        result=buffer.getvalue(), result_type=content_type, result_name=filename, result_size=size,
+    )
+    logger.info('Job %s (%s) finished in %.2fs, %d bytes', pk, job.kind, time.perf_counter() - started, size)
+
+
+def run_next_job(worker):
+    """Claims and runs the oldest queued job in the calling thread. Returns its id, or None."""
+    pk = claim_job(worker)
+    if pk is not None:
+        run_job(pk)
+    return pk
+
+
+def recover_stale_jobs():
+    """
+    Queues again the running jobs whose worker has not sent a heartbeat for
+    JOB_STALE_SECONDS, or fails them once they have been started JOB_MAX_ATTEMPTS times.
+    Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=now - datetime.timedelta(seconds=getattr(settings, 'JOB_STALE_SECONDS', 60)),
+    )
+    max_attempts = getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=Job.FAILED, finished_at=now, error='The worker running this job stopped responding.',
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=Job.QUEUED, worker='', started_at=None, heartbeat_at=None,
+    )
+    return requeued, failed
+
+
+def prune_jobs():
+    """Deletes jobs that finished more than JOB_RESULT_RETENTION_HOURS ago. Returns how many."""
+    cutoff = timezone.now() - datetime.timedelta(hours=getattr(settings, 'JOB_RESULT_RETENTION_HOURS', 24))
+    deleted, _ = Job.objects.filter(finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def result_response(request, job):
+    """
+    Returns a finished job's output as a download: the stored gzip bytes as they are
+    (Content-Encoding: gzip) when the client accepts gzip, otherwise decompressed on the fly.
+    """
+    disposition = f'attachment; filename="{job.result_name}"'
+    if 'gzip' in accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response = HttpResponse(job.result, content_type=job.result_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        def chunks():
+            with gzip.GzipFile(fileobj=io.BytesIO(job.result)) as source:
+                while chunk := source.read(RESULT_CHUNK_SIZE):
+                    yield chunk
+        response = StreamingHttpResponse(chunks(), content_type=job.result_type)
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = disposition
+    return response
+
+
+class Worker:
+    """
+    Runs queued jobs on a pool of `concurrency` threads until stop() is called, polling
+    the queue every `poll_interval` seconds while it has free threads. Between jobs it
+    records heartbeats for the jobs it runs, recovers jobs of dead workers and prunes
+    expired results. CPU-heavy jobs hold the GIL, so for more CPU run more worker
+    processes rather than more threads.
+    """
+
+    def __init__(self, concurrency=None, poll_interval=None, name=None):
+        self.concurrency = concurrency or getattr(settings, 'JOB_WORKER_CONCURRENCY', 2)
+        self.poll_interval = poll_interval if poll_interval is not None else getattr(settings, 'JOB_POLL_SECONDS', 1)
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """Stops claiming jobs; run() returns once the running ones have finished."""
+        self._stopping.set()
+
+    def run(self, until_empty=False):
+        """Processes jobs until stopped (or, with `until_empty`, until the queue is empty)."""
+        running = {}
+        # Several heartbeats fit in the stale period, so a slow one does not lose the job
+        maintenance_interval = getattr(settings, 'JOB_STALE_SECONDS', 60) / 4
+        last_maintenance = None
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job') as pool:
+            while not self._stopping.is_set():
+                if last_maintenance is None or time.monotonic() - last_maintenance >= maintenance_interval:
+                    self.maintain(running.values())
+                    last_maintenance = time.monotonic()
+                while len(running) < self.concurrency and not self._stopping.is_set():
+                    pk = claim_job(self.name)
+                    if pk is None:
+                        break
+                    running[pool.submit(self.execute, pk)] = pk
+                if until_empty and not running:
+                    break
+                if running:
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del running[future]
+                else:
+                    self._stopping.wait(self.poll_interval)
+            # Leaving the block waits for the jobs still running
+        connection.close()
+
+    def maintain(self, running_ids):
+        Job.objects.filter(pk__in=list(running_ids), status=Job.RUNNING, worker=self.name).update(heartbeat_at=timezone.now())
+        requeued, failed = recover_stale_jobs()
+        if requeued or failed:
+            logger.warning('Recovered stale jobs: %d queued again, %d failed', requeued, failed)
+        prune_jobs()
+
+    @staticmethod
+    def execute(pk):
+        try:
+            run_job(pk)
+        except Exception:
+            # e.g. the database went away while storing the result; the job stays running
+            # and is queued again once its heartbeat goes stale
+            logger.exception('Job %s could not be completed', pk)
+        finally:
+            # Each pool thread has its own connection
+            connection.close()
@@ -0,0 +1,58 @@
+# students/management/commands/archive_grades.py
+# Moves the grades of closed terms out of the live Grade table:
+#   python manage.py archive_grades [--term NAME ...] [--batch-size N] [--dry-run]
+# Without --term, every term that has ended and is not archived yet is processed,
+# so it can run periodically. The archived grades stay readable through
+# `/api/grades/?term=<id>` (see students/terms.py).
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import Term
+from students.terms import DEFAULT_ARCHIVE_BATCH_SIZE, ArchiveError, archive_term, closed_terms, term_grades
+
+
+class Command(BaseCommand):
+    help = 'Moves the grades of closed terms to the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', action='append', dest='terms', metavar='NAME',
+            help='Archive this term (repeatable; default: every closed term not archived yet).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_ARCHIVE_BATCH_SIZE,
+            help=f'Grades moved per transaction (default {DEFAULT_ARCHIVE_BATCH_SIZE}).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many grades would be moved.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        terms = list(closed_terms()) if not options['terms'] else [self.get_term(name) for name in options['terms']]
+        if not terms:
+            self.stdout.write('No closed terms to archive.')
+            return
+
+        total = 0
+        for term in terms:
+            if options['dry_run']:
+                self.stdout.write(f'{term.name}: {term_grades(term).count()} grade(s) would be archived.')
+                continue
+            started = time.perf_counter()
+            try:
+                moved = archive_term(term, batch_size=options['batch_size'])
+            except ArchiveError as exc:
+                raise CommandError(str(exc))
+            total += moved
+            self.stdout.write(f'{term.name}: archived {moved} grade(s) in {time.perf_counter() - started:.1f}s.')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Archived {total} grade(s) from {len(terms)} term(s).'))
+
+    @staticmethod
+    def get_term(name):
+        try:
+            return Term.objects.get(name=name)
+        except Term.DoesNotExist:
+            raise CommandError(f'No term named "{name}".')
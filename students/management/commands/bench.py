@@ -0,0 +1,99 @@
+# students/management/commands/bench.py
+# Reproducible API benchmark:
+#   python manage.py bench --students 2000 --subjects 10 --grades-per-student 30 \
+#       --iterations 100 --output bench.json [--compare previous.json]
+# Seeds a synthetic school into a throwaway test database (in-memory SQLite, or
+# test_<name> on PostgreSQL), times list/retrieve/search/create/filter requests on
+# all three viewsets, and writes the results to a JSON file.
+
+import datetime
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from students.benchmarking import compare_results, run_scenarios
+from students.seeding import seed_school
+
+
+def git_revision():
+    """Returns the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Seeds a synthetic school into a test database and benchmarks the REST API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--subjects', type=int, default=10)
+        parser.add_argument('--grades-per-student', type=int, default=30)
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario (default 50).')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario (default 5).')
+        parser.add_argument('--only', action='append', help='Run only scenarios starting with this prefix (repeatable).')
+        parser.add_argument('--output', default='bench_output.json', help='Where to write the JSON results.')
+        parser.add_argument('--compare', help='Earlier results file to compare p50/p95 latency against.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as handle:
+                    baseline = json.load(handle)['results']
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            started = time.perf_counter()
+            seeded = seed_school(
+                students=options['students'], subjects=options['subjects'],
+                grades_per_student=options['grades_per_student'],
+            )
+            seed_seconds = time.perf_counter() - started
+            self.stdout.write(
+                f"Seeded {seeded['students']} students, {seeded['subjects']} subjects, "
+                f"{seeded['grades']} grades in {seed_seconds:.1f}s ({connection.vendor})"
+            )
+            results = run_scenarios(iterations=options['iterations'], warmup=options['warmup'], only=options['only'])
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        report = {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'dataset': seeded,
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+        changes = compare_results(results, baseline) if baseline else {}
+        for name, result in results.items():
+            line = (
+                f"{name:<24} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput_rps'] or 0:>8.1f} req/s"
+            )
+            if result['errors']:
+                line += f"  ({result['errors']} errors)"
+            if name in changes:
+                line += f"  p50 {changes[name]['p50_ms']:+.1f}%  p95 {changes[name]['p95_ms']:+.1f}%"
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
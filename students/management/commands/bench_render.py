@@ -0,0 +1,92 @@
+# students/management/commands/bench_render.py
+# Compares the JSON backends and response compression:
+#   python manage.py bench_render --students 2000 --grades-per-student 50 \
+#       --iterations 20 --output bench_render.json
+# Seeds a synthetic school (100k grades by default) into a throwaway test database,
+# then measures (1) the time to encode the whole serialized grade table with the
+# standard library and with orjson, and to compress it with gzip and brotli, and
+# (2) latency, CPU time per request and bytes on the wire of large API responses for
+# every backend and Accept-Encoding, with the response cache disabled.
+
+import datetime
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from sms_backend.middleware import brotli
+from students.benchmarking import ENCODINGS, JSON_BACKENDS, run_render_scenarios, time_encoding
+from students.management.commands.bench import git_revision
+from students.models import Grade
+from students.renderers import orjson
+from students.seeding import seed_school
+from students.serializers import GradeSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks JSON encoding (stdlib vs orjson) and gzip/brotli response compression.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--subjects', type=int, default=10)
+        parser.add_argument('--grades-per-student', type=int, default=50)
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per path and variant (default 20).')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per path and variant (default 2).')
+        parser.add_argument('--output', default='bench_render.json', help='Where to write the JSON results.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs.')
+
+    def handle(self, *args, **options):
+        # Only compare what is installed here
+        backends = [backend for backend in JSON_BACKENDS if backend != 'orjson' or orjson is not None]
+        encodings = [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            seeded = seed_school(
+                students=options['students'], subjects=options['subjects'],
+                grades_per_student=options['grades_per_student'],
+            )
+            self.stdout.write(
+                f"Seeded {seeded['students']} students, {seeded['subjects']} subjects, "
+                f"{seeded['grades']} grades ({connection.vendor})"
+            )
+            data = GradeSerializer(Grade.objects.select_related('student', 'subject').order_by('pk'), many=True).data
+            encoding = time_encoding(data, backends, encodings)
+            del data
+            requests = run_render_scenarios(
+                backends=backends, encodings=encodings, iterations=options['iterations'], warmup=options['warmup'],
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        report = {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'database': connection.vendor,
+            'dataset': seeded,
+            'iterations': options['iterations'],
+            'encoding': encoding,
+            'requests': requests,
+        }
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+        self.stdout.write(f"Encoding all {seeded['grades']} serialized grades:")
+        for backend, result in encoding['json'].items():
+            self.stdout.write(f"  {backend:<8} {result['encode_ms']:>9.1f}ms  {result['bytes']:>11} bytes")
+        for name, result in encoding['compression'].items():
+            self.stdout.write(
+                f"  {name:<8} {result['compress_ms']:>9.1f}ms  {result['bytes']:>11} bytes  ({result['ratio']}x smaller)"
+            )
+        for variant, paths in requests.items():
+            self.stdout.write(f'{variant}:')
+            for name, result in paths.items():
+                line = (
+                    f"  {name:<20} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                    f"CPU {result['cpu_ms']:>9.2f}ms  {result['wire_bytes']:>11} bytes"
+                )
+                if result['errors']:
+                    line += f"  ({result['errors']} errors)"
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
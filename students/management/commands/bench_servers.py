@@ -0,0 +1,161 @@
+# students/management/commands/bench_servers.py
+# Compares the WSGI and ASGI server modes under concurrent load:
+#   python manage.py bench_servers --workers 2 --concurrency 32 --duration 15 \
+#       --output bench_servers.json
+# Seeds a synthetic school into a scratch database (a temporary SQLite file unless
+# --database-url is given), then starts gunicorn once per mode with the same number
+# of worker processes (see gunicorn.conf.py), drives it with concurrent keep-alive
+# clients, and records latency percentiles, throughput and the resident memory of
+# the whole server process tree, so the modes can be compared at equal memory.
+# Against local SQLite, pass --db-latency-ms to mimic a remote database server:
+# waiting on the database is what the async read path lets a process overlap.
+
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from students.benchmarking import process_tree_rss, run_load
+from students.management.commands.bench import git_revision
+
+MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the API under concurrent load with gunicorn sync workers (WSGI) and uvicorn workers (ASGI).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--subjects', type=int, default=10)
+        parser.add_argument('--grades-per-student', type=int, default=30)
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per mode (default 2).')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client connections (default 32).')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per mode (default 10).')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0,
+            help='Simulated round trip added to every query, as with a remote database server (default 0).',
+        )
+        parser.add_argument('--mode', action='append', choices=MODES, help='Benchmark only this mode (repeatable).')
+        parser.add_argument(
+            '--database-url',
+            help='Scratch database to seed and serve from (it is migrated and filled with synthetic data). '
+                 'Defaults to a temporary SQLite file.',
+        )
+        parser.add_argument('--output', default='bench_servers.json', help='Where to write the JSON results.')
+        parser.add_argument('--prepare-only', action='store_true', help='Internal: migrate and seed the configured database.')
+
+    def handle(self, *args, **options):
+        if options['prepare_only']:
+            return self.prepare(options)
+
+        workdir = tempfile.mkdtemp(prefix='sms-bench-')
+        database_url = options['database_url'] or f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}"
+        env = {**os.environ, 'DATABASE_URL': database_url, 'DJANGO_DEBUG': 'False'}
+        self.stdout.write('Seeding the benchmark database...')
+        subprocess.run(
+            [sys.executable, 'manage.py', 'bench_servers', '--prepare-only',
+             '--students', str(options['students']), '--subjects', str(options['subjects']),
+             '--grades-per-student', str(options['grades_per_student'])],
+            cwd=settings.BASE_DIR, env=env, check=True,
+        )
+        paths = self.build_paths(options)
+
+        results = {}
+        for mode in options['mode'] or MODES:
+            results[mode] = self.bench_mode(mode, env, paths, options)
+            result = results[mode]
+            self.stdout.write(
+                f"{mode}: p50 {result['p50_ms']:.1f}ms  p95 {result['p95_ms']:.1f}ms  p99 {result['p99_ms']:.1f}ms  "
+                f"{result['throughput_rps']:.1f} req/s  {result['errors']} errors  "
+                f"RSS {result['rss_mb_idle']} -> {result['rss_mb_loaded']} MB"
+            )
+
+        report = {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'database': database_url.split(':', 1)[0],
+            'dataset': {key: options[key] for key in ('students', 'subjects', 'grades_per_student')},
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'db_latency_ms': options['db_latency_ms'],
+            'paths': len(paths),
+            'results': results,
+        }
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def prepare(self, options):
+        from django.core.management import call_command
+        from students.seeding import seed_school
+
+        call_command('migrate', verbosity=0)
+        seed_school(
+            students=options['students'], subjects=options['subjects'],
+            grades_per_student=options['grades_per_student'],
+        )
+
+    def build_paths(self, options):
+        """
+        Read requests spread over many students and subjects, so most of them miss the
+        response cache and reach the database (ids come from the freshly seeded rows).
+        """
+        paths = []
+        for number in range(1, min(options['students'], 500) + 1):
+            paths.append(f'/api/grades/?student_id={number}')
+            paths.append(f'/api/students/{number}/')
+            if number % 5 == 0:
+                paths.append(f'/api/grades/?subject_id={number % options["subjects"] + 1}&page_size=50')
+                paths.append(f'/api/grades/summary/?student_id={number}')
+        return paths
+
+    def bench_mode(self, mode, env, paths, options):
+        base_url = f"http://127.0.0.1:{options['port']}"
+        server_env = {
+            **env,
+            'DJANGO_SERVER_MODE': mode,
+            'WEB_CONCURRENCY': str(options['workers']),
+            'GUNICORN_BIND': f"127.0.0.1:{options['port']}",
+        }
+        # The bench-only application factory replaces the config's wsgi_app, so the
+        # simulated latency never reaches a deployed server
+        app = f"sms_backend.bench_app:application({mode!r}, {options['db_latency_ms']!r})"
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', app],
+            cwd=settings.BASE_DIR, env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_until_ready(server, base_url)
+            # Warm every worker up (imports, connections) before measuring idle memory
+            run_load(base_url, paths, concurrency=options['concurrency'], duration=1.0)
+            rss_idle = process_tree_rss(server.pid)
+            result = run_load(base_url, paths, concurrency=options['concurrency'], duration=options['duration'])
+            result['rss_mb_idle'] = rss_idle
+            result['rss_mb_loaded'] = process_tree_rss(server.pid)
+            return result
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def wait_until_ready(self, server, base_url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('The server exited during startup; is gunicorn (and uvicorn-worker for ASGI) installed?')
+            try:
+                request = urllib.request.Request(f'{base_url}/api/subjects/', headers={'Host': 'localhost'})
+                with urllib.request.urlopen(request, timeout=2):
+                    return
+            except (OSError, urllib.error.URLError):
+                time.sleep(0.2)
+        raise CommandError(f'The server did not answer within {timeout}s.')
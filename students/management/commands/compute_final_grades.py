@@ -0,0 +1,68 @@
+# students/management/commands/compute_final_grades.py
+# Computes weighted final grades (see students/grading.py) for the whole school,
+# or for some subjects/students, and writes them as CSV:
+#   python manage.py compute_final_grades [--subject MATH101] [--student S001] \
+#       [--date-from 2025-06-01 --date-to 2025-10-31] [--output finals.csv]
+# One row per (student, subject): the average of each grade type and the final grade.
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from students.grading import final_grades, np, write_final_grades_csv
+from students.models import Student, Subject
+
+
+class Command(BaseCommand):
+    help = 'Computes weighted final grades per student and subject and writes them as CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', action='append', metavar='CODE', help='Only this subject code (repeatable).')
+        parser.add_argument('--student', action='append', metavar='STUDENT_ID', help='Only this student ID (repeatable).')
+        parser.add_argument('--date-from', help='Only grades recorded on or after this date (YYYY-MM-DD).')
+        parser.add_argument('--date-to', help='Only grades recorded on or before this date (YYYY-MM-DD).')
+        parser.add_argument('--output', default='-', help="CSV file to write, or '-' for standard output (default).")
+        parser.add_argument('--no-numpy', action='store_true', help='Use the pure-Python engine even when NumPy is installed.')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            value = options[name]
+            if value is not None:
+                try:
+                    dates[name] = parse_date(value)
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    raise CommandError(f"--{name.replace('_', '-')} must be a valid date (YYYY-MM-DD).")
+
+        subject_ids = self.lookup(Subject, 'code', options['subject'])
+        student_ids = self.lookup(Student, 'student_id', options['student'])
+
+        started = time.perf_counter()
+        results = final_grades(
+            student_ids=student_ids, subject_ids=subject_ids,
+            use_numpy=False if options['no_numpy'] else None, **dates,
+        )
+        elapsed = time.perf_counter() - started
+
+        handle = self.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+        try:
+            write_final_grades_csv(results, handle, student_ids)
+        finally:
+            if handle is not self.stdout:
+                handle.close()
+
+        engine = 'numpy' if np is not None and not options['no_numpy'] else 'python'
+        self.stderr.write(f'Computed {len(results)} final grade(s) in {elapsed:.2f}s ({engine}).')
+
+    def lookup(self, model, field, values):
+        """Maps the given natural keys to primary keys, or returns None when no filter was given."""
+        if not values:
+            return None
+        found = dict(model.objects.filter(**{f'{field}__in': values}).values_list(field, 'pk'))
+        missing = sorted(set(values) - set(found))
+        if missing:
+            raise CommandError(f"Unknown {model._meta.verbose_name} {field}(s): {', '.join(missing)}")
+        return list(found.values())
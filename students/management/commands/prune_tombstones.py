@@ -0,0 +1,27 @@
+# students/management/commands/prune_tombstones.py
+# Deletes the deletion records kept for the delta sync endpoint once they expire:
+#   python manage.py prune_tombstones [--days N]
+# Clients whose cursor is older than the retention period are told to reload
+# everything anyway, so expired tombstones are never read. Run it periodically.
+
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from students.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Deletes sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Keep this many days of tombstones (default SYNC_TOMBSTONE_RETENTION_DAYS).',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.SYNC_TOMBSTONE_RETENTION_DAYS
+        pruned = prune_tombstones(datetime.timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} tombstone(s).'))
@@ -0,0 +1,48 @@
+# students/management/commands/rebuild_grade_stats.py
+# Recomputes the materialized GradeStatistic table from the Grade rows:
+#   python manage.py rebuild_grade_stats [--check]
+
+from django.core.management.base import BaseCommand
+
+from students.models import Grade, GradeStatistic
+from students.statistics import cell_aggregates, rebuild_all
+
+STAT_FIELDS = ('count', 'total', 'sum_of_squares', 'min_score', 'max_score')
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-student/subject/grade_type statistics table from Grade rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report how many cells have drifted; do not write.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT batch (default 1000).')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = self.count_drift()
+            self.stdout.write(f'{drifted} statistics cell(s) out of date.')
+            return
+        cells = rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {cells} statistics cell(s).'))
+
+    def count_drift(self):
+        expected = {
+            (row['student_id'], row['subject_id'], row['grade_type']): tuple(row[field] for field in STAT_FIELDS)
+            for row in cell_aggregates(Grade.objects.all()).iterator()
+        }
+        actual = {
+            (row[0], row[1], row[2]): tuple(row[3:])
+            for row in GradeStatistic.objects.order_by().values_list('student_id', 'subject_id', 'grade_type', *STAT_FIELDS).iterator()
+        }
+        keys = expected.keys() | actual.keys()
+        return sum(1 for key in keys if not self.same(expected.get(key), actual.get(key)))
+
+    @staticmethod
+    def same(expected, actual):
+        if expected is None or actual is None:
+            return expected is actual
+        # Compare numerically: the aggregate and the stored column may differ in Decimal scale
+        return all(
+            (a is None and b is None) or (a is not None and b is not None and abs(float(a) - float(b)) < 1e-6)
+            for a, b in zip(expected, actual)
+        )
@@ -0,0 +1,46 @@
+# students/management/commands/run_worker.py
+# Runs the background jobs queued through /api/jobs/ (see students/jobs.py):
+#   python manage.py run_worker [--concurrency 2] [--poll-interval 1] [--burst]
+# Meant to run as its own process next to the web server (the `worker` entry of
+# the Procfile). SIGTERM and SIGINT stop it after the running jobs have finished;
+# jobs cut off by a hard kill are picked up again by the next worker.
+
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from students.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs (exports, final grades, statistics rebuilds).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help='Jobs run at the same time, one thread each (default JOB_WORKER_CONCURRENCY).',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=None,
+            help='Seconds between queue polls when idle (default JOB_POLL_SECONDS).',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty (e.g. for a cron job).')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] is not None and options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1.')
+        worker = Worker(concurrency=options['concurrency'], poll_interval=options['poll_interval'])
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs...')
+            worker.stop()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(
+            f'Worker {worker.name} running {worker.concurrency} job(s) at a time '
+            f'({settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1]} queue).'
+        )
+        worker.run(until_empty=options['burst'])
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
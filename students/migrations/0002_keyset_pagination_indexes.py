@@ -0,0 +1,21 @@
+# Generated by Django 5.2.2 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'subject', 'date_recorded', 'grade_type', 'id'], name='grade_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='student_name_order_idx'),
+        ),
+    ]
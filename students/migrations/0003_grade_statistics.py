@@ -0,0 +1,49 @@
+# Generated by Django 5.2.2 on 2026-10-17 03:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Sum
+
+
+def build_statistics(apps, schema_editor):
+    # Populate the new table from the grades that already exist
+    Grade = apps.get_model('students', 'Grade')
+    GradeStatistic = apps.get_model('students', 'GradeStatistic')
+    rows = (
+        Grade.objects.order_by()
+        .values('student_id', 'subject_id', 'grade_type')
+        .annotate(
+            count=Count('id'), total=Sum('score'), sum_of_squares=Sum(F('score') * F('score')),
+            min_score=Min('score'), max_score=Max('score'),
+        )
+    )
+    GradeStatistic.objects.bulk_create((GradeStatistic(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_type', models.CharField(choices=[('activity', 'Activity'), ('quiz', 'Quiz'), ('exam', 'Exam')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, help_text='Sum of scores', max_digits=14)),
+                ('sum_of_squares', models.DecimalField(decimal_places=4, default=0, help_text='Sum of squared scores, for variance', max_digits=20)),
+                ('min_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('max_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_statistics', to='students.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_statistics', to='students.subject')),
+            ],
+            options={
+                'ordering': ['student', 'subject', 'grade_type'],
+                'unique_together': {('student', 'subject', 'grade_type')},
+            },
+        ),
+        migrations.RunPython(build_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.2 on 2026-10-17 03:52
+
+import students.models
+from django.db import migrations
+from students.models import normalize_search_text
+
+# Trigram GIN indexes (PostgreSQL only) serving substring/prefix LIKE and similarity ranking
+TRIGRAM_INDEXES = [
+    ('student_id_key_trgm', 'students_student', 'student_id_key'),
+    ('student_first_name_key_trgm', 'students_student', 'first_name_key'),
+    ('student_last_name_key_trgm', 'students_student', 'last_name_key'),
+    ('subject_name_key_trgm', 'students_subject', 'name_key'),
+    ('subject_code_key_trgm', 'students_subject', 'code_key'),
+]
+
+
+def populate_search_keys(apps, schema_editor):
+    for model_name, sources in (('Student', ('student_id', 'first_name', 'last_name')), ('Subject', ('name', 'code'))):
+        model = apps.get_model('students', model_name)
+        batch = []
+        for instance in model.objects.order_by('pk').iterator(chunk_size=2000):
+            for source in sources:
+                setattr(instance, f'{source}_key', normalize_search_text(getattr(instance, source)))
+            batch.append(instance)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, [f'{source}_key' for source in sources])
+                batch = []
+        model.objects.bulk_update(batch, [f'{source}_key' for source in sources])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_grade_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='first_name_key',
+            field=students.models.SearchKeyField(db_index=True, default='', editable=False, max_length=100, source='first_name'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='last_name_key',
+            field=students.models.SearchKeyField(db_index=True, default='', editable=False, max_length=100, source='last_name'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='student_id_key',
+            field=students.models.SearchKeyField(db_index=True, default='', editable=False, max_length=20, source='student_id'),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='code_key',
+            field=students.models.SearchKeyField(db_index=True, default='', editable=False, max_length=10, source='code'),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='name_key',
+            field=students.models.SearchKeyField(db_index=True, default='', editable=False, max_length=100, source='name'),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.2 on 2026-10-17 03:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_search_keys'),
+    ]
+
+    operations = [
+        # Create the composite indexes before dropping the single-column FK indexes they replace
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['subject', 'student', 'date_recorded', 'grade_type', 'id'], name='grade_subject_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['date_recorded', 'id'], name='grade_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'subject', 'grade_type', 'score'], name='grade_cell_score_idx'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='student',
+            field=models.ForeignKey(db_index=False, help_text='The student who received this grade', on_delete=django.db.models.deletion.CASCADE, related_name='grades', to='students.student'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='subject',
+            field=models.ForeignKey(db_index=False, help_text='The subject for which the grade was given', on_delete=django.db.models.deletion.CASCADE, related_name='grades', to='students.subject'),
+        ),
+    ]
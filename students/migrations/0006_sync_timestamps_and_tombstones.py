@@ -0,0 +1,54 @@
+# Generated by Django 5.2.2 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_grade_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('student', 'Student'), ('subject', 'Subject'), ('grade', 'Grade')], help_text='model_name of the deleted row', max_length=10)),
+                ('object_id', models.BigIntegerField(help_text='Primary key of the deleted row')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # Existing rows get the migration time (the schema editor's default for auto_now)
+        migrations.AddField(
+            model_name='grade',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['updated_at', 'id'], name='grade_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['updated_at', 'id'], name='student_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['updated_at', 'id'], name='subject_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-17 04:27
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_sync_timestamps_and_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_weight', models.DecimalField(decimal_places=2, default=1, help_text='Relative weight of the activity average', max_digits=5, validators=[django.core.validators.MinValueValidator(0)])),
+                ('quiz_weight', models.DecimalField(decimal_places=2, default=1, help_text='Relative weight of the quiz average', max_digits=5, validators=[django.core.validators.MinValueValidator(0)])),
+                ('exam_weight', models.DecimalField(decimal_places=2, default=1, help_text='Relative weight of the exam average', max_digits=5, validators=[django.core.validators.MinValueValidator(0)])),
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='grading_policy', to='students.subject')),
+            ],
+        ),
+    ]
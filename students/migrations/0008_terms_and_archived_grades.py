@@ -0,0 +1,46 @@
+# Generated by Django 5.2.2 on 2026-10-17 04:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_grading_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the term (e.g., 2025-2026 First Semester)', max_length=50, unique=True)),
+                ('start_date', models.DateField(help_text='First day of the term')),
+                ('end_date', models.DateField(help_text='Last day of the term (inclusive)')),
+                ('archived_at', models.DateTimeField(blank=True, help_text="When the term's grades were moved to the archive", null=True)),
+            ],
+            options={
+                'ordering': ['start_date'],
+                'constraints': [models.CheckConstraint(condition=models.Q(('end_date__gte', models.F('start_date'))), name='term_dates_ordered')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedGrade',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('grade_type', models.CharField(choices=[('activity', 'Activity'), ('quiz', 'Quiz'), ('exam', 'Exam')], max_length=10)),
+                ('score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('date_recorded', models.DateField()),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('student', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_grades', to='students.student')),
+                ('subject', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_grades', to='students.subject')),
+                ('term', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='archived_grades', to='students.term')),
+            ],
+            options={
+                'ordering': ['student', 'subject', 'date_recorded', 'grade_type'],
+                'indexes': [models.Index(fields=['term', 'student', 'subject', 'date_recorded', 'grade_type', 'id'], name='archived_grade_term_idx'), models.Index(fields=['student', 'term'], name='archived_grade_student_idx'), models.Index(fields=['subject', 'term'], name='archived_grade_subject_idx')],
+            },
+        ),
+    ]
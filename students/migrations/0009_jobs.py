@@ -0,0 +1,38 @@
+# Generated by Django 5.2.2 on 2026-10-17 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_terms_and_archived_grades'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='Name of the job in students.jobs.JOB_KINDS', max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Validated parameters of the job')),
+                ('key', models.CharField(help_text='Hash of kind and params, to reuse an identical pending job', max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Times a worker has started the job')),
+                ('worker', models.CharField(blank=True, help_text='Worker running (or that ran) the job', max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last sign of life from the worker running the job', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.BinaryField(help_text='gzip-compressed output', null=True)),
+                ('result_type', models.CharField(blank=True, help_text='Content type of the output', max_length=100)),
+                ('result_name', models.CharField(blank=True, help_text='File name of the output', max_length=100)),
+                ('result_size', models.BigIntegerField(blank=True, help_text='Uncompressed size of the output in bytes', null=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['status', 'created_at', 'id'], name='job_queue_idx'), models.Index(fields=['key', 'status'], name='job_key_idx'), models.Index(fields=['finished_at'], name='job_finished_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.2 on 2026-10-17 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('name', models.CharField(help_text='label_lower of the model', max_length=100, primary_key=True, serialize=False)),
+                ('version', models.CharField(max_length=32)),
+                ('changed_at', models.DateTimeField(help_text='When the collection was last written')),
+            ],
+        ),
+    ]
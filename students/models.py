@@ -3,8 +3,45 @@
 # Models represent tables in the database and define the fields (columns)
 # for each record.
 
+import unicodedata
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 
+
+def normalize_search_text(value):
+    """Lowercases, strips accents and collapses whitespace so lookups are case- and accent-insensitive."""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.lower().split())
+
+
+class SearchKeyField(models.CharField):
+    """
+    An indexed, read-only copy of another field's value, normalized for search.
+    The value is derived in pre_save, which both Model.save() and bulk_create() call,
+    so prefix lookups can use a plain B-tree index instead of scanning with icontains.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_search_text(getattr(model_instance, self.source))[:self.max_length]
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class Student(models.Model):
     """
     Represents a student in the system.
@@ -17,6 +54,13 @@ class Student(models.Model):
     date_of_birth = models.DateField(null=True, blank=True)
     enrollment_date = models.DateField(auto_now_add=True) # Automatically sets the date when student is added
 
+    # Normalized copies used by the indexed search (see students/search.py)
+    student_id_key = SearchKeyField(max_length=20, source='student_id')
+    first_name_key = SearchKeyField(max_length=100, source='first_name')
+    last_name_key = SearchKeyField(max_length=100, source='last_name')
+
+    updated_at = models.DateTimeField(auto_now=True) # Last change, read by the delta sync endpoint (see students/sync.py)
+
     def __str__(self):
         """String representation of the Student object."""
         return f"{self.first_name} {self.last_name} ({self.student_id})"
@@ -24,6 +68,12 @@ class Student(models.Model):
     class Meta:
         # Orders students by last name and then first name by default
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Matches the keyset pagination order (Meta.ordering + id as tiebreaker)
+            models.Index(fields=['last_name', 'first_name', 'id'], name='student_name_order_idx'),
+            # Rows changed since a sync cursor
+            models.Index(fields=['updated_at', 'id'], name='student_updated_idx'),
+        ]
 
 class Subject(models.Model):
     """
@@ -33,12 +83,65 @@ class Subject(models.Model):
     code = models.CharField(max_length=10, unique=True, help_text="Short code for the subject (e.g., MATH101)")
     description = models.TextField(blank=True, null=True)
 
+    # Normalized copies used by the indexed search (see students/search.py)
+    name_key = SearchKeyField(max_length=100, source='name')
+    code_key = SearchKeyField(max_length=10, source='code')
+
+    updated_at = models.DateTimeField(auto_now=True) # Last change, read by the delta sync endpoint (see students/sync.py)
+
     def __str__(self):
         """String representation of the Subject object."""
         return f"{self.name} ({self.code})"
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Rows changed since a sync cursor
+            models.Index(fields=['updated_at', 'id'], name='subject_updated_idx'),
+        ]
+
+class Term(models.Model):
+    """
+    An academic period (e.g. a semester). A grade belongs to the term whose dates contain
+    its date_recorded. The grade list defaults to the current term, and
+    `manage.py archive_grades` moves the grades of closed terms to ArchivedGrade
+    (see students/terms.py).
+    """
+    name = models.CharField(max_length=50, unique=True, help_text="Name of the term (e.g., 2025-2026 First Semester)")
+    start_date = models.DateField(help_text="First day of the term")
+    end_date = models.DateField(help_text="Last day of the term (inclusive)")
+    archived_at = models.DateTimeField(null=True, blank=True, help_text="When the term's grades were moved to the archive")
+
+    def __str__(self):
+        """String representation of the Term object."""
+        return f"{self.name} ({self.start_date} to {self.end_date})"
+
+    def clean(self):
+        """
+        Terms may not overlap, so every date belongs to at most one of them, and an
+        archived term's dates are fixed (its grades have moved). Checked by the admin
+        and by TermSerializer.
+        """
+        if self.start_date is None or self.end_date is None:
+            return # Reported as missing fields
+        if self.start_date > self.end_date:
+            raise ValidationError({'end_date': 'The term cannot end before it starts.'})
+        if self.pk is not None and self.archived_at is not None:
+            stored = Term.objects.filter(pk=self.pk).values_list('start_date', 'end_date').first()
+            if stored is not None and stored != (self.start_date, self.end_date):
+                raise ValidationError('The dates of an archived term cannot be changed.')
+        overlapping = Term.objects.filter(start_date__lte=self.end_date, end_date__gte=self.start_date)
+        if self.pk is not None:
+            overlapping = overlapping.exclude(pk=self.pk)
+        other = overlapping.first()
+        if other is not None:
+            raise ValidationError(f'The term overlaps {other}.')
+
+    class Meta:
+        ordering = ['start_date']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end_date__gte=models.F('start_date')), name='term_dates_ordered'),
+        ]
 
 class Grade(models.Model):
     """
@@ -51,12 +154,14 @@ class Grade(models.Model):
         ('exam', 'Exam'),
     )
 
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='grades', help_text="The student who received this grade")
-    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='grades', help_text="The subject for which the grade was given")
+    # No single-column FK indexes: the composite indexes in Meta lead with these columns
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='grades', db_index=False, help_text="The student who received this grade")
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='grades', db_index=False, help_text="The subject for which the grade was given")
     grade_type = models.CharField(max_length=10, choices=GRADE_TYPES, help_text="Type of assessment (Activity, Quiz, Exam)")
     score = models.DecimalField(max_digits=5, decimal_places=2, help_text="Score obtained (e.g., 85.50)")
     date_recorded = models.DateField(auto_now_add=True, help_text="Date the grade was recorded")
     notes = models.TextField(blank=True, null=True, help_text="Additional notes about the grade")
+    updated_at = models.DateTimeField(auto_now=True) # Last change, read by the delta sync endpoint (see students/sync.py)
 
     def __str__(self):
         """String representation of the Grade object."""
@@ -73,3 +178,197 @@ class Grade(models.Model):
         # For simplicity, we'll keep it as is, but it's a point to consider for refinement.
         unique_together = ('student', 'subject', 'grade_type', 'date_recorded')
         ordering = ['student', 'subject', 'date_recorded', 'grade_type']
+        indexes = [
+            # Matches the keyset pagination order (raw FK columns, then id as tiebreaker);
+            # also serves `?student_id=` and `?student_id=&subject_id=` in that order
+            models.Index(fields=['student', 'subject', 'date_recorded', 'grade_type', 'id'], name='grade_order_idx'),
+            # `?subject_id=` alone: equality on subject, then the rest of the list order
+            models.Index(fields=['subject', 'student', 'date_recorded', 'grade_type', 'id'], name='grade_subject_order_idx'),
+            # Date ranges (`?date_from=`/`?date_to=`, reports per period)
+            models.Index(fields=['date_recorded', 'id'], name='grade_date_idx'),
+            # Covers the per-cell GROUP BY used to build GradeStatistic, without reading table rows
+            models.Index(fields=['student', 'subject', 'grade_type', 'score'], name='grade_cell_score_idx'),
+            # Rows changed since a sync cursor
+            models.Index(fields=['updated_at', 'id'], name='grade_updated_idx'),
+        ]
+
+class ArchivedGrade(models.Model):
+    """
+    A grade of a closed term, moved out of the Grade table by `manage.py archive_grades`
+    so queries on current grades only read the active working set. Same columns and id
+    as the original grade, plus its term. Read through `/api/grades/?term=<id>`.
+    """
+    id = models.BigIntegerField(primary_key=True) # The original Grade's id
+    term = models.ForeignKey(Term, on_delete=models.PROTECT, related_name='archived_grades', db_index=False)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='archived_grades', db_index=False)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='archived_grades', db_index=False)
+    grade_type = models.CharField(max_length=10, choices=Grade.GRADE_TYPES)
+    score = models.DecimalField(max_digits=5, decimal_places=2)
+    date_recorded = models.DateField()
+    notes = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        """String representation of the ArchivedGrade object."""
+        return f"{self.student_id}/{self.subject_id} ({self.grade_type}) {self.date_recorded}: {self.score}"
+
+    class Meta:
+        ordering = ['student', 'subject', 'date_recorded', 'grade_type']
+        indexes = [
+            # One term's grades in the keyset pagination order; also `?student_id=` within a term
+            models.Index(fields=['term', 'student', 'subject', 'date_recorded', 'grade_type', 'id'], name='archived_grade_term_idx'),
+            # A student's (or subject's) grades across terms, and the CASCADE on deletion
+            models.Index(fields=['student', 'term'], name='archived_grade_student_idx'),
+            models.Index(fields=['subject', 'term'], name='archived_grade_subject_idx'),
+        ]
+
+class GradingPolicy(models.Model):
+    """
+    How much each grade type counts towards a subject's final grade (see students/grading.py).
+    The final grade is the weighted mean of the student's average per grade type, over
+    the types they have grades for. Subjects without a policy use
+    settings.DEFAULT_GRADE_WEIGHTS.
+    """
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, related_name='grading_policy')
+    activity_weight = models.DecimalField(max_digits=5, decimal_places=2, default=1, validators=[MinValueValidator(0)], help_text="Relative weight of the activity average")
+    quiz_weight = models.DecimalField(max_digits=5, decimal_places=2, default=1, validators=[MinValueValidator(0)], help_text="Relative weight of the quiz average")
+    exam_weight = models.DecimalField(max_digits=5, decimal_places=2, default=1, validators=[MinValueValidator(0)], help_text="Relative weight of the exam average")
+
+    def __str__(self):
+        """String representation of the GradingPolicy object."""
+        return f"{self.subject.code}: " + ", ".join(f"{grade_type} {weight}" for grade_type, weight in self.weights().items())
+
+    def weights(self):
+        """Returns `{grade_type: weight}` for every entry of Grade.GRADE_TYPES."""
+        return {grade_type: getattr(self, f'{grade_type}_weight') for grade_type, _ in Grade.GRADE_TYPES}
+
+
+class GradeStatistic(models.Model):
+    """
+    Running statistics for one (student, subject, grade_type) cell of the grade table.
+    Kept up to date incrementally whenever a Grade is saved or deleted (see signals.py
+    and bulk.py), so averages and variances can be read without scanning Grade rows.
+    Run `manage.py rebuild_grade_stats` to repair any drift.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='grade_statistics')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='grade_statistics')
+    grade_type = models.CharField(max_length=10, choices=Grade.GRADE_TYPES)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of scores")
+    sum_of_squares = models.DecimalField(max_digits=20, decimal_places=4, default=0, help_text="Sum of squared scores, for variance")
+    min_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    max_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    def __str__(self):
+        """String representation of the GradeStatistic object."""
+        return f"{self.student_id}/{self.subject_id} ({self.grade_type}): n={self.count}"
+
+    @property
+    def average(self):
+        """Mean score, or None when the cell is empty."""
+        if not self.count:
+            return None
+        return float(self.total) / self.count
+
+    @property
+    def variance(self):
+        """Population variance of the scores, or None when the cell is empty."""
+        if not self.count:
+            return None
+        mean = float(self.total) / self.count
+        # Clamp tiny negative values caused by floating point rounding
+        return max(float(self.sum_of_squares) / self.count - mean * mean, 0.0)
+
+    class Meta:
+        unique_together = ('student', 'subject', 'grade_type')
+        ordering = ['student', 'subject', 'grade_type']
+
+
+class Tombstone(models.Model):
+    """
+    Records the deletion of a Student, Subject or Grade, so the delta sync endpoint can
+    tell clients which rows to drop. Written by signals.py, including for the grades
+    removed by a CASCADE; `manage.py prune_tombstones` removes expired ones.
+    """
+    MODELS = (
+        ('student', 'Student'),
+        ('subject', 'Subject'),
+        ('grade', 'Grade'),
+    )
+
+    model = models.CharField(max_length=10, choices=MODELS, help_text="model_name of the deleted row")
+    object_id = models.BigIntegerField(help_text="Primary key of the deleted row")
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """String representation of the Tombstone object."""
+        return f"{self.model} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        indexes = [
+            # Deletions since a sync cursor, and pruning by age
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+class Job(models.Model):
+    """
+    A unit of heavy work (an export, a school-wide recomputation) queued by the API and
+    run by `manage.py run_worker` outside the web process. The output is stored
+    gzip-compressed in the row, so the web and worker processes need no shared disk.
+    See students/jobs.py.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    kind = models.CharField(max_length=50, help_text="Name of the job in students.jobs.JOB_KINDS")
+    params = models.JSONField(default=dict, blank=True, help_text="Validated parameters of the job")
+    key = models.CharField(max_length=64, help_text="Hash of kind and params, to reuse an identical pending job")
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times a worker has started the job")
+    worker = models.CharField(max_length=100, blank=True, help_text="Worker running (or that ran) the job")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the worker running the job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = models.BinaryField(null=True, editable=False, help_text="gzip-compressed output")
+    result_type = models.CharField(max_length=100, blank=True, help_text="Content type of the output")
+    result_name = models.CharField(max_length=100, blank=True, help_text="File name of the output")
+    result_size = models.BigIntegerField(null=True, blank=True, help_text="Uncompressed size of the output in bytes")
+
+    def __str__(self):
+        """String representation of the Job object."""
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Claiming the oldest queued job, and finding running jobs whose worker went away
+            models.Index(fields=['status', 'created_at', 'id'], name='job_queue_idx'),
+            # The identical pending job, if any
+            models.Index(fields=['key', 'status'], name='job_key_idx'),
+            # Pruning expired results
+            models.Index(fields=['finished_at'], name='job_finished_idx'),
+        ]
+
+class CollectionVersion(models.Model):
+    """
+    The change token of a model collection (see students/caching.py), replaced after every
+    committed write. Kept in the database so every web worker, the job worker and the
+    management commands see each other's writes.
+    """
+    name = models.CharField(max_length=100, primary_key=True, help_text="label_lower of the model")
+    version = models.CharField(max_length=32)
+    changed_at = models.DateTimeField(help_text="When the collection was last written")
+
+    def __str__(self):
+        """String representation of the CollectionVersion object."""
+        return f"{self.name} {self.version}"
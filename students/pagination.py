@@ -0,0 +1,182 @@
+# students/pagination.py
+# This file defines the keyset (cursor) pagination used by the API viewsets.
+# Unlike OFFSET pagination, each page is fetched with a WHERE clause that seeks
+# past the last row of the previous page, so deep pages cost the same as the
+# first one when a matching composite index exists.
+
+import base64
+import json
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Q
+
+
+def flip(field):
+    """Reverses the direction of an ordering field ('name' <-> '-name')."""
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite ordering.
+
+    The ordering is the model's `Meta.ordering` plus the primary key as a unique
+    tiebreaker (overridable per model through `orderings`), preceded by `-search_rank`
+    for ranked search results. The cursor is an opaque, URL-safe encoding of the
+    ordering values of the last (or first) row on a page.
+    """
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Per-model keyset orderings. Foreign keys are ordered by their raw column
+    # (e.g. `student_id`) so the seek can be served from an index on this table,
+    # instead of following the related model's own Meta.ordering through a JOIN.
+    orderings = {
+        'students.grade': ('student_id', 'subject_id', 'date_recorded', 'grade_type', 'id'),
+        'students.archivedgrade': ('student_id', 'subject_id', 'date_recorded', 'grade_type', 'id'),
+    }
+
+    def get_ordering(self, queryset):
+        model = queryset.model
+        ordering = self.orderings.get(model._meta.label_lower)
+        if ordering is None:
+            ordering = tuple(model._meta.ordering) + ('id',)
+        if 'search_rank' in queryset.query.annotations:
+            # Ranked search results: best matches first, then the usual order
+            ordering = ('-search_rank',) + ordering
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset, for the ASGI read path."""
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request):
+        """Returns the (lazy) queryset of the requested page plus one extra row."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        self.position, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            queryset = queryset.order_by(*(flip(field) for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.seek(self.position, self.reverse))
+
+        # Fetch one extra row to find out whether another page follows
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.page = results
+        if self.reverse:
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        return self.page
+
+    def seek(self, position, reverse):
+        """
+        Builds the keyset condition "after this position" as nested Q objects, e.g. for
+        ascending fields: f1 >= v1 AND (f1 > v1 OR (f1 = v1 AND (f2 > v2 OR ...))).
+        Descending fields (and reversed pages) use < instead of >. The leading `>=`
+        lets the database turn the first column into an index range scan.
+        """
+        pairs = []
+        for field, value in zip(self.ordering, position):
+            descending = field.startswith('-') != reverse
+            pairs.append((field.lstrip('-'), value, 'lt' if descending else 'gt'))
+
+        field, value, lookup = pairs[-1]
+        condition = Q(**{f'{field}__{lookup}': value})
+        for field, value, lookup in reversed(pairs[:-1]):
+            condition = Q(**{f'{field}__{lookup}': value}) | (Q(**{field: value}) & condition)
+        first_field, first_value, first_lookup = pairs[0]
+        return Q(**{f'{first_field}__{first_lookup}e': first_value}) & condition
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            # Dates and other non-JSON values are stored as strings; Django converts them back on filter
+            position.append(value if isinstance(value, (int, str)) else str(value))
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse = payload['p'], bool(payload.get('r', False))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            if not all(isinstance(value, (int, str)) for value in position):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,50 @@
+# students/queryplans.py
+# This file inspects database query plans, so tests can fail when a main access
+# pattern stops being served by an index (a sequential/full table scan) or needs
+# an explicit sort step (a "filesort") instead of reading rows in index order.
+#
+# Supported backends are SQLite (EXPLAIN QUERY PLAN) and PostgreSQL (EXPLAIN).
+# On PostgreSQL, sequential scans and sorts are disabled for the EXPLAIN, so the
+# planner's answer does not depend on how small the test tables are: a Seq Scan
+# or Sort node is only chosen when no index can serve the query.
+
+import re
+
+from django.db import connections, transaction
+
+
+def explain(queryset):
+    """Returns the query plan of `queryset` as text."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with transaction.atomic(using=queryset.db):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+        return queryset.explain()
+
+
+def plan_problems(queryset, table=None):
+    """
+    Returns a list of human-readable problems in the plan of `queryset`: full scans of
+    `table` (default: the queryset's own table) and sort steps. An empty list means
+    every row of `table` is found and ordered through an index.
+    """
+    table = table or queryset.model._meta.db_table
+    vendor = connections[queryset.db].vendor
+    plan = explain(queryset)
+    problems = []
+    for line in plan.splitlines():
+        if vendor == 'postgresql':
+            if re.search(rf'Seq Scan on {table}\b', line):
+                problems.append(f'sequential scan: {line.strip()}')
+            if re.search(r'(^|->\s+)(Incremental )?Sort\b', line.strip()):
+                problems.append(f'sort: {line.strip()}')
+        else:
+            # "SCAN t" reads the whole table; "SCAN t USING [COVERING] INDEX i" walks an index in order
+            if re.search(rf'\bSCAN {table}\b', line) and 'USING' not in line:
+                problems.append(f'full table scan: {line.strip()}')
+            if 'USE TEMP B-TREE' in line:
+                problems.append(f'sort: {line.strip()}')
+    return problems
@@ -0,0 +1,87 @@
+# students/search.py
+# This file implements the indexed search used by the student and subject
+# endpoints, replacing DRF's SearchFilter (OR'ed `icontains` clauses that can
+# never use an index).
+#
+# Searches run against the normalized `*_key` columns (see SearchKeyField):
+#   * every database: exact and prefix matches, as index range scans;
+#   * PostgreSQL: also substring matches and trigram similarity, served by the
+#     pg_trgm GIN indexes created in migration 0004.
+# Results are annotated with an integer `search_rank` (higher is better).
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Greatest
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import normalize_search_text
+
+# Rank tiers per search term; each tier is worth more than any similarity bonus (0-999)
+EXACT, PREFIX, SUBSTRING = 3000, 2000, 1000
+
+# Upper bound for prefix range scans: sorts after any character a prefix can be followed by
+PREFIX_SENTINEL = '\U0010ffff'
+
+
+def prefix_q(key, term, vendor):
+    if vendor == 'postgresql':
+        # LIKE 'term%' on the normalized column, served by the trigram index
+        return Q(**{f'{key}__startswith': term})
+    # A half-open range works with a plain B-tree index on every backend
+    return Q(**{f'{key}__gte': term, f'{key}__lt': term + PREFIX_SENTINEL})
+
+
+def search(queryset, text, keys):
+    """
+    Filters `queryset` to rows where every term of `text` matches one of the `keys`
+    columns (exactly, by prefix, or on PostgreSQL anywhere in the value) and annotates
+    each row with `search_rank`.
+    """
+    terms = normalize_search_text(text).split()
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    rank = Value(0)
+    for term in terms:
+        exact = Q()
+        prefix = Q()
+        substring = Q()
+        for key in keys:
+            exact |= Q(**{key: term})
+            prefix |= prefix_q(key, term, vendor)
+            if vendor == 'postgresql':
+                substring |= Q(**{f'{key}__contains': term})
+
+        match = substring if vendor == 'postgresql' else prefix
+        queryset = queryset.filter(match)
+        tiers = [When(exact, then=Value(EXACT)), When(prefix, then=Value(PREFIX))]
+        rank = rank + Case(*tiers, default=Value(SUBSTRING), output_field=IntegerField())
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity  # Needs psycopg; PostgreSQL only
+
+        text = ' '.join(terms)
+        similarities = [TrigramSimilarity(key, text) for key in keys]
+        best = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+        rank = rank + Cast(best * 999, IntegerField())
+
+    ordering = queryset.model._meta.ordering
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', *ordering, 'pk')
+
+
+class IndexedSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for SearchFilter that searches the normalized key column of each
+    entry in the view's `search_fields` (e.g. `last_name` -> `last_name_key`).
+    Uses the same `?search=` parameter.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        fields = getattr(view, 'search_fields', None)
+        if not text.strip() or not fields:
+            return queryset
+        return search(queryset, text, [f'{field}_key' for field in fields])
@@ -0,0 +1,87 @@
+# students/seeding.py
+# This file generates a synthetic school (students, subjects and grades) for
+# benchmarks and query-plan tests. Rows are written with bulk_create in batches,
+# and the grade statistics table is rebuilt once at the end.
+
+import datetime
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+
+from . import statistics
+from .caching import bump_version
+from .models import Student, Subject, Grade
+
+GRADE_TYPES = [value for value, _ in Grade.GRADE_TYPES]
+
+
+@contextmanager
+def explicit_grade_dates():
+    """
+    Lets seeded grades carry their own `date_recorded` instead of today's date.
+    `auto_now_add` would otherwise stamp every row with the same day, and
+    unique_together only allows three grades per student and subject per day.
+    """
+    field = Grade._meta.get_field('date_recorded')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_school(students=200, subjects=10, grades_per_student=30, start_date=None, batch_size=2000, seed=42):
+    """
+    Creates `students` students, `subjects` subjects and `grades_per_student` grades for
+    each student, spread round-robin over subjects and grade types and going back one day
+    at a time from `start_date`. Returns a dict with the number of rows created.
+    """
+    rng = random.Random(seed)
+    start_date = start_date or datetime.date.today()
+    # Use a unique prefix so a seed can be added to a database that already has data
+    prefix = f'B{Student.objects.count()}-'
+
+    with transaction.atomic():
+        subject_objs = Subject.objects.bulk_create([
+            Subject(name=f'{prefix}Subject {number:03d}', code=f'{prefix}{number:03d}'[-10:])
+            for number in range(subjects)
+        ], batch_size=batch_size)
+        student_objs = Student.objects.bulk_create([
+            Student(
+                student_id=f'{prefix}{number:07d}'[-20:],
+                first_name=f'First{number}',
+                last_name=f'Last{rng.randrange(100000):05d}',
+                email=f'{prefix.lower()}{number}@example.com',
+                date_of_birth=datetime.date(2008 + number % 6, number % 12 + 1, number % 28 + 1),
+            )
+            for number in range(students)
+        ], batch_size=batch_size)
+
+        slots = subjects * len(GRADE_TYPES)
+        grades = []
+        created = 0
+        with explicit_grade_dates():
+            for student in student_objs:
+                for number in range(grades_per_student):
+                    subject = subject_objs[number % subjects]
+                    grades.append(Grade(
+                        student=student,
+                        subject=subject,
+                        grade_type=GRADE_TYPES[(number // subjects) % len(GRADE_TYPES)],
+                        score=Decimal(rng.randrange(5000, 10001)) / 100,
+                        # Each (subject, grade_type) slot gets a new day once all slots are used
+                        date_recorded=start_date - datetime.timedelta(days=number // slots),
+                    ))
+                    if len(grades) >= batch_size:
+                        Grade.objects.bulk_create(grades, batch_size=batch_size)
+                        created += len(grades)
+                        grades = []
+            Grade.objects.bulk_create(grades, batch_size=batch_size)
+            created += len(grades)
+
+        statistics.rebuild_all(batch_size=batch_size)
+        bump_version(Student, Subject, Grade)
+
+    return {'students': len(student_objs), 'subjects': len(subject_objs), 'grades': created}
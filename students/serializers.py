@@ -4,8 +4,11 @@
 # content types. They also provide deserialization to allow incoming data to be
 # validated and saved into model instances.
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Student, Subject, Grade
+from rest_framework.reverse import reverse
+from .jobs import JOB_KINDS, clean_params
+from .models import Student, Subject, Grade, GradingPolicy, Job, Term
 
 class StudentSerializer(serializers.ModelSerializer):
     """
@@ -17,7 +20,8 @@ class StudentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Student
-        fields = '__all__' # Include all fields from the Student model
+        # All fields except the internal, normalized search columns
+        exclude = ['student_id_key', 'first_name_key', 'last_name_key']
         # You can specify fields explicitly like:
         # fields = ['id', 'student_id', 'first_name', 'last_name', 'email', 'date_of_birth', 'enrollment_date', 'full_name']
         read_only_fields = ['enrollment_date'] # enrollment_date is set automatically
@@ -35,7 +39,47 @@ class SubjectSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Subject
-        fields = '__all__' # Include all fields from the Subject model
+        exclude = ['name_key', 'code_key'] # All fields except the normalized search columns
+
+class GradingPolicySerializer(serializers.ModelSerializer):
+    """
+    Serializer for a subject's GradingPolicy (the relative weight of each grade type).
+    """
+    class Meta:
+        model = GradingPolicy
+        fields = ['activity_weight', 'quiz_weight', 'exam_weight']
+
+    def validate(self, attrs):
+        """Rejects policies where every weight is zero, which would leave no final grade."""
+        current = self.instance.weights() if self.instance is not None else {}
+        weights = [attrs.get(field, current.get(field.replace('_weight', ''), 1)) for field in self.Meta.fields]
+        if not any(weights):
+            raise serializers.ValidationError('At least one weight must be greater than zero.')
+        return attrs
+
+class TermSerializer(serializers.ModelSerializer):
+    """
+    Serializer for an academic Term. The model's clean() rejects overlapping terms and
+    date changes to archived ones.
+    """
+    class Meta:
+        model = Term
+        fields = ['id', 'name', 'start_date', 'end_date', 'archived_at']
+        read_only_fields = ['archived_at'] # Set by `manage.py archive_grades`
+
+    def validate(self, attrs):
+        current = self.instance
+        term = Term(
+            pk=current.pk if current else None,
+            archived_at=current.archived_at if current else None,
+            start_date=attrs.get('start_date', current.start_date if current else None),
+            end_date=attrs.get('end_date', current.end_date if current else None),
+        )
+        try:
+            term.clean()
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(serializers.as_serializer_error(exc))
+        return attrs
 
 class GradeSerializer(serializers.ModelSerializer):
     """
@@ -64,3 +108,80 @@ class GradeSerializer(serializers.ModelSerializer):
         # Explicitly list fields for clarity and control, especially with write_only fields
         # fields = ['id', 'student', 'subject', 'grade_type', 'score', 'date_recorded', 'notes', 'student_id', 'subject_id']
         read_only_fields = ['date_recorded'] # date_recorded is set automatically
+
+class CompactGradeSerializer(serializers.ModelSerializer):
+    """
+    Read-only, flat representation of a Grade used by the compact list mode.
+    Related objects are referenced by primary key only; the viewset side-loads
+    each referenced student and subject once per response instead of per row.
+    """
+    student_id = serializers.IntegerField(read_only=True)
+    subject_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Grade
+        fields = ['id', 'student_id', 'subject_id', 'grade_type', 'score', 'date_recorded', 'notes']
+        read_only_fields = fields
+
+class BulkGradeRowSerializer(serializers.Serializer):
+    """
+    Validates a single row of a bulk grade upload.
+    Related ids are plain integers here; their existence is checked for the whole
+    batch at once (one `IN` query per model) instead of once per row.
+    """
+    student_id = serializers.IntegerField(min_value=1)
+    subject_id = serializers.IntegerField(min_value=1)
+    grade_type = serializers.ChoiceField(choices=Grade.GRADE_TYPES)
+    score = serializers.DecimalField(max_digits=5, decimal_places=2)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+class StudentImportRowSerializer(serializers.Serializer):
+    """
+    Validates a single row of a roster CSV import.
+    Uniqueness of `student_id` and `email` is checked per chunk with set-based
+    queries by the importer, so this serializer runs no queries of its own.
+    """
+    student_id = serializers.CharField(max_length=20)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    email = serializers.EmailField()
+    date_of_birth = serializers.DateField(required=False, allow_null=True)
+
+    def to_internal_value(self, data):
+        # Empty CSV cells mean "no date of birth"
+        if data.get('date_of_birth') == '':
+            data = {**data, 'date_of_birth': None}
+        return super().to_internal_value(data)
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Read-only status of a background Job; `result_url` links to its output once it has succeeded.
+    """
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'attempts', 'error', 'created_at', 'started_at', 'finished_at',
+            'result_type', 'result_name', 'result_size', 'result_url',
+        ]
+        read_only_fields = fields
+
+    def get_result_url(self, job):
+        if job.status != Job.SUCCEEDED:
+            return None
+        return reverse('job-result', args=[job.pk], request=self.context.get('request'))
+
+class JobRequestSerializer(serializers.Serializer):
+    """
+    Validates a request to queue a job: its kind and a dict of parameters, which are
+    checked against the kind by students.jobs.clean_params.
+    """
+    kind = serializers.ChoiceField(choices=sorted(JOB_KINDS))
+    params = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        attrs['params'], errors = clean_params(attrs['kind'], attrs['params'])
+        if errors:
+            raise serializers.ValidationError({'params': errors})
+        return attrs
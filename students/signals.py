@@ -0,0 +1,93 @@
+# students/signals.py
+# Signal handlers that keep the GradeStatistic table in step with Grade, bump
+# the collection change versions used for ETags and the response cache, and
+# record Tombstones for the delta sync endpoint.
+# Connected in StudentsConfig.ready(). Bulk write paths (bulk_create/update) do not
+# send these signals and call students.statistics / students.caching directly instead.
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import statistics
+from .caching import bump_version
+from .models import Grade, GradingPolicy, Student, Subject, Term, Tombstone
+
+
+def cell_key(grade):
+    return (grade.student_id, grade.subject_id, grade.grade_type)
+
+
+@receiver(pre_save, sender=Grade)
+def remember_previous_cell(sender, instance, raw=False, **kwargs):
+    """Records which statistics cell an existing grade belonged to before it is edited."""
+    instance._previous_cell = None
+    if raw or instance.pk is None:
+        return
+    previous = Grade.objects.filter(pk=instance.pk).values_list('student_id', 'subject_id', 'grade_type').first()
+    instance._previous_cell = previous
+
+
+@receiver(post_save, sender=Grade)
+def update_statistics_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return  # Fixture loading; run rebuild_grade_stats afterwards
+    bump_version(Grade)
+    if created:
+        statistics.add_grade(instance)
+    else:
+        statistics.refresh_cells({cell_key(instance), getattr(instance, '_previous_cell', None)} - {None})
+
+
+@receiver(post_delete, sender=Grade)
+def update_statistics_on_delete(sender, instance, origin=None, **kwargs):
+    # When a student or subject is deleted, their statistics rows are removed by the same CASCADE
+    # and the Grade version is bumped once by bump_on_delete below
+    if deleted_by_cascade(origin):
+        return
+    bump_version(Grade)
+    statistics.refresh_cells([cell_key(instance)])
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=GradingPolicy)
+@receiver(post_save, sender=Term)
+def bump_on_save(sender, instance, raw=False, **kwargs):
+    bump_version(sender)
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Subject)
+def bump_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting a student or subject also cascades to their grades
+    bump_version(sender, Grade)
+
+
+@receiver(post_delete, sender=GradingPolicy)
+@receiver(post_delete, sender=Term)
+def bump_on_plain_delete(sender, instance, **kwargs):
+    bump_version(sender)
+
+
+def deleted_by_cascade(origin):
+    """True when a grade is being deleted because its student or subject is."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Student, Subject)
+
+
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Subject)
+def record_cascade_tombstones(sender, instance, **kwargs):
+    # Runs inside the deletion's transaction; one INSERT batch for all the grades the CASCADE removes
+    grade_ids = instance.grades.order_by().values_list('pk', flat=True)
+    Tombstone.objects.bulk_create([Tombstone(model='grade', object_id=pk) for pk in grade_ids], batch_size=1000)
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Grade)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    if sender is Grade and deleted_by_cascade(origin):
+        return  # Already recorded by record_cascade_tombstones
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
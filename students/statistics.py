@@ -0,0 +1,103 @@
+# students/statistics.py
+# This file maintains the materialized GradeStatistic table.
+# New grades are folded in with a single UPDATE of the running totals; edits and
+# deletions recompute only the affected (student, subject, grade_type) cells,
+# since a minimum or maximum cannot be "un-applied" incrementally.
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import Greatest, Least
+
+from .caching import bump_version
+from .models import Grade, GradeStatistic
+
+
+def add_grade(grade):
+    """Folds a newly created grade into its statistics cell."""
+    score = Decimal(str(grade.score))
+    key = {'student_id': grade.student_id, 'subject_id': grade.subject_id, 'grade_type': grade.grade_type}
+    with transaction.atomic():
+        updated = GradeStatistic.objects.filter(**key).update(
+            count=F('count') + 1,
+            total=F('total') + score,
+            sum_of_squares=F('sum_of_squares') + score * score,
+            min_score=Least('min_score', score),
+            max_score=Greatest('max_score', score),
+        )
+        if not updated:
+            # First grade in this cell. get_or_create covers a concurrent insert of the same cell.
+            stat, created = GradeStatistic.objects.get_or_create(**key, defaults={
+                'count': 1, 'total': score, 'sum_of_squares': score * score,
+                'min_score': score, 'max_score': score,
+            })
+            if not created:
+                refresh_cells([tuple(key.values())])
+
+
+def cell_aggregates(queryset):
+    """Groups a Grade queryset by statistics cell, returning one dict of aggregates per cell."""
+    return (
+        queryset
+        .order_by()
+        .values('student_id', 'subject_id', 'grade_type')
+        .annotate(
+            count=Count('id'),
+            total=Sum('score'),
+            sum_of_squares=Sum(F('score') * F('score')),
+            min_score=Min('score'),
+            max_score=Max('score'),
+        )
+    )
+
+
+def refresh_cells(keys):
+    """
+    Recomputes the given (student_id, subject_id, grade_type) cells from Grade rows.
+
+    The Grade scan is bounded by `IN` lists on the three key columns, so it may also
+    recompute a few neighbouring cells (which is harmless: they are recomputed from
+    the same source of truth). One grouped aggregate and one upsert are used however
+    many cells are refreshed; cells that no longer have any grades are deleted.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    student_ids, subject_ids, grade_types = (set(column) for column in zip(*keys))
+
+    box = {'student_id__in': student_ids, 'subject_id__in': subject_ids, 'grade_type__in': grade_types}
+    with transaction.atomic():
+        rows = list(cell_aggregates(Grade.objects.filter(**box)))
+        GradeStatistic.objects.bulk_create(
+            [GradeStatistic(**row) for row in rows],
+            update_conflicts=True,
+            unique_fields=['student', 'subject', 'grade_type'],
+            update_fields=['count', 'total', 'sum_of_squares', 'min_score', 'max_score'],
+        )
+        present = {(row['student_id'], row['subject_id'], row['grade_type']) for row in rows}
+        empty = keys - present
+        if not empty:
+            return
+        # Find the emptied cells within the same bounds and delete them by primary key: one
+        # OR'ed condition per cell would cost more to build than to run when thousands of
+        # cells empty at once (e.g. when a term is archived)
+        stale = [
+            pk for pk, *key in GradeStatistic.objects.filter(**box).values_list('pk', 'student_id', 'subject_id', 'grade_type')
+            if tuple(key) in empty
+        ]
+        for start in range(0, len(stale), 1000):
+            GradeStatistic.objects.filter(pk__in=stale[start:start + 1000]).delete()
+
+
+def rebuild_all(batch_size=1000):
+    """Replaces the whole GradeStatistic table with values recomputed from Grade. Returns the cell count."""
+    with transaction.atomic():
+        # Cached summaries may have been rendered from drifted statistics
+        bump_version(Grade)
+        GradeStatistic.objects.all().delete()
+        created = GradeStatistic.objects.bulk_create(
+            (GradeStatistic(**row) for row in cell_aggregates(Grade.objects.all()).iterator(chunk_size=batch_size)),
+            batch_size=batch_size,
+        )
+    return len(created)
@@ -0,0 +1,188 @@
+# students/streaming.py
+# This file contains helpers for returning large result sets without building
+# the whole response in memory. Rows are read from the database in chunks with
+# `.iterator()` (`.aiterator()` on the ASGI read path) and written to a
+# StreamingHttpResponse as they are serialized (JSON rows with the same encoder
+# as the API renderer, see students/renderers.py).
+
+import csv
+import json
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .renderers import dumps
+
+# Number of rows fetched from the database cursor (and serialized) at a time.
+DEFAULT_CHUNK_SIZE = 2000
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off'}
+
+# (CSV column, queryset lookup) pairs written by grade exports (the export action and the
+# grade_export background job), in order
+GRADE_EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('student_id', 'student_id'),
+    ('student_number', 'student__student_id'),
+    ('first_name', 'student__first_name'),
+    ('last_name', 'student__last_name'),
+    ('subject_id', 'subject_id'),
+    ('subject_code', 'subject__code'),
+    ('subject_name', 'subject__name'),
+    ('grade_type', 'grade_type'),
+    ('score', 'score'),
+    ('date_recorded', 'date_recorded'),
+    ('notes', 'notes'),
+]
+
+
+def iter_chunks(iterable, chunk_size):
+    """Yields lists of up to `chunk_size` items from `iterable`."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_json_array(queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields a JSON array of serialized rows, one chunk at a time.
+    Memory use is bounded by `chunk_size` rows regardless of the size of the queryset.
+    """
+    first = True
+    yield b'['
+    for chunk in iter_chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        for row in serializer_class(chunk, many=True, context=context).data:
+            yield (b'' if first else b',') + dumps(row)
+            first = False
+    yield b']'
+
+
+async def astream_json_array(queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Async counterpart of stream_json_array, reading rows with `.aiterator()` so the
+    event loop is free to serve other requests while the database is queried.
+    """
+    first = True
+    chunk = []
+    yield b'['
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            for data in serializer_class(chunk, many=True, context=context).data:
+                yield (b'' if first else b',') + dumps(data)
+                first = False
+            chunk = []
+    for data in serializer_class(chunk, many=True, context=context).data:
+        yield (b'' if first else b',') + dumps(data)
+        first = False
+    yield b']'
+
+
+class Echo:
+    """A file-like object whose write() returns the value, so csv.writer output can be yielded."""
+
+    def write(self, value):
+        return value
+
+
+def grade_export_rows(queryset):
+    """The GRADE_EXPORT_FIELDS rows of a grade queryset, in grade_order_idx order."""
+    return (
+        queryset
+        .order_by('student_id', 'subject_id', 'date_recorded', 'grade_type', 'id')
+        .values_list(*(lookup for _, lookup in GRADE_EXPORT_FIELDS))
+    )
+
+
+def stream_csv(header, rows):
+    """Yields CSV text: the header line followed by one line per row tuple."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(header, rows):
+    """
+    Yields newline-delimited JSON (bytes, encoded by the configured JSON backend), one
+    object per row tuple. Decimals and dates are written as strings, matching the
+    serializers' output.
+    """
+    for row in rows:
+        yield dumps({name: str(value) if isinstance(value, Decimal) else value for name, value in zip(header, row)}) + b'\n'
+
+
+class CSVStreamRenderer(BaseRenderer):
+    """
+    Declares `text/csv` (`?format=csv`) for content negotiation on export actions.
+    The actions build the streamed body themselves, so render() is only a fallback for error payloads.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=JSONEncoder).encode(self.charset)
+
+
+class NDJSONStreamRenderer(CSVStreamRenderer):
+    """Declares `application/x-ndjson` (`?format=ndjson`) for export actions."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def export_response(request, queryset, header, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams a `values_list()` queryset as CSV or NDJSON, depending on the negotiated renderer.
+    Rows come from `.iterator()`, which uses a server-side cursor on PostgreSQL, so memory
+    stays flat and the first bytes are sent before the whole result has been read.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None and renderer.format == 'ndjson':
+        response = StreamingHttpResponse(stream_ndjson(header, rows), content_type='application/x-ndjson')
+        extension = 'ndjson'
+    else:
+        response = StreamingHttpResponse(stream_csv(header, rows), content_type='text/csv; charset=utf-8')
+        extension = 'csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+class StreamingListMixin:
+    """
+    Viewset mixin that adds an unpaginated escape hatch to the list action.
+    Requesting `?paginate=false` streams every matching row as a plain JSON array
+    instead of returning a single page.
+    """
+    paginate_query_param = 'paginate'
+
+    def wants_stream(self):
+        value = self.request.query_params.get(self.paginate_query_param, '')
+        return value.lower() in FALSE_VALUES
+
+    def list(self, request, *args, **kwargs):
+        if not self.wants_stream():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_json_array(queryset, self.get_serializer_class(), self.get_serializer_context()),
+            content_type='application/json',
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.wants_stream():
+            return await super().alist(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            astream_json_array(queryset, self.get_serializer_class(), self.get_serializer_context()),
+            content_type='application/json',
+        )
@@ -0,0 +1,159 @@
+# students/suggest.py
+# This file implements the typeahead behind `/api/students/suggest/` and
+# `/api/subjects/suggest/`.
+#
+# Each model gets an in-process prefix index: every word of the normalized
+# search keys is stored in one sorted list, so the entries starting with a
+# prefix form a contiguous run found with two bisections. The index is built
+# lazily on first use and rebuilt when the model's collection version (see
+# students/caching.py) changes. The versions are kept in the database, so any
+# committed write invalidates every process's index, including writes made by
+# other gunicorn workers or by `manage.py import_students`.
+
+import bisect
+import re
+import threading
+
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .caching import collection_version
+from .models import Student, Subject, normalize_search_text
+from .search import PREFIX_SENTINEL
+
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+# Punctuation separates words, so 'Math (MATH101)' is indexed as 'math' and 'math101'
+WORD_RE = re.compile(r'\w+')
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over `(id, label, sort_key, keys)` records, where
+    `sort_key` and `keys` are already normalized (the models' `*_key` columns).
+    Lookups are O(log n + k) for k matching words; a record matches when every
+    query term is a prefix of one of its words.
+    """
+
+    def __init__(self, records):
+        self.labels = {}
+        self.words = {}
+        entries = []
+        order = []
+        for pk, label, sort_key, keys in records:
+            words = frozenset(WORD_RE.findall(' '.join(keys)))
+            self.labels[pk] = label
+            self.words[pk] = words
+            entries.extend((word, sort_key, pk) for word in words)
+            order.append((sort_key, pk))
+        entries.sort()
+        order.sort()
+        # Parallel lists: `keys` is what bisect searches, `ids` what it points to
+        self.keys = [word for word, _, _ in entries]
+        self.ids = [pk for _, _, pk in entries]
+        # Records in label order, used for an empty query
+        self.by_label = [pk for _, pk in order]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def lookup(self, text, limit=DEFAULT_SUGGESTIONS):
+        """Returns up to `limit` `{'id', 'label'}` dicts matching `text`, exact words first."""
+        terms = WORD_RE.findall(normalize_search_text(text))
+        if not terms:
+            return [self.suggestion(pk) for pk in self.by_label[:limit]]
+
+        # Walk the run of the longest term (usually the most selective one). Entries in a
+        # run are sorted by word, so exact words come before longer ones starting with it
+        terms.sort(key=len, reverse=True)
+        first, rest = terms[0], terms[1:]
+        start = bisect.bisect_left(self.keys, first)
+        end = bisect.bisect_left(self.keys, first + PREFIX_SENTINEL, start)
+
+        matches = []
+        seen = set()
+        for position in range(start, end):
+            pk = self.ids[position]
+            if pk in seen:
+                continue
+            seen.add(pk)
+            words = self.words[pk]
+            if all(any(word.startswith(term) for word in words) for term in rest):
+                matches.append(pk)
+                if len(matches) >= limit:
+                    break
+        return [self.suggestion(pk) for pk in matches]
+
+    def suggestion(self, pk):
+        return {'id': pk, 'label': self.labels[pk]}
+
+
+class SuggestIndex:
+    """
+    Lazily built, version-checked PrefixIndex for one model. `load` returns the
+    `(id, label, keys)` records to index. Thread-safe; one instance per process.
+    """
+
+    def __init__(self, model, load):
+        self.model = model
+        self.load = load
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+
+    def get(self):
+        version = collection_version(self.model)
+        if self._index is None or self._version != version:
+            with self._lock:
+                # Another thread may have rebuilt it while we waited
+                if self._index is None or self._version != version:
+                    self._index = PrefixIndex(self.load())
+                    self._version = version
+        return self._index
+
+    def lookup(self, text, limit=DEFAULT_SUGGESTIONS):
+        return self.get().lookup(text, limit)
+
+
+def load_students():
+    rows = Student.objects.order_by().values_list(
+        'pk', 'first_name', 'last_name', 'student_id_key', 'first_name_key', 'last_name_key',
+    )
+    return [
+        (pk, f"{first_name} {last_name}", f"{first_key} {last_key}", (student_id_key, first_key, last_key))
+        for pk, first_name, last_name, student_id_key, first_key, last_key in rows.iterator(chunk_size=5000)
+    ]
+
+
+def load_subjects():
+    rows = Subject.objects.order_by().values_list('pk', 'name', 'code', 'name_key', 'code_key')
+    return [
+        (pk, f"{name} ({code})", f"{name_key} {code_key}", (code_key, name_key))
+        for pk, name, code, name_key, code_key in rows.iterator(chunk_size=5000)
+    ]
+
+
+class SuggestMixin:
+    """
+    Viewset mixin adding a `suggest` list action: `?q=` returns the best `?limit=`
+    (default 10, max 50) matches as `[{"id": ..., "label": ...}]`, served from
+    the viewset's `suggest_index`; the only query is the version check.
+    """
+    suggest_index = None
+
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def suggest(self, request):
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_SUGGESTIONS))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_SUGGESTIONS:
+            raise ValidationError({'limit': f'An integer between 1 and {MAX_SUGGESTIONS} is required.'})
+        return Response(self.suggest_index.lookup(request.query_params.get('q', ''), limit))
+
+
+# Process-wide indexes used by the viewsets
+student_suggestions = SuggestIndex(Student, load_students)
+subject_suggestions = SuggestIndex(Subject, load_subjects)
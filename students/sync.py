@@ -0,0 +1,101 @@
+# students/sync.py
+# This file implements the delta sync behind `/api/sync/?since=<cursor>`.
+#
+# Clients keep local copies of the students, subjects and grades. Instead of
+# downloading every row again after a change, they pass the cursor from their
+# previous sync and get back only the rows changed since then (by `updated_at`)
+# and the ids deleted since then (from Tombstone rows), plus a new cursor.
+#
+# The cursor is a timestamp. A row's `updated_at` is set when it is written but
+# only becomes visible when its transaction commits, so the returned cursor
+# trails the server clock by SYNC_OVERLAP_SECONDS: transactions shorter than
+# that are never missed, at the cost of sending the last few seconds of
+# changes twice. Applying a sync is idempotent, so repeats are harmless.
+
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Grade, Student, Subject, Term, Tombstone
+from .serializers import GradeSerializer, StudentSerializer, SubjectSerializer
+
+# (response key, model, serializer, related objects the serializer embeds)
+SYNC_MODELS = (
+    ('students', Student, StudentSerializer, ()),
+    ('subjects', Subject, SubjectSerializer, ()),
+    ('grades', Grade, GradeSerializer, ('student', 'subject')),
+)
+
+
+def parse_cursor(text):
+    """Returns the aware datetime encoded in a sync cursor, or None when it is not one."""
+    try:
+        moment = parse_datetime(text)
+    except ValueError:
+        return None
+    if moment is None or timezone.is_naive(moment):
+        return None
+    return moment
+
+
+def current_cursor():
+    """The cursor a client should pass next time, for data read from now on."""
+    overlap = datetime.timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 5))
+    return (timezone.now() - overlap).isoformat()
+
+
+def changes_since(since):
+    """
+    Returns `{'cursor', 'reset', 'changed', 'deleted'}` for everything written or deleted
+    at or after `since`. `reset` is True (with no rows) when the client is too far behind
+    to be patched: its cursor predates the tombstone retention period, or more than
+    SYNC_MAX_CHANGES rows of one kind changed (or rows were deleted), or a term has been
+    archived since. It should then reload everything.
+    """
+    # Taken before reading, so nothing committed while the queries run is skipped
+    cursor = current_cursor()
+    limit = getattr(settings, 'SYNC_MAX_CHANGES', 5000)
+    retention = datetime.timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    reset = {'cursor': cursor, 'reset': True, 'changed': {}, 'deleted': {}}
+    if since < timezone.now() - retention:
+        return reset
+    # Archiving removes a whole term of grades without tombstones (see students/terms.py)
+    if Term.objects.filter(archived_at__gte=since).exists():
+        return reset
+
+    changed = {}
+    for key, model, serializer, related in SYNC_MODELS:
+        # Served by the (updated_at, id) index
+        rows = list(model.objects.select_related(*related).filter(updated_at__gte=since).order_by('updated_at', 'id')[:limit + 1])
+        if len(rows) > limit:
+            return reset
+        changed[key] = serializer(rows, many=True).data
+
+    deleted = {key: set() for key, _, _, _ in SYNC_MODELS}
+    keys = {model._meta.model_name: key for key, model, _, _ in SYNC_MODELS}
+    tombstones = list(
+        Tombstone.objects.filter(deleted_at__gte=since).order_by('deleted_at', 'id').values_list('model', 'object_id')[:limit + 1]
+    )
+    if len(tombstones) > limit:
+        return reset
+    for model_name, object_id in tombstones:
+        deleted[keys[model_name]].add(object_id)
+
+    return {
+        'cursor': cursor,
+        'reset': False,
+        'changed': changed,
+        # A row deleted and then re-created under the same id shows up in both lists;
+        # clients apply `deleted` first, then `changed`
+        'deleted': {key: sorted(ids) for key, ids in deleted.items()},
+    }
+
+
+def prune_tombstones(older_than=None):
+    """Deletes tombstones past the retention period; returns how many were removed."""
+    if older_than is None:
+        older_than = datetime.timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,163 @@
+# students/terms.py
+# This file implements academic terms: which term a date belongs to, and the
+# archival of closed terms behind `manage.py archive_grades`.
+#
+# The grade list reads the current term by default (`?term=<id>` selects another
+# one, `?term=all` every live grade), so its queries stay within the active
+# working set. Once a term has ended, archive_term() moves its grades from the
+# Grade table to ArchivedGrade in batches, keeping the live table (and its
+# indexes and the GradeStatistic cells built from it) to the terms still in use.
+# Archived grades remain readable through `/api/grades/?term=<id>`.
+
+import threading
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import statistics
+from .caching import bump_version, collection_version
+from .models import ArchivedGrade, Grade, Term
+
+DEFAULT_ARCHIVE_BATCH_SIZE = 5000
+
+
+class TermCalendar:
+    """
+    Per-process copy of the Term table (a handful of rows), reloaded when the Term
+    collection version changes, so resolving the current term costs no more than the
+    version lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._terms = []
+
+    def terms(self, version=None):
+        """All terms, by start date. Pass the Term `version` when it has already been read."""
+        version = version or collection_version(Term)
+        with self._lock:
+            if version != self._version:
+                self._terms = list(Term.objects.order_by('start_date'))
+                self._version = version
+            return self._terms
+
+    def current(self, today=None, version=None):
+        """The term containing `today` (default: the local date), or None between terms."""
+        today = today or timezone.localdate()
+        for term in self.terms(version):
+            if term.start_date <= today <= term.end_date:
+                return term
+        return None
+
+    def get(self, pk, version=None):
+        for term in self.terms(version):
+            if term.pk == pk:
+                return term
+        return None
+
+
+# Process-wide calendar used by GradeViewSet
+term_calendar = TermCalendar()
+
+
+class ArchiveError(ValueError):
+    """Raised when a term cannot be archived (it has not ended yet)."""
+
+
+def closed_terms(today=None):
+    """Terms that have ended and still have to be archived, oldest first."""
+    today = today or timezone.localdate()
+    return Term.objects.filter(end_date__lt=today, archived_at__isnull=True).order_by('start_date')
+
+
+def term_grades(term):
+    """The live grades recorded during `term`, served by grade_date_idx."""
+    return Grade.objects.filter(date_recorded__gte=term.start_date, date_recorded__lte=term.end_date)
+
+
+def grades_in(term):
+    """
+    The grades of `term`: the archived rows once it has been archived, otherwise the live
+    grades within its dates. Every live grade when `term` is None.
+    """
+    if term is None:
+        return Grade.objects.all()
+    if term.archived_at is not None:
+        # Same columns and ordering as Grade, so serializers and pagination apply unchanged
+        return ArchivedGrade.objects.filter(term=term)
+    return term_grades(term)
+
+
+def grades_between(date_from=None, date_to=None):
+    """
+    Querysets covering every grade recorded in a date range (either end optional): the
+    live grades, plus the archived grades of the archived terms overlapping the range.
+    """
+    live = Grade.objects.all()
+    archived_terms = Term.objects.filter(archived_at__isnull=False)
+    if date_from is not None:
+        live = live.filter(date_recorded__gte=date_from)
+        archived_terms = archived_terms.filter(end_date__gte=date_from)
+    if date_to is not None:
+        live = live.filter(date_recorded__lte=date_to)
+        archived_terms = archived_terms.filter(start_date__lte=date_to)
+    term_ids = list(archived_terms.values_list('pk', flat=True))
+    if not term_ids:
+        return [live]
+    # Led by the term, so archived_grade_term_idx serves it
+    archived = ArchivedGrade.objects.filter(term__in=term_ids)
+    if date_from is not None:
+        archived = archived.filter(date_recorded__gte=date_from)
+    if date_to is not None:
+        archived = archived.filter(date_recorded__lte=date_to)
+    return [live, archived]
+
+
+def _delete_grades(pks):
+    """
+    Deletes grades with plain DELETE statements. QuerySet.delete() would send the
+    post_delete signals, which refresh the statistics and record a tombstone per grade:
+    archive_term() refreshes the cells once per batch instead, and sync clients are told
+    to reload by the term's archived_at (see students/sync.py).
+    """
+    connection = connections[router.db_for_write(Grade)]
+    table = connection.ops.quote_name(Grade._meta.db_table)
+    column = connection.ops.quote_name(Grade._meta.pk.column)
+    chunk = connection.features.max_query_params or len(pks)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), chunk):
+            batch = pks[start:start + chunk]
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(batch))})', batch)
+
+
+def archive_term(term, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE, progress=None):
+    """
+    Moves the grades of a closed term to ArchivedGrade, `batch_size` rows per transaction,
+    then marks the term archived. Each batch copies the rows, deletes them from Grade and
+    recomputes the statistics cells they belonged to, so an interrupted run loses nothing
+    and can simply be started again. `progress(moved)` is called after every batch.
+    Returns the number of grades moved.
+    """
+    if term.end_date >= timezone.localdate():
+        raise ArchiveError(f'{term.name} has not ended yet (last day {term.end_date}).')
+
+    fields = ['id', 'student_id', 'subject_id', 'grade_type', 'score', 'date_recorded', 'notes', 'updated_at']
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # grade_date_idx order: each batch is the head of an index range, not a sort of the term
+            rows = list(term_grades(term).order_by('date_recorded', 'id').values_list(*fields)[:batch_size])
+            if not rows:
+                break
+            ArchivedGrade.objects.bulk_create([ArchivedGrade(term=term, **dict(zip(fields, row))) for row in rows])
+            _delete_grades([row[0] for row in rows])
+            statistics.refresh_cells({(row[1], row[2], row[3]) for row in rows})
+            bump_version(Grade)
+        moved += len(rows)
+        if progress is not None:
+            progress(moved)
+
+    term.archived_at = timezone.now()
+    term.save(update_fields=['archived_at'])
+    return moved
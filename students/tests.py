@@ -1,3 +1,1169 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Count, Sum
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve
+from django.utils import timezone
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework.test import APIClient
+
+from sms_backend import middleware
+from sms_backend.metrics import endpoint_metrics
+from sms_backend.routers import ReplicaRouter, RequestRouting, active_routing
+from . import admin as students_admin
+from .analytics import rank_rows, ranking_rows
+from .async_reads import async_read_urls
+from .benchmarking import run_scenarios
+from .caching import store_new_versions
+from . import grading
+from . import jobs
+from .models import Student, Subject, Grade, ArchivedGrade, GradeStatistic, GradingPolicy, Job, Term, Tombstone
+from .pagination import KeysetPagination
+from .queryplans import plan_problems
+from . import renderers
+from .search import search
+from .seeding import seed_school
+from .statistics import cell_aggregates
+from .terms import term_calendar
+from .urls import router
 
 # Create your tests here.
+
+
+class GradeFixtureMixin:
+    """Creates a small school: two students, two subjects and a handful of grades."""
+
+    def setUp(self):
+        # Collection versions are only bumped on commit, which never happens inside TestCase,
+        # so start every test from an empty response cache
+        cache.clear()
+        self.client = APIClient()
+        self.alice = Student.objects.create(student_id='S001', first_name='Alice', last_name='Able', email='alice@example.com')
+        self.bob = Student.objects.create(student_id='S002', first_name='Bob', last_name='Brown', email='bob@example.com')
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.science = Subject.objects.create(name='Science', code='SCI101')
+
+        Grade.objects.create(student=self.alice, subject=self.math, grade_type='quiz', score=Decimal('90'))
+        Grade.objects.create(student=self.alice, subject=self.math, grade_type='exam', score=Decimal('80'))
+        Grade.objects.create(student=self.alice, subject=self.science, grade_type='quiz', score=Decimal('85'))
+        Grade.objects.create(student=self.bob, subject=self.math, grade_type='quiz', score=Decimal('60'))
+        Grade.objects.create(student=self.bob, subject=self.science, grade_type='exam', score=Decimal('70'))
+
+
+class GradeSummaryTests(GradeFixtureMixin, TestCase):
+    def test_summary_averages_and_pass_fail(self):
+        # The collection versions (for the ETag) and one aggregate over the statistics table
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/grades/summary/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(data['overall']['count'], 5)
+        self.assertEqual(data['overall']['average'], 77.0)
+        self.assertEqual(data['overall']['passed_students'], 1)
+        self.assertEqual(data['overall']['failed_students'], 1)
+
+        students = {row['student']: row for row in data['students']}
+        self.assertEqual(students[self.alice.id]['average'], 85.0)
+        self.assertTrue(students[self.alice.id]['passed'])
+        self.assertEqual(students[self.bob.id]['average'], 65.0)
+        self.assertFalse(students[self.bob.id]['passed'])
+
+        subjects = {row['code']: row for row in data['subjects']}
+        self.assertEqual(subjects['MATH101']['count'], 3)
+        self.assertAlmostEqual(subjects['MATH101']['average'], 76.67)
+
+    def test_summary_threshold_and_filters(self):
+        data = self.client.get('/api/grades/summary/', {'passing_threshold': '60', 'subject_id': self.math.id}).json()
+        self.assertEqual(data['passing_threshold'], 60.0)
+        self.assertEqual(data['overall']['count'], 3)
+        self.assertEqual(data['overall']['passed_students'], 2)
+
+        response = self.client.get('/api/grades/summary/', {'passing_threshold': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CompactGradeListTests(GradeFixtureMixin, TestCase):
+    def test_compact_list_side_loads_related_objects(self):
+        term_calendar.terms() # Loaded once per process, not per request
+        # versions + grades + side-loaded students + side-loaded subjects
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/grades/', {'compact': 'true'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['results']
+
+        self.assertEqual(len(data['grades']), 5)
+        self.assertEqual(set(data['grades'][0]), {'id', 'student_id', 'subject_id', 'grade_type', 'score', 'date_recorded', 'notes'})
+        self.assertEqual(set(data['students']), {str(self.alice.id), str(self.bob.id)})
+        self.assertEqual(data['students'][str(self.alice.id)]['full_name'], 'Alice Able')
+        self.assertEqual(set(data['subjects']), {str(self.math.id), str(self.science.id)})
+
+    def test_compact_list_is_conditional_and_cached(self):
+        first = self.client.get('/api/grades/', {'compact': 'true'})
+        self.assertTrue(first.has_header('ETag'))
+        self.assertNotEqual(first['ETag'], self.client.get('/api/grades/')['ETag'])
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/grades/', {'compact': 'true'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/grades/', {'compact': 'true'}).content, first.content)
+
+    def test_compact_list_streams_without_pagination(self):
+        response = self.client.get('/api/grades/', {'compact': 'true', 'paginate': 'false'})
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data['grades']), 5)
+        self.assertEqual(set(data['students']), {str(self.alice.id), str(self.bob.id)})
+        self.assertEqual(data['subjects'][str(self.math.id)]['code'], 'MATH101')
+
+    def test_compact_payload_is_smaller_than_nested(self):
+        nested = self.client.get('/api/grades/')
+        compact = self.client.get('/api/grades/', {'compact': '1'})
+        self.assertEqual(len(compact.json()['results']['grades']), len(nested.json()['results']))
+        self.assertLess(len(compact.content), len(nested.content))
+
+
+class StudentReportTests(GradeFixtureMixin, TestCase):
+    def get_report(self, student):
+        cache.clear()
+        # versions + student + prefetched grades (with subjects) + one grouped aggregate
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/students/{student.pk}/report/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_report_groups_grades_and_averages(self):
+        data = self.get_report(self.alice)
+        self.assertEqual(data['student']['student_id'], 'S001')
+        self.assertEqual(data['overall'], {'average': 85.0, 'count': 3, 'total': 255.0})
+
+        math, science = data['subjects']
+        self.assertEqual(math['subject']['code'], 'MATH101')
+        self.assertEqual((math['average'], math['count'], math['total']), (85.0, 2, 170.0))
+        self.assertEqual([group['grade_type'] for group in math['grade_types']], ['quiz', 'exam'])
+        self.assertEqual(math['grade_types'][0]['grades'][0]['score'], '90.00')
+        self.assertEqual(science['average'], 85.0)
+
+    def test_query_count_does_not_grow_with_grades(self):
+        # One grade per (subject, grade_type) a day, so grow the report with more subjects
+        subjects = Subject.objects.bulk_create([Subject(name=f'Elective {number:02}', code=f'EL{number:02}') for number in range(30)])
+        Grade.objects.bulk_create([
+            Grade(student=self.alice, subject=subject, grade_type=grade_type, score=Decimal(70 + number))
+            for number, subject in enumerate(subjects)
+            for grade_type in ('activity', 'quiz', 'exam')
+        ])
+        data = self.get_report(self.alice)
+        self.assertEqual(data['overall']['count'], 93)
+        self.assertEqual(len(data['subjects']), 32)
+        self.assertEqual(data['subjects'][0]['subject']['code'], 'EL00')
+
+    def test_report_without_grades_and_missing_student(self):
+        carol = Student.objects.create(student_id='S003', first_name='Carol', last_name='Cole', email='carol@example.com')
+        data = self.get_report(carol)
+        self.assertEqual(data['overall'], {'average': None, 'count': 0, 'total': 0.0})
+        self.assertEqual(data['subjects'], [])
+        self.assertEqual(self.client.get('/api/students/999999/report/').status_code, 404)
+
+
+class AnalyticsTests(GradeFixtureMixin, TestCase):
+    def test_ranks_percentiles_and_histograms(self):
+        data = self.client.get('/api/grades/analytics/', {'student_id': self.bob.id}).json()
+        self.assertEqual(
+            [(row['student']['full_name'], row['average'], row['rank'], row['percentile']) for row in data['overall']['top']],
+            [('Alice Able', 85.0, 1, 100.0), ('Bob Brown', 65.0, 2, 0.0)],
+        )
+        math = data['subjects'][0]
+        self.assertEqual((math['subject']['code'], math['students']), ('MATH101', 2))
+        quiz = math['histograms']['quiz']
+        self.assertEqual(len(quiz), 10)
+        self.assertEqual({bucket['from']: bucket['count'] for bucket in quiz if bucket['count']}, {60: 1, 90: 1})
+        self.assertEqual(data['student']['overall'], {'average': 65.0, 'rank': 2, 'percentile': 0.0})
+        self.assertEqual([row['rank'] for row in data['student']['subjects']], [2, 2])
+
+        response = self.client.get('/api/grades/analytics/', {'top': 1, 'subject_id': self.science.id, 'date_from': '2000-01-01'})
+        self.assertEqual([row['subject']['code'] for row in response.json()['subjects']], ['SCI101'])
+        self.assertEqual(len(response.json()['overall']['top']), 1)
+        for params in ({'top': 0}, {'top': 101}, {'student_id': 'x'}, {'date_to': '2026-13-01'}):
+            self.assertEqual(self.client.get('/api/grades/analytics/', params).status_code, 400)
+
+    def test_in_process_ranking_matches_window_functions(self):
+        carol = Student.objects.create(student_id='S003', first_name='Carol', last_name='Cole', email='carol@example.com')
+        Grade.objects.create(student=carol, subject=self.math, grade_type='quiz', score=Decimal('60'))
+        for partition in (None, 'subject_id'):
+            with self.subTest(partition=partition):
+                ranked = ranking_rows(Grade.objects.all(), Sum('score'), Count('id'), partition, in_database=True)
+                self.assertEqual(ranking_rows(Grade.objects.all(), Sum('score'), Count('id'), partition, in_database=False), ranked)
+                rows = [row[:3] for row in ranked]
+                self.assertEqual(rank_rows(rows, use_numpy=True), ranked)
+                self.assertEqual(rank_rows(rows, use_numpy=False), ranked)
+        math = [row[1:] for row in ranked if row[0] == self.math.id]
+        # Bob and Carol tie: both rank 2, and half of the others are not above them
+        self.assertEqual(math, [(self.alice.id, 85.0, 1, 1.0), (self.bob.id, 60.0, 2, 0.5), (carol.id, 60.0, 2, 0.5)])
+
+    def test_term_rankings_are_reused_until_grades_change(self):
+        self.client.get('/api/grades/analytics/')
+        # Only the versions and the student and subject details; the rankings come from the per-process cache
+        with self.assertNumQueries(3):
+            self.client.get('/api/grades/analytics/', {'student_id': self.alice.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/grades/', {
+                'student_id': self.bob.id, 'subject_id': self.math.id, 'grade_type': 'exam', 'score': '100',
+            }, format='json')
+        data = self.client.get('/api/grades/analytics/', {'student_id': self.bob.id}).json()
+        self.assertEqual(data['student']['subjects'][0]['average'], 80.0)
+
+
+class WeightedGradingTests(GradeFixtureMixin, TestCase):
+    def finals(self, **params):
+        return {(row['student'], row['subject']): row for row in self.client.get('/api/grades/final/', params).json()}
+
+    def test_policy_weights_and_renormalization(self):
+        response = self.client.get(f'/api/subjects/{self.math.id}/grading-policy/')
+        self.assertEqual(response.json(), {'activity_weight': '1.00', 'quiz_weight': '1.00', 'exam_weight': '1.00', 'is_default': True})
+        self.assertEqual(self.finals()[(self.alice.id, self.math.id)]['final_grade'], 85.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f'/api/subjects/{self.math.id}/grading-policy/', {'quiz_weight': '1', 'exam_weight': '3'}, format='json')
+        self.assertEqual(response.json()['exam_weight'], '3.00')
+        finals = self.finals()
+        alice_math = finals[(self.alice.id, self.math.id)]
+        self.assertEqual(alice_math['final_grade'], 82.5)
+        self.assertEqual(alice_math['averages'], {'activity': None, 'quiz': 90.0, 'exam': 80.0})
+        # Bob only has a quiz in math: the weights are renormalized over the types he has
+        self.assertEqual(finals[(self.bob.id, self.math.id)]['final_grade'], 60.0)
+        self.assertEqual(finals[(self.alice.id, self.science.id)]['final_grade'], 85.0)
+        self.assertEqual(list(self.finals(student_id=self.bob.id, subject_id=self.science.id)), [(self.bob.id, self.science.id)])
+
+        response = self.client.put(
+            f'/api/subjects/{self.math.id}/grading-policy/',
+            {'activity_weight': '0', 'quiz_weight': '0', 'exam_weight': '0'}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/subjects/{self.math.id}/grading-policy/')
+        self.assertEqual(self.finals()[(self.alice.id, self.math.id)]['final_grade'], 85.0)
+
+    @skipUnless(grading.np is not None, 'NumPy is not installed')
+    def test_numpy_and_python_engines_agree(self):
+        rows = [
+            (student, subject, grade_type, 50 + (student * 7 + subject * 3 + offset) % 50 / 1.5)
+            for student in range(1, 40) for subject in range(1, 6)
+            for grade_type, offset in (('activity', 0), ('quiz', 11), ('exam', 23))
+            if (student + subject) % 4 or grade_type != 'exam'
+        ]
+        weights = {1: (0.0, 0.0, 2.0), 2: (1.0, 2.0, 0.0), 3: (0.2, 0.3, 0.5)}
+        with_numpy = grading.compute_final_grades(rows, weights, (1.0, 1.0, 1.0), use_numpy=True)
+        in_python = grading.compute_final_grades(rows, weights, (1.0, 1.0, 1.0), use_numpy=False)
+        self.assertEqual([row[:2] for row in with_numpy], [row[:2] for row in in_python])
+        self.assertEqual([row[3] for row in with_numpy], [row[3] for row in in_python])
+        for fast, slow in zip(with_numpy, in_python):
+            if slow[2] is None:
+                self.assertIsNone(fast[2])  # Subject 1 weighs only exams, which some students lack
+            else:
+                self.assertAlmostEqual(fast[2], slow[2])
+
+    def test_compute_final_grades_command(self):
+        GradingPolicy.objects.create(subject=self.math, quiz_weight=1, exam_weight=3)
+        out = io.StringIO()
+        call_command('compute_final_grades', '--subject', 'MATH101', stdout=out, stderr=io.StringIO())
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(
+            [(row['student_id'], row['quiz'], row['exam'], row['final_grade']) for row in rows],
+            [('S001', '90.00', '80.00', '82.50'), ('S002', '60.00', '', '60.00')],
+        )
+
+
+class KeysetPaginationTests(GradeFixtureMixin, TestCase):
+    def collect_pages(self, url, params):
+        """Follows `next` links and returns the concatenated results and the number of pages."""
+        results, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            results.extend(data['results'])
+            pages += 1
+            if not data['next']:
+                return results, pages
+            response = self.client.get(data['next'])
+
+    def test_pages_cover_every_grade_once_in_order(self):
+        results, pages = self.collect_pages('/api/grades/', {'page_size': 2})
+        self.assertEqual(pages, 3)
+        self.assertEqual([row['id'] for row in results], list(
+            Grade.objects.order_by('student_id', 'subject_id', 'date_recorded', 'grade_type', 'id').values_list('id', flat=True)
+        ))
+
+    def test_students_follow_meta_ordering_with_tiebreaker(self):
+        Student.objects.create(student_id='S003', first_name='Alice', last_name='Able', email='alice2@example.com')
+        results, pages = self.collect_pages('/api/students/', {'page_size': 1})
+        self.assertEqual(pages, 3)
+        self.assertEqual([row['student_id'] for row in results], ['S001', 'S003', 'S002'])
+
+    def test_previous_link_returns_to_earlier_page(self):
+        first = self.client.get('/api/grades/', {'page_size': 2}).json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/grades/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_unpaginated_escape_hatch_streams_a_plain_array(self):
+        response = self.client.get('/api/subjects/', {'paginate': 'false'})
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['code'] for row in data], ['MATH101', 'SCI101'])
+
+
+class ExportTests(GradeFixtureMixin, TestCase):
+    def test_grade_export_streams_csv(self):
+        response = self.client.get('/api/grades/export/', {'student_id': self.alice.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('grades.csv', response['Content-Disposition'])
+
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'student_id', 'student_number'])
+        self.assertEqual(len(rows), 4)  # header + Alice's three grades
+        self.assertEqual({row[2] for row in rows[1:]}, {'S001'})
+
+    def test_grade_ndjson_uses_the_configured_json_backend(self):
+        for backend in ('stdlib', 'orjson'):
+            with self.subTest(backend=backend), override_settings(JSON_BACKEND=backend):
+                response = self.client.get('/api/grades/export/', {'format': 'ndjson', 'student_id': self.alice.id})
+                rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+                self.assertEqual(sorted(row['score'] for row in rows), ['80.00', '85.00', '90.00'])
+                self.assertEqual(rows[0]['date_recorded'], str(timezone.localdate()))
+                output = io.BytesIO()
+                self.assertEqual(jobs.export_grades({'term': 'all', 'format': 'ndjson'}, output)[0], 'application/x-ndjson')
+                self.assertEqual(len(output.getvalue().splitlines()), 5)
+
+    def test_student_export_streams_ndjson(self):
+        response = self.client.get('/api/students/export/', {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['student_id'] for line in lines], ['S001', 'S002'])
+
+
+class TermArchiveTests(GradeFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spring = Term.objects.create(
+                name='Spring', start_date=today - datetime.timedelta(days=200), end_date=today - datetime.timedelta(days=100),
+            )
+            self.fall = Term.objects.create(
+                name='Fall', start_date=today - datetime.timedelta(days=99), end_date=today + datetime.timedelta(days=100),
+            )
+        # Bob's two grades and Alice's exam belong to the closed term
+        self.old_grades = Grade.objects.filter(student=self.bob) | Grade.objects.filter(student=self.alice, grade_type='exam')
+        self.old_grades.update(date_recorded=today - datetime.timedelta(days=150))
+
+    def grade_ids(self, **params):
+        response = self.client.get('/api/grades/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(grade['id'] for grade in response.json()['results'])
+
+    def test_list_defaults_to_the_current_term(self):
+        old_ids = sorted(self.old_grades.values_list('pk', flat=True))
+        current_ids = sorted(Grade.objects.exclude(pk__in=old_ids).values_list('pk', flat=True))
+        self.assertEqual(self.grade_ids(), current_ids)
+        self.assertEqual(self.grade_ids(term=self.spring.pk), old_ids)
+        self.assertEqual(len(self.grade_ids(term='all')), 5)
+        # An explicit date range replaces the default term
+        self.assertEqual(len(self.grade_ids(date_from='2000-01-01')), 5)
+        for value in ('spring', '²', '-1'):
+            self.assertEqual(self.client.get('/api/grades/', {'term': value}).status_code, 400)
+        self.assertEqual(self.client.get('/api/terms/current/').json()['name'], 'Fall')
+
+    def test_archive_command_moves_closed_terms(self):
+        old_ids = sorted(self.old_grades.values_list('pk', flat=True))
+        cursor = self.client.get('/api/sync/').json()['cursor']
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_grades', '--batch-size', '2', stdout=out)
+        self.assertIn('Spring: archived 3 grade(s)', out.getvalue())
+        self.spring.refresh_from_db()
+        self.assertIsNotNone(self.spring.archived_at)
+
+        self.assertEqual(Grade.objects.count(), 2)
+        self.assertEqual(sorted(ArchivedGrade.objects.values_list('pk', flat=True)), old_ids)
+        # The statistics cells of the moved grades were recomputed from what is left
+        expected = {(row['student_id'], row['subject_id'], row['grade_type']) for row in cell_aggregates(Grade.objects.all())}
+        self.assertEqual(set(GradeStatistic.objects.values_list('student_id', 'subject_id', 'grade_type')), expected)
+        self.assertEqual(len(expected), 2)
+
+        # Archived grades read back through the list, nested and compact
+        self.assertEqual(self.grade_ids(term=self.spring.pk), old_ids)
+        compact = self.client.get('/api/grades/', {'term': self.spring.pk, 'compact': 'true'}).json()['results']
+        self.assertEqual(set(compact['students']), {str(self.alice.pk), str(self.bob.pk)})
+        self.assertTrue(self.client.get('/api/sync/', {'since': cursor}).json()['reset'])
+
+        self.assertEqual(self.client.delete(f'/api/terms/{self.spring.pk}/').status_code, 400)
+        out = io.StringIO()
+        call_command('archive_grades', stdout=out)
+        self.assertIn('No closed terms', out.getvalue())
+
+    def test_date_range_analytics_include_archived_grades(self):
+        params = {'date_from': str(self.spring.start_date), 'student_id': self.bob.id}
+        before = self.client.get('/api/grades/analytics/', params).json()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_grades', stdout=io.StringIO())
+        # A range spanning both terms merges the archived and the live grades
+        after = self.client.get('/api/grades/analytics/', params).json()
+        self.assertEqual(after['overall'], before['overall'])
+        self.assertEqual(after['subjects'], before['subjects'])
+        self.assertEqual(after['student']['overall'], {'average': 65.0, 'rank': 2, 'percentile': 0.0})
+        spring = self.client.get('/api/grades/analytics/', {
+            'date_from': str(self.spring.start_date), 'date_to': str(self.spring.end_date),
+        }).json()
+        self.assertEqual([row['average'] for row in spring['overall']['top']], [80.0, 65.0])
+
+    def test_date_range_final_grades_include_archived_grades(self):
+        params = {'date_from': str(self.spring.start_date)}
+        before = self.client.get('/api/grades/final/', params).json()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_grades', stdout=io.StringIO())
+        self.assertEqual(self.client.get('/api/grades/final/', params).json(), before)
+        bob_math = grading.cell_rows(student_ids=[self.bob.id], subject_ids=[self.math.id], date_to=str(self.spring.end_date))
+        self.assertEqual(bob_math, [(self.bob.id, self.math.id, 'quiz', 60.0)])
+
+    def test_analytics_and_final_grades_follow_the_term_parameter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_grades', stdout=io.StringIO())
+        spring = self.client.get('/api/grades/analytics/', {'term': self.spring.pk}).json()
+        self.assertEqual([row['average'] for row in spring['overall']['top']], [80.0, 65.0])
+        fall = self.client.get('/api/grades/analytics/', {'term': self.fall.pk}).json()
+        self.assertEqual([row['average'] for row in fall['overall']['top']], [87.5])
+
+        finals = self.client.get('/api/grades/final/', {'term': self.spring.pk}).json()
+        self.assertEqual(
+            sorted((row['student'], row['subject'], row['final_grade']) for row in finals),
+            sorted([(self.alice.id, self.math.id, 80.0), (self.bob.id, self.math.id, 60.0), (self.bob.id, self.science.id, 70.0)]),
+        )
+        self.assertEqual(self.client.get('/api/grades/final/', {'term': 'spring'}).status_code, 400)
+
+    def test_calendar_follows_term_changes_from_other_processes(self):
+        self.assertEqual(self.client.get('/api/terms/current/').json()['name'], 'Fall')
+        # Another process renames the term: only the row and the stored version change
+        Term.objects.filter(pk=self.fall.pk).update(name='Autumn')
+        store_new_versions(['students.term'])
+        self.assertEqual(term_calendar.current().name, 'Autumn')
+        self.assertEqual(self.client.get('/api/terms/current/').json()['name'], 'Autumn')
+
+    def test_terms_cannot_overlap(self):
+        response = self.client.post('/api/terms/', {
+            'name': 'Summer', 'start_date': str(self.fall.end_date), 'end_date': str(self.fall.end_date + datetime.timedelta(days=30)),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        # The admin validates through the model
+        summer = Term(name='Summer', start_date=self.fall.end_date, end_date=self.fall.end_date + datetime.timedelta(days=30))
+        with self.assertRaises(ValidationError):
+            summer.full_clean()
+        with self.assertRaises(CommandError):
+            call_command('archive_grades', '--term', 'Fall', stdout=io.StringIO())
+
+        call_command('archive_grades', stdout=io.StringIO())
+        self.spring.refresh_from_db()
+        self.spring.end_date -= datetime.timedelta(days=1)
+        with self.assertRaises(ValidationError):
+            self.spring.full_clean()
+        response = self.client.patch(f'/api/terms/{self.spring.pk}/', {'end_date': str(self.spring.end_date)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['The dates of an archived term cannot be changed.']})
+        self.assertEqual(self.client.patch(f'/api/terms/{self.spring.pk}/', {'name': 'Spring 2026'}, format='json').status_code, 200)
+
+
+class JobQueueTests(GradeFixtureMixin, TestCase):
+    def enqueue(self, kind, **params):
+        return self.client.post('/api/jobs/', {'kind': kind, 'params': params}, format='json')
+
+    def test_enqueue_poll_and_download(self):
+        response = self.enqueue('grade_export', term='all', student_id=self.alice.pk)
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job['status'], 'queued')
+        self.assertTrue(response['Location'].endswith(f"/api/jobs/{job['id']}/"))
+        # The identical pending job is reused
+        self.assertEqual(self.enqueue('grade_export', term='all', student_id=self.alice.pk).json()['id'], job['id'])
+        self.assertEqual(self.client.get(f"/api/jobs/{job['id']}/result/").status_code, 409)
+
+        self.assertEqual(jobs.run_next_job('test'), job['id'])
+        self.assertIsNone(jobs.run_next_job('test'))
+        job = self.client.get(f"/api/jobs/{job['id']}/").json()
+        self.assertEqual(job['status'], 'succeeded')
+
+        response = self.client.get(job['result_url'], HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = list(csv.reader(gzip.decompress(response.content).decode('utf-8').splitlines()))
+        self.assertEqual(len(rows), 4)  # header + Alice's three grades
+        response = self.client.get(job['result_url'], HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(b''.join(response.streaming_content)), job['result_size'])
+
+    def test_invalid_jobs_are_rejected(self):
+        self.assertEqual(self.enqueue('drop_tables').status_code, 400)
+        errors = self.enqueue('grade_export', student_id='abc', colour='red').json()['params']
+        self.assertEqual(set(errors), {'student_id', 'colour'})
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_and_stale_jobs(self):
+        job = Job.objects.create(kind='grade_summary', params={}, key='a')
+        with mock.patch('students.jobs.summarize_statistics', side_effect=RuntimeError('boom')), self.assertLogs('students.jobs', 'ERROR'):
+            jobs.run_next_job('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('failed', 'RuntimeError: boom'))
+
+        # The term was deleted after the export was queued
+        term = Term.objects.create(name='Spring', start_date=datetime.date(2000, 1, 1), end_date=datetime.date(2000, 6, 30))
+        params, _ = jobs.clean_params('grade_export', {'term': term.pk})
+        export = Job.objects.create(kind='grade_export', params=params, key='c')
+        Term.objects.filter(pk=term.pk).delete()
+        with self.assertLogs('students.jobs', 'ERROR'):
+            jobs.run_next_job('test')
+        export.refresh_from_db()
+        self.assertEqual((export.status, export.error), ('failed', f'ValueError: Term {term.pk} no longer exists.'))
+
+        # A worker that stopped responding: queued again, until the attempts run out
+        stale = timezone.now() - datetime.timedelta(minutes=5)
+        job = Job.objects.create(kind='grade_summary', key='b', status='running', attempts=1, heartbeat_at=stale)
+        self.assertEqual(jobs.recover_stale_jobs(), (1, 0))
+        Job.objects.filter(pk=job.pk).update(status='running', attempts=3, heartbeat_at=stale)
+        self.assertEqual(jobs.recover_stale_jobs(), (0, 1))
+
+        Job.objects.update(finished_at=timezone.now() - datetime.timedelta(days=2))
+        self.assertEqual(jobs.prune_jobs(), 3)
+
+
+class JobWorkerTests(TransactionTestCase):
+    def test_worker_runs_jobs_on_its_thread_pool(self):
+        seed_school(students=5, subjects=2, grades_per_student=2)
+        summary = Job.objects.create(kind='grade_summary', params={}, key='a')
+        finals = Job.objects.create(kind='final_grades', params={}, key='b')
+        out = io.StringIO()
+        call_command('run_worker', '--burst', '--concurrency', '2', '--poll-interval', '0.05', stdout=out)
+        self.assertIn('Worker stopped', out.getvalue())
+
+        summary.refresh_from_db()
+        finals.refresh_from_db()
+        self.assertEqual((summary.status, finals.status), ('succeeded', 'succeeded'))
+        self.assertEqual(json.loads(gzip.decompress(summary.result))['overall']['count'], 10)
+        self.assertEqual(len(gzip.decompress(finals.result).decode('utf-8').splitlines()), 11)
+
+
+class ResponseEncodingTests(GradeFixtureMixin, TestCase):
+    @skipUnless(renderers.orjson is not None, 'orjson is not installed')
+    def test_orjson_output_matches_the_stock_renderer(self):
+        bodies = {}
+        for backend in ('stdlib', 'orjson'):
+            cache.clear()
+            with override_settings(JSON_BACKEND=backend):
+                bodies[backend] = self.client.get('/api/grades/', {'paginate': 'false'}).getvalue()
+                bodies[backend + ' page'] = self.client.get('/api/students/').content
+        self.assertEqual(bodies['stdlib'], bodies['orjson'])
+        self.assertEqual(bodies['stdlib page'], bodies['orjson page'])
+        self.assertEqual(renderers.dumps({'text': 'a\u2028b', 1: Decimal('2.50')}), b'{"text":"a\\u2028b","1":2.5}')
+
+    def test_parser_reports_malformed_bodies(self):
+        response = self.client.post('/api/subjects/', b'{"name": "History", "code": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+        response = self.client.post('/api/subjects/', {'name': 'History', 'code': 'HIS101'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(COMPRESSION_MIN_SIZE=200)
+    def test_large_bodies_are_compressed_as_negotiated(self):
+        plain = self.client.get('/api/grades/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get('/api/grades/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        # The weak ETag still validates the cached representation
+        self.assertEqual(self.client.get('/api/grades/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        if middleware.brotli is not None:
+            response = self.client.get('/api/grades/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(middleware.brotli.decompress(response.content), plain.content)
+
+        streamed = self.client.get('/api/grades/', {'paginate': 'false'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(streamed['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(streamed.getvalue()))), 5)
+
+        small = self.client.get(f'/api/subjects/{self.math.id}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+
+# The manifest storage needs `collectstatic`, which tests do not run
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class AdminChangelistTests(GradeFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = ['/admin/students/grade/', '/admin/students/grade/?q=S00', '/admin/students/student/', '/admin/students/grade/add/']
+        [self.changelist_queries(url) for url in urls]  # Warm up per-process caches (content types, ...)
+        before = [self.changelist_queries(url) for url in urls]
+        seed_school(students=40, subjects=5, grades_per_student=6)
+        self.assertEqual([self.changelist_queries(url) for url in urls], before)
+
+    def test_foreign_keys_use_autocomplete(self):
+        response = self.client.get('/admin/students/grade/add/')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, str(self.bob))
+
+        response = self.client.get('/admin/autocomplete/', {
+            'app_label': 'students', 'model_name': 'grade', 'field_name': 'student', 'term': 'bro',
+        })
+        self.assertEqual([row['text'] for row in response.json()['results']], [str(self.bob)])
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_big_unfiltered_tables_use_the_estimated_count(self):
+        grades = Grade.objects.all()
+        with mock.patch.object(students_admin, 'estimated_row_count', return_value=250000):
+            with self.assertNumQueries(0):
+                self.assertEqual(students_admin.EstimatedCountPaginator(grades, 100).count, 250000)
+        with mock.patch.object(students_admin, 'estimated_row_count', return_value=500):
+            self.assertEqual(students_admin.EstimatedCountPaginator(grades, 100).count, 5)
+        self.assertIsNone(students_admin.estimated_row_count(grades.filter(grade_type='quiz')))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(GradeFixtureMixin, TestCase):
+    def routed_reads(self):
+        """Records where ReplicaRouter sends each read, while actually reading from the test database."""
+        decisions = []
+        route = ReplicaRouter.db_for_read
+
+        def recording(router, model, **hints):
+            decisions.append(route(router, model, **hints))
+            return DEFAULT_DB_ALIAS
+
+        return mock.patch.object(ReplicaRouter, 'db_for_read', recording), decisions
+
+    def test_api_reads_use_the_replica_and_writes_the_primary(self):
+        patch, decisions = self.routed_reads()
+        with patch:
+            self.assertEqual(self.client.get('/api/grades/').status_code, 200)
+            self.assertEqual(set(decisions), {'replica1'})
+
+            decisions.clear()
+            self.client.post('/api/subjects/', {'name': 'History', 'code': 'HIS101'}, format='json')
+            self.assertEqual(set(decisions), {DEFAULT_DB_ALIAS})
+
+            decisions.clear()
+            self.client.get('/api/sync/', {'since': timezone.now().isoformat()})
+            self.assertEqual(set(decisions), {DEFAULT_DB_ALIAS})
+
+    def test_reads_stay_on_the_primary_right_after_a_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='History', code='HIS101')
+        patch, decisions = self.routed_reads()
+        with patch:
+            self.client.get('/api/subjects/')
+        self.assertEqual(set(decisions), {DEFAULT_DB_ALIAS})
+
+    def test_writes_from_other_processes_keep_reads_on_the_primary(self):
+        # Another process only leaves its new versions in the database
+        store_new_versions(['students.subject'])
+        patch, decisions = self.routed_reads()
+        with patch:
+            self.client.get('/api/subjects/')
+        self.assertEqual(set(decisions), {DEFAULT_DB_ALIAS})
+
+    def test_a_write_pins_the_rest_of_the_request_to_the_primary(self):
+        router = ReplicaRouter()
+        routing = RequestRouting()
+        routing.replica = 'replica1'
+        token = active_routing.set(routing)
+        try:
+            self.assertEqual(router.db_for_read(Student), 'replica1')
+            self.assertEqual(router.db_for_write(Student), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(Student), DEFAULT_DB_ALIAS)
+        finally:
+            active_routing.reset(token)
+        self.assertEqual(router.db_for_read(Student), DEFAULT_DB_ALIAS)
+
+
+class BulkGradeTests(GradeFixtureMixin, TestCase):
+    def test_bulk_create_uses_constant_queries(self):
+        Grade.objects.all().delete()
+        rows = [
+            {'student_id': student.id, 'subject_id': subject.id, 'grade_type': grade_type, 'score': '88.50'}
+            for student in (self.alice, self.bob)
+            for subject in (self.math, self.science)
+            for grade_type in ('activity', 'quiz', 'exam')
+        ]
+        # students + subjects + collision check + INSERT + statistics aggregate/upsert (+ savepoints)
+        with self.assertNumQueries(10):
+            response = self.client.post('/api/grades/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 12, 'updated': 0})
+        self.assertEqual(Grade.objects.count(), 12)
+
+    def test_bulk_reports_errors_per_row_and_writes_nothing(self):
+        rows = [
+            {'student_id': self.bob.id, 'subject_id': self.math.id, 'grade_type': 'activity', 'score': '70'},
+            {'student_id': 9999, 'subject_id': self.math.id, 'grade_type': 'quiz', 'score': '70'},
+            {'student_id': self.alice.id, 'subject_id': self.math.id, 'grade_type': 'quiz', 'score': '70'},
+            {'student_id': self.bob.id, 'subject_id': self.math.id, 'grade_type': 'bogus', 'score': '70'},
+        ]
+        response = self.client.post('/api/grades/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = {error['index']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(set(errors), {1, 2, 3})
+        self.assertIn('student_id', errors[1])
+        self.assertIn('non_field_errors', errors[2])
+        self.assertIn('grade_type', errors[3])
+        self.assertEqual(Grade.objects.count(), 5)
+
+    def test_bulk_upsert_updates_existing_grades(self):
+        rows = [
+            {'student_id': self.alice.id, 'subject_id': self.math.id, 'grade_type': 'quiz', 'score': '99'},
+            {'student_id': self.alice.id, 'subject_id': self.math.id, 'grade_type': 'activity', 'score': '75'},
+        ]
+        response = self.client.post('/api/grades/bulk/', {'grades': rows, 'upsert': True}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 1, 'updated': 1})
+        self.assertEqual(Grade.objects.get(student=self.alice, subject=self.math, grade_type='quiz').score, Decimal('99'))
+        self.assertEqual(Grade.objects.count(), 6)
+
+
+class StudentImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Student.objects.create(student_id='S001', first_name='Alice', last_name='Able', email='alice@example.com')
+
+    def upload(self, text, **params):
+        upload = SimpleUploadedFile('roster.csv', text.encode('utf-8'), content_type='text/csv')
+        url = '/api/students/import/'
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(url, {'file': upload}, format='multipart')
+
+    def test_import_creates_skips_and_reports_errors(self):
+        roster = (
+            'student_id,first_name,last_name,email,date_of_birth\n'
+            'S001,Alicia,Able,alice@example.com,\n'
+            'S002,Bob,Brown,bob@example.com,2010-05-01\n'
+            'S003,Cara,Cole,bob@example.com,\n'
+            'S004,Dan,Dunn,not-an-email,\n'
+            'S005,Eve,Evans,eve@example.com,\n'
+        )
+        response = self.upload(roster, batch_size=2)
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual((stats['rows'], stats['created'], stats['skipped'], stats['failed']), (5, 2, 1, 2))
+        self.assertEqual([error['line'] for error in stats['errors']], [4, 5])
+        self.assertEqual(Student.objects.get(student_id='S001').first_name, 'Alice')
+        self.assertEqual(str(Student.objects.get(student_id='S002').date_of_birth), '2010-05-01')
+
+    def test_import_update_mode_overwrites_existing(self):
+        response = self.upload('student_id,first_name,last_name,email\nS001,Alicia,Able,alice@example.com\n', update='true')
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(Student.objects.get(student_id='S001').first_name, 'Alicia')
+
+    def test_import_rejects_missing_columns(self):
+        response = self.upload('student_id,first_name\nS009,Zed\n')
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_imports_synthetic_roster(self):
+        out = io.StringIO()
+        call_command('import_students', synthetic=250, batch_size=100, stdout=out)
+        self.assertIn('250 created', out.getvalue())
+        self.assertEqual(Student.objects.count(), 251)
+
+
+class GradeStatisticTests(GradeFixtureMixin, TestCase):
+    def stat(self, student, subject, grade_type):
+        return GradeStatistic.objects.get(student=student, subject=subject, grade_type=grade_type)
+
+    def test_statistics_follow_create_update_and_delete(self):
+        quiz = self.stat(self.alice, self.math, 'quiz')
+        self.assertEqual((quiz.count, quiz.total, quiz.min_score, quiz.max_score), (1, Decimal('90'), Decimal('90'), Decimal('90')))
+
+        grade = Grade.objects.get(student=self.alice, subject=self.math, grade_type='quiz')
+        grade.score = Decimal('70')
+        grade.grade_type = 'activity'
+        grade.save()
+        self.assertFalse(GradeStatistic.objects.filter(student=self.alice, subject=self.math, grade_type='quiz').exists())
+        self.assertEqual(self.stat(self.alice, self.math, 'activity').total, Decimal('70'))
+
+        grade.delete()
+        self.assertFalse(GradeStatistic.objects.filter(student=self.alice, subject=self.math, grade_type='activity').exists())
+
+    def test_variance_from_running_sums(self):
+        stat = GradeStatistic(count=2, total=Decimal('160'), sum_of_squares=Decimal('12850'))
+        self.assertEqual(stat.average, 80.0)
+        self.assertEqual(stat.variance, 25.0)
+
+    def test_bulk_path_and_cascade_keep_statistics_in_step(self):
+        self.client.post('/api/grades/bulk/', [
+            {'student_id': self.bob.id, 'subject_id': self.math.id, 'grade_type': 'exam', 'score': '50'},
+        ], format='json')
+        self.assertEqual(self.stat(self.bob, self.math, 'exam').count, 1)
+
+        self.bob.delete()
+        self.assertFalse(GradeStatistic.objects.filter(student_id=self.bob.id).exists())
+
+        # A queryset delete cascades the same way, without refreshing a cell per grade
+        with mock.patch('students.signals.statistics.refresh_cells') as refresh_cells:
+            Subject.objects.filter(pk=self.science.pk).delete()
+        refresh_cells.assert_not_called()
+        self.assertFalse(GradeStatistic.objects.filter(subject_id=self.science.id).exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        GradeStatistic.objects.filter(student=self.alice).update(count=99)
+        out = io.StringIO()
+        call_command('rebuild_grade_stats', check=True, stdout=out)
+        self.assertIn('3 statistics cell(s) out of date', out.getvalue())
+
+        call_command('rebuild_grade_stats', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('rebuild_grade_stats', check=True, stdout=out)
+        self.assertIn('0 statistics cell(s) out of date', out.getvalue())
+        self.assertEqual(self.stat(self.alice, self.math, 'quiz').count, 1)
+
+
+class DeltaSyncTests(GradeFixtureMixin, TestCase):
+    def sync(self, cursor):
+        response = self.client.get('/api/sync/', {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_and_deletions_since_cursor(self):
+        cursor = self.client.get('/api/sync/').json()['cursor']
+        # Nothing written since the fixture, but the overlap window still covers it
+        self.assertEqual(len(self.sync(cursor)['changed']['grades']), 5)
+
+        later = (timezone.now() + datetime.timedelta(seconds=1)).isoformat()
+        self.assertEqual(self.sync(later)['changed'], {'students': [], 'subjects': [], 'grades': []})
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + datetime.timedelta(seconds=2)):
+            self.client.patch(f'/api/students/{self.alice.pk}/', {'first_name': 'Alicia'}, format='json')
+            bob_id, bob_grades = self.bob.pk, sorted(self.bob.grades.values_list('pk', flat=True))
+            self.bob.delete()
+            self.math.grades.filter(student=self.alice, grade_type='quiz').delete()
+
+        data = self.sync(later)
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['first_name'] for row in data['changed']['students']], ['Alicia'])
+        self.assertEqual(data['changed']['grades'], [])
+        self.assertEqual(data['deleted']['students'], [bob_id])
+        # The CASCADE from bob to his grades leaves tombstones too
+        quiz = Tombstone.objects.filter(model='grade').exclude(object_id__in=bob_grades).get().object_id
+        self.assertEqual(data['deleted']['grades'], sorted(bob_grades + [quiz]))
+
+    def test_reset_and_bad_cursor(self):
+        old = (timezone.now() - datetime.timedelta(days=31)).isoformat()
+        self.assertTrue(self.sync(old)['reset'])
+        with self.settings(SYNC_MAX_CHANGES=4):
+            self.assertTrue(self.sync(self.client.get('/api/sync/').json()['cursor'])['reset'])
+        for bad in ['yesterday', '2026-01-01T00:00:00']:
+            self.assertEqual(self.client.get('/api/sync/', {'since': bad}).status_code, 400)
+
+    def test_prune_command_removes_expired_tombstones(self):
+        self.bob.delete()
+        Tombstone.objects.filter(model='student').update(deleted_at=timezone.now() - datetime.timedelta(days=40))
+        out = io.StringIO()
+        call_command('prune_tombstones', stdout=out)
+        self.assertIn('Pruned 1 tombstone(s)', out.getvalue())
+        self.assertEqual(Tombstone.objects.filter(model='grade').count(), 2)
+
+
+@override_settings(PERF_METRICS_ENABLED=True)
+class PerformanceMetricsTests(GradeFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        endpoint_metrics.reset()
+        term_calendar.terms()
+
+    def test_server_timing_header_and_admin_report(self):
+        response = self.client.get('/api/grades/', {'compact': 'true'})
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('"4 queries"', response['Server-Timing'])
+
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(admin)
+        report = self.client.get('/metrics/').json()['endpoints']
+        self.assertEqual(report['GET grade-list']['requests'], 1)
+        self.assertEqual(report['GET grade-list']['queries']['p50'], 4)
+
+    @override_settings(PERF_METRICS_ENABLED=False)
+    def test_disabled_middleware_adds_nothing(self):
+        response = self.client.get('/api/subjects/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+@tag('benchmark')
+class BenchmarkHarnessTests(TestCase):
+    def test_seed_and_run_every_scenario(self):
+        cache.clear()
+        seeded = seed_school(students=20, subjects=3, grades_per_student=12)
+        self.assertEqual(seeded, {'students': 20, 'subjects': 3, 'grades': 240})
+        self.assertEqual(GradeStatistic.objects.aggregate(total=Sum('count'))['total'], 240)
+
+        results = run_scenarios(iterations=3, warmup=1)
+        self.assertIn('grades.filter_student', results)
+        for name, result in results.items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+
+class ConditionalRequestTests(GradeFixtureMixin, TestCase):
+    def test_matching_etag_returns_304_after_the_version_lookup_only(self):
+        first = self.client.get('/api/students/')
+        etag = first['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/students/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('students_collectionversion', queries[0]['sql'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_cached_body_is_served_until_a_write_bumps_the_version(self):
+        first = self.client.get('/api/subjects/')
+        with self.assertNumQueries(1):  # The version lookup
+            cached = self.client.get('/api/subjects/')
+        self.assertEqual(cached.content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='History', code='HIS101')
+        fresh = self.client.get('/api/subjects/')
+        self.assertNotEqual(fresh['ETag'], first['ETag'])
+        self.assertEqual(len(fresh.json()['results']), 3)
+
+    def test_writes_from_other_processes_invalidate_this_one(self):
+        etag = self.client.get('/api/subjects/')['ETag']
+        # What a write committed by another worker or a management command leaves behind;
+        # nothing in this process's cache is touched
+        store_new_versions({'students.subject'})
+        response = self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_grade_etag_depends_on_student_changes(self):
+        etag = self.client.get('/api/grades/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.first_name = 'Alicia'
+            self.alice.save()
+        response = self.client.get('/api/grades/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class IndexedSearchTests(GradeFixtureMixin, TestCase):
+    def test_search_keys_are_normalized_on_save_and_bulk_create(self):
+        student = Student.objects.create(student_id='X-9', first_name='Zoë', last_name='  Núñez ', email='z@example.com')
+        self.assertEqual((student.first_name_key, student.last_name_key, student.student_id_key), ('zoe', 'nunez', 'x-9'))
+        Subject.objects.bulk_create([Subject(name='History', code='HIS101')])
+        self.assertEqual(Subject.objects.get(code='HIS101').code_key, 'his101')
+
+    def test_prefix_search_is_ranked_and_case_insensitive(self):
+        Student.objects.create(student_id='B100', first_name='Carl', last_name='Brownlee', email='carl@example.com')
+        results = self.client.get('/api/students/', {'search': 'BROWN'}).json()['results']
+        # Exact last-name match ranks above the prefix match
+        self.assertEqual([row['student_id'] for row in results], ['S002', 'B100'])
+        self.assertNotIn('last_name_key', results[0])
+
+        results = self.client.get('/api/students/', {'search': 'alice ab'}).json()['results']
+        self.assertEqual([row['student_id'] for row in results], ['S001'])
+
+        results = self.client.get('/api/subjects/', {'search': 'sci'}).json()['results']
+        self.assertEqual([row['code'] for row in results], ['SCI101'])
+
+    def test_ranked_search_paginates_without_gaps(self):
+        for number in range(5):
+            Student.objects.create(student_id=f'A{number}', first_name='Ann', last_name=f'Abbot{number}', email=f'a{number}@example.com')
+        response = self.client.get('/api/students/', {'search': 'a', 'page_size': 2})
+        seen = []
+        while True:
+            data = response.json()
+            seen.extend(row['student_id'] for row in data['results'])
+            if not data['next']:
+                break
+            response = self.client.get(data['next'])
+        self.assertEqual(sorted(seen), sorted(['S001', 'A0', 'A1', 'A2', 'A3', 'A4']))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_search_uses_an_index_on_sqlite(self):
+        queryset = search(Student.objects.all(), 'brown', ['student_id_key', 'last_name_key', 'first_name_key'])
+        plan = queryset.explain()
+        self.assertNotIn('SCAN students_student', plan.replace('USING INDEX', ''))
+
+
+class SuggestTests(GradeFixtureMixin, TestCase):
+    def test_suggest_returns_ids_and_labels_by_prefix(self):
+        response = self.client.get('/api/students/suggest/', {'q': 'bro'})
+        self.assertEqual(response.json(), [{'id': self.bob.pk, 'label': 'Bob Brown'}])
+
+        response = self.client.get('/api/students/suggest/', {'q': 's00'})
+        self.assertEqual([row['id'] for row in response.json()], [self.alice.pk, self.bob.pk])
+
+        label = f'{self.math.name} (MATH101)'
+        response = self.client.get('/api/subjects/suggest/', {'q': 'math'})
+        self.assertEqual(response.json(), [{'id': self.math.pk, 'label': label}])
+        # A selected label typed back in (as the edit form does) finds the same subject
+        self.assertEqual(self.client.get('/api/subjects/suggest/', {'q': label}).json()[0]['id'], self.math.pk)
+
+    def test_every_term_must_match_and_limit_applies(self):
+        self.assertEqual(self.client.get('/api/students/suggest/', {'q': 'alice brown'}).json(), [])
+        self.assertEqual(len(self.client.get('/api/students/suggest/', {'q': '', 'limit': 1}).json()), 1)
+        self.assertEqual(self.client.get('/api/students/suggest/', {'limit': 500}).status_code, 400)
+
+    def test_index_is_built_once_and_invalidated_on_change(self):
+        self.client.get('/api/students/suggest/', {'q': 'a'})
+        with self.assertNumQueries(1):  # The version lookup
+            self.client.get('/api/students/suggest/', {'q': 'b'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(student_id='S003', first_name='Brenda', last_name='Cole', email='brenda@example.com')
+        labels = [row['label'] for row in self.client.get('/api/students/suggest/', {'q': 'b'}).json()]
+        self.assertEqual(labels, ['Bob Brown', 'Brenda Cole'])
+
+    def test_index_follows_writes_from_other_processes(self):
+        self.client.get('/api/students/suggest/', {'q': 'a'})
+        # A student imported by another process: its rows are visible before its version is
+        Student.objects.create(student_id='S003', first_name='Brenda', last_name='Cole', email='brenda@example.com')
+        self.assertEqual(len(self.client.get('/api/students/suggest/', {'q': 'b'}).json()), 1)
+        store_new_versions({'students.student'})
+        self.assertEqual(len(self.client.get('/api/students/suggest/', {'q': 'b'}).json()), 2)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Fails when a main Grade access pattern falls back to a full scan or a sort.
+    Runs against whichever database backs the tests (SQLite or PostgreSQL).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date(2025, 6, 30)
+        seed_school(students=60, subjects=5, grades_per_student=15, start_date=cls.today)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE') # Give the planner real statistics
+        cls.grade = Grade.objects.order_by('pk').first()
+        cls.order = KeysetPagination.orderings['students.grade']
+
+    def assertIndexed(self, queryset, table=None):
+        self.assertEqual(plan_problems(queryset, table), [])
+
+    def test_grade_list_and_filters_read_in_index_order(self):
+        grades = Grade.objects.select_related('student', 'subject').order_by(*self.order)
+        self.assertIndexed(grades[:101])
+        self.assertIndexed(grades.filter(student__id=self.grade.student_id)[:101])
+        self.assertIndexed(grades.filter(subject__id=self.grade.subject_id)[:101])
+        self.assertIndexed(grades.filter(student__id=self.grade.student_id, subject__id=self.grade.subject_id)[:101])
+        # Seeking past a cursor position keeps using the same index
+        self.assertIndexed(grades.filter(student_id__gt=self.grade.student_id)[:101])
+
+    def test_date_range_uses_the_date_index(self):
+        week = {'date_recorded__gte': self.today - datetime.timedelta(days=7), 'date_recorded__lte': self.today}
+        self.assertIndexed(Grade.objects.filter(**week).order_by('date_recorded', 'id')[:101])
+        # In the list order the range still avoids a scan, but the page has to be sorted
+        problems = plan_problems(Grade.objects.filter(**week).order_by(*self.order)[:101])
+        self.assertFalse([problem for problem in problems if 'scan' in problem], problems)
+
+    def test_statistics_grouping_and_student_list_use_indexes(self):
+        self.assertIndexed(cell_aggregates(Grade.objects.filter(student_id=self.grade.student_id)))
+        self.assertIndexed(GradeStatistic.objects.filter(subject__id=self.grade.subject_id).order_by())
+        self.assertIndexed(Student.objects.order_by('last_name', 'first_name', 'id')[:101])
+
+    def test_list_endpoint_filters_by_date_range(self):
+        cache.clear()
+        client = APIClient()
+        day = self.today.isoformat()
+        results = client.get('/api/grades/', {'date_from': day, 'date_to': day, 'page_size': 1000}).json()['results']
+        self.assertEqual({row['date_recorded'] for row in results}, {day})
+        self.assertEqual(len(results), Grade.objects.filter(date_recorded=self.today).count())
+        self.assertEqual(client.get('/api/grades/', {'date_from': '2025-02-30'}).status_code, 400)
+
+
+class AsyncURLConf:
+    """Routes the API through the async read views, as in the ASGI server mode."""
+    urlpatterns = [path('api/', include(async_read_urls(router.urls)))]
+
+
+class AsyncReadTests(GradeFixtureMixin, TestCase):
+    async def get_both(self, path):
+        """Returns the (sync, async) JSON bodies for `path`, each from an empty response cache."""
+        await sync_to_async(cache.clear)()
+        sync_response = await sync_to_async(self.client.get)(path)
+        await sync_to_async(cache.clear)()
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            async_response = await self.async_client.get(path)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        if async_response.streaming:
+            body = b''.join([chunk async for chunk in async_response.streaming_content])
+            sync_body = await sync_to_async(b''.join)(sync_response.streaming_content)
+            return json.loads(sync_body), json.loads(body)
+        return sync_response.json(), async_response.json()
+
+    async def test_read_endpoints_match_the_sync_views(self):
+        for path in [
+            '/api/students/',
+            f'/api/students/{self.alice.pk}/',
+            f'/api/students/{self.alice.pk}/report/',
+            '/api/subjects/?search=sci',
+            '/api/grades/',
+            f'/api/grades/?student_id={self.alice.pk}&page_size=2',
+            '/api/grades/?compact=true',
+            '/api/grades/?paginate=false',
+            '/api/grades/?compact=true&paginate=false',
+            '/api/grades/summary/?passing_threshold=80',
+            '/api/terms/',
+        ]:
+            with self.subTest(path=path):
+                sync_data, async_data = await self.get_both(path)
+                self.assertEqual(async_data, sync_data)
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_views_are_coroutines_and_errors_match(self):
+        self.assertTrue(iscoroutinefunction(resolve('/api/grades/').func))
+        for path in ['/api/students/999999/', '/api/students/abc/', '/api/grades/?cursor=bogus']:
+            with self.subTest(path=path):
+                self.assertEqual((await self.async_client.get(path)).status_code, 404)
+        response = await self.async_client.get('/api/grades/summary/?passing_threshold=abc')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_writes_and_conditional_requests_still_work(self):
+        response = await self.async_client.post('/api/subjects/', {'name': 'History', 'code': 'HIS101'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        response = await self.async_client.get('/api/subjects/')
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get('/api/subjects/', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
@@ -3,9 +3,11 @@
 # Django REST Framework's routers automatically generate URL patterns
 # for common API operations (list, create, retrieve, update, delete).
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StudentViewSet, SubjectViewSet, GradeViewSet
+from .async_reads import async_read_urls
+from .views import StudentViewSet, SubjectViewSet, GradeViewSet, TermViewSet, SyncViewSet, JobViewSet
 
 # Create a router instance
 router = DefaultRouter()
@@ -17,8 +19,12 @@ router = DefaultRouter()
 router.register(r'students', StudentViewSet, basename='student')
 router.register(r'subjects', SubjectViewSet, basename='subject')
 router.register(r'grades', GradeViewSet, basename='grade')
+router.register(r'terms', TermViewSet, basename='term')
+router.register(r'sync', SyncViewSet, basename='sync') # Changes since a cursor, for client-side caches
+router.register(r'jobs', JobViewSet, basename='job') # Background jobs run by `manage.py run_worker`
 
 # The API URLs are now determined automatically by the router.
+# When served over ASGI, GET requests go through the async read views instead.
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(async_read_urls(router.urls) if settings.ASYNC_READ_VIEWS else router.urls)),
 ]
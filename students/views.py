@@ -3,55 +3,236 @@
 # Viewsets provide actions like list, create, retrieve, update, and destroy
 # for a model, abstracting common CRUD operations.
 
-from rest_framework import viewsets
-from .models import Student, Subject, Grade
-from .serializers import StudentSerializer, SubjectSerializer, GradeSerializer
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action # For custom, non-CRUD endpoints
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from .models import Student, Subject, Grade, GradeStatistic, GradingPolicy, Job, Term
+from .serializers import (
+    StudentSerializer, SubjectSerializer, GradeSerializer, CompactGradeSerializer, GradingPolicySerializer, TermSerializer,
+    JobSerializer, JobRequestSerializer,
+)
+from .aggregates import summarize_statistics, asummarize_statistics, report_card
+from .analytics import DEFAULT_TOP, MAX_TOP, analytics_payload, term_analytics
+from .async_reads import AsyncReadMixin
+from .bulk import bulk_save_grades, import_students_csv, MAX_BULK_GRADES, RosterImportError
+from .caching import ConditionalCacheMixin
+from .grading import default_weights, final_grade_payload, final_grades
+from .jobs import enqueue, result_response
+from .renderers import dumps
+from .streaming import (
+    StreamingListMixin, TRUE_VALUES, DEFAULT_CHUNK_SIZE, CSVStreamRenderer, NDJSONStreamRenderer, GRADE_EXPORT_FIELDS,
+    export_response, grade_export_rows, iter_chunks,
+)
 from rest_framework import permissions # For setting permissions
-from rest_framework.filters import SearchFilter # For adding search capabilities
+from .search import IndexedSearchFilter # Index-backed replacement for DRF's SearchFilter
+from .statistics import cell_aggregates
+from .suggest import SuggestMixin, student_suggestions, subject_suggestions
+from .sync import changes_since, current_cursor, parse_cursor
+from .terms import grades_in, term_calendar
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(SuggestMixin, ConditionalCacheMixin, StreamingListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing student instances.
     Provides full CRUD operations for Student objects.
     Includes search functionality by first_name, last_name, and student_id.
+    Lists are cursor-paginated; `?paginate=false` streams the full list instead.
+    `suggest/?q=` serves typeahead matches as `{id, label}` pairs.
+    `{id}/report/` returns the student's report card.
     """
     queryset = Student.objects.all() # The set of objects that this view will operate on
     serializer_class = StudentSerializer # The serializer to use for input validation and output serialization
+    cache_dependencies = (Student,) # Collections whose change versions make up the ETag
     # permission_classes = [permissions.IsAuthenticatedOrReadOnly] # Example permission: authenticated users can edit, others can only read
 
-    # Add search filter to allow querying by student ID or name
-    filter_backends = [SearchFilter]
-    search_fields = ['first_name', 'last_name', 'student_id']
+    # Add search filter to allow querying by student ID or name (prefix match, ranked)
+    filter_backends = [IndexedSearchFilter]
+    search_fields = ['student_id', 'last_name', 'first_name']
+    suggest_index = student_suggestions # In-process typeahead index for `suggest/`
+
+    # Columns written by the export action, in order
+    export_fields = ['id', 'student_id', 'first_name', 'last_name', 'email', 'date_of_birth', 'enrollment_date']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'report':
+            # One query loads every grade with its subject, already in report order
+            grades = Grade.objects.select_related('subject').order_by('subject__name', 'grade_type', 'date_recorded', 'id')
+            queryset = queryset.prefetch_related(Prefetch('grades', queryset=grades))
+        return queryset
+
+    def get_cache_dependencies(self):
+        if self.action == 'report':
+            return (Student, Subject, Grade) # The report card embeds grades and subject details
+        return super().get_cache_dependencies()
+
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """
+        Returns the student's report card: their grades grouped by subject and grade type,
+        with per-subject and overall averages and totals. Always four queries (the collection
+        versions, the student, the prefetched grades and one grouped aggregate), however many
+        grades there are.
+        """
+        def compute():
+            student = self.get_object()
+            cells = cell_aggregates(Grade.objects.filter(student=student))
+            return Response(self.report_payload(student, student.grades.all(), cells))
+        return self.cached_response(request, compute)
+
+    async def areport(self, request, pk=None):
+        async def compute():
+            student = await self.aget_object()
+            cells = [cell async for cell in cell_aggregates(Grade.objects.filter(student=student))]
+            return Response(self.report_payload(student, student.grades.all(), cells))
+        return await self.acached_response(request, compute)
+
+    def report_payload(self, student, grades, cells):
+        return {'student': self.get_serializer(student).data, **report_card(grades, cells)}
 
+    @action(detail=False, methods=['get'], renderer_classes=[CSVStreamRenderer, NDJSONStreamRenderer])
+    def export(self, request):
+        """
+        Streams every (optionally searched) student as CSV (default) or NDJSON (`?format=ndjson`).
+        """
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .order_by('last_name', 'first_name', 'id')
+            .values_list(*self.export_fields)
+        )
+        return export_response(request, queryset, self.export_fields, 'students')
 
-class SubjectViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_roster(self, request):
+        """
+        Imports a roster CSV uploaded as the multipart field `file`.
+        Existing student_ids are skipped, or updated with `?update=true`;
+        `?batch_size=` controls the chunk size (default 1000).
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'No file was submitted.'})
+        try:
+            batch_size = int(request.query_params.get('batch_size', 1000))
+        except ValueError:
+            batch_size = 0
+        if batch_size <= 0:
+            raise ValidationError({'batch_size': 'A positive integer is required.'})
+
+        update_existing = request.query_params.get('update', '').lower() in TRUE_VALUES
+        # Decode the upload incrementally instead of reading it into memory
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            stats = import_students_csv(stream, batch_size=batch_size, update_existing=update_existing)
+        except (RosterImportError, UnicodeDecodeError) as exc:
+            raise ValidationError({'file': str(exc)})
+        return Response(stats)
+
+
+class SubjectViewSet(SuggestMixin, ConditionalCacheMixin, StreamingListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing subject instances.
     Provides full CRUD operations for Subject objects.
     Includes search functionality by name and code.
+    Lists are cursor-paginated; `?paginate=false` streams the full list instead.
+    `suggest/?q=` serves typeahead matches as `{id, label}` pairs.
+    `{id}/grading-policy/` reads and sets how each grade type is weighted.
     """
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
+    cache_dependencies = (Subject,)
     # permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-    # Add search filter to allow querying by subject name or code
-    filter_backends = [SearchFilter]
-    search_fields = ['name', 'code']
+    # Add search filter to allow querying by subject name or code (prefix match, ranked)
+    filter_backends = [IndexedSearchFilter]
+    search_fields = ['code', 'name']
+    suggest_index = subject_suggestions
+
+    @action(detail=True, methods=['get', 'put', 'delete'], url_path='grading-policy', serializer_class=GradingPolicySerializer)
+    def grading_policy(self, request, pk=None):
+        """
+        Reads (GET), sets (PUT) or resets to the default weights (DELETE) the subject's
+        grading policy: the relative weight of activities, quizzes and exams in final grades.
+        """
+        subject = self.get_object()
+        policy = GradingPolicy.objects.filter(subject=subject).first()
+        if request.method == 'DELETE':
+            if policy is not None:
+                policy.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if request.method == 'PUT':
+            serializer = GradingPolicySerializer(policy, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            policy = serializer.save(subject=subject)
+        if policy is None:
+            # Not saved: shows the defaults the subject is graded with
+            policy = GradingPolicy(subject=subject, **{
+                f'{grade_type}_weight': weight for (grade_type, _), weight in zip(Grade.GRADE_TYPES, default_weights())
+            })
+        return Response({**GradingPolicySerializer(policy).data, 'is_default': policy.pk is None})
 
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(ConditionalCacheMixin, StreamingListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing grade instances.
     Provides full CRUD operations for Grade objects.
+    Lists are cursor-paginated; `?paginate=false` streams the full list instead.
+    Filter with `?student_id=`, `?subject_id=` and an inclusive `?date_from=`/`?date_to=` range.
+    Pass `?compact=true` to the list endpoint to receive flat grade rows plus
+    side-loaded `students`/`subjects` dictionaries instead of nested objects.
+    The list and export cover the current term unless a date range is given;
+    `?term=<id>` selects another term (archived ones included), `?term=all` every live grade.
     """
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
+    cache_dependencies = (Grade, Student, Subject, Term) # Grades embed student and subject details
     # permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Resolved here, in a worker thread on the async path, as it may load the calendar
+        self.term = self.selected_term()
+
+    def selected_term(self):
+        """
+        Returns the Term the request reads: `?term=<id>`, nothing for `?term=all`, and by
+        default the current term for list and export requests without a date range.
+        """
+        params = self.request.query_params
+        value = params.get('term', None)
+        if value is None:
+            if self.action not in ('list', 'export') or 'date_from' in params or 'date_to' in params:
+                return None
+            return term_calendar.current(version=self.calendar_version())
+        if value == 'all':
+            return None
+        term = term_calendar.get(int(value), self.calendar_version()) if value.isascii() and value.isdigit() else None
+        if term is None:
+            raise ValidationError({'term': 'The id of an existing term, or "all", is required.'})
+        if term.archived_at is not None and self.request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            raise ValidationError({'term': 'Archived grades are read-only.'})
+        return term
+
+    def calendar_version(self):
+        # Read along with the ETag's versions when the action depends on terms
+        return self.dependency_versions().get(Term)
+
+    def etag_context(self):
+        # The default term changes with the date, not with any collection
+        return (self.term.pk if self.term is not None else '',)
+
     # You can add custom filtering if needed, e.g., to filter grades by student or subject
     # This example demonstrates filtering by student_id from query parameters.
     def get_queryset(self):
-        queryset = Grade.objects.all().select_related('student', 'subject') # Optimize with select_related
+        queryset = grades_in(getattr(self, 'term', None)).select_related('student', 'subject') # Optimize with select_related
         student_id_param = self.request.query_params.get('student_id', None)
         subject_id_param = self.request.query_params.get('subject_id', None)
 
@@ -60,4 +241,370 @@ class GradeViewSet(viewsets.ModelViewSet):
         if subject_id_param is not None:
             queryset = queryset.filter(subject__id=subject_id_param) # Filter by subject's primary key
 
+        # Optional inclusive date range on date_recorded (YYYY-MM-DD), served by grade_date_idx
+        date_from = self.date_param('date_from')
+        date_to = self.date_param('date_to')
+        if date_from is not None:
+            queryset = queryset.filter(date_recorded__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(date_recorded__lte=date_to)
+
         return queryset
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Returns class standing analytics: the top `?top=` (default 10, max 100) students
+        overall and per subject with their rank and percentile, and score histograms per
+        subject and grade type. `?student_id=` adds that student's standing everywhere,
+        `?subject_id=` limits the subjects, and `?term=<id>` (archived terms included) or
+        `?date_from=`/`?date_to=` select a period.
+        """
+        params = {
+            'top': self.int_param('top', DEFAULT_TOP, maximum=MAX_TOP),
+            'subject_id': self.int_param('subject_id'),
+            'student_id': self.int_param('student_id'),
+        }
+        date_from, date_to = self.period()
+        version = self.dependency_versions()[Grade]
+        return self.cached_response(
+            request, lambda: Response(analytics_payload(term_analytics.get(date_from, date_to, version), **params)),
+        )
+
+    @action(detail=False, methods=['get'], url_path='final')
+    def final_grades(self, request):
+        """
+        Returns weighted final grades, one row per (student, subject) with the average of
+        each grade type, weighted by the subject's grading policy. Filter with `?student_id=`,
+        `?subject_id=`, `?term=<id>` and `?date_from=`/`?date_to=`; without filters, the whole school.
+        """
+        student_id, subject_id = self.int_param('student_id'), self.int_param('subject_id')
+        date_from, date_to = self.period()
+
+        def compute():
+            results = final_grades(
+                student_ids=None if student_id is None else [student_id],
+                subject_ids=None if subject_id is None else [subject_id],
+                date_from=date_from, date_to=date_to,
+            )
+            return Response(final_grade_payload(results))
+        return self.cached_response(request, compute)
+
+    def get_cache_dependencies(self):
+        if self.action == 'final_grades':
+            # Rows carry ids only; weights come from the policies, and `?term=` from the calendar
+            return (Grade, GradingPolicy, Term)
+        return super().get_cache_dependencies()
+
+    def period(self):
+        """
+        The dates the analytics and final grades cover: `?date_from=`/`?date_to=`, narrowed
+        to the dates of `?term=` when one is selected (its grades may be archived).
+        """
+        date_from, date_to = self.date_param('date_from'), self.date_param('date_to')
+        if self.term is not None:
+            date_from = self.term.start_date if date_from is None else max(date_from, self.term.start_date)
+            date_to = self.term.end_date if date_to is None else min(date_to, self.term.end_date)
+        return date_from, date_to
+
+    def int_param(self, name, default=None, maximum=None):
+        """Parses an optional positive integer query parameter (at most `maximum`)."""
+        value = self.request.query_params.get(name, None)
+        if value is None:
+            return default
+        try:
+            parsed = int(value)
+        except ValueError:
+            parsed = 0
+        if parsed < 1 or (maximum is not None and parsed > maximum):
+            expected = f'An integer between 1 and {maximum}' if maximum is not None else 'A positive integer'
+            raise ValidationError({name: f'{expected} is required.'})
+        return parsed
+
+    def date_param(self, name):
+        """Parses an optional YYYY-MM-DD query parameter, rejecting malformed dates."""
+        value = self.request.query_params.get(name, None)
+        if value is None:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'A valid date (YYYY-MM-DD) is required.'})
+        return parsed
+
+    def is_compact(self):
+        """True when the client asked for the compact (de-nested) representation."""
+        return self.request.query_params.get('compact', '').lower() in TRUE_VALUES
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_compact():
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(request, self.compact_list)
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.is_compact():
+            return await super().alist(request, *args, **kwargs)
+        return await self.acached_response(request, self.acompact_list)
+
+    def compact_list(self):
+        # Related objects are side-loaded below, so the per-row JOIN is not needed
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None)
+        if self.wants_stream():
+            return StreamingHttpResponse(self.stream_compact(queryset), content_type='application/json')
+        page = self.paginate_queryset(queryset)
+        grades = CompactGradeSerializer(page if page is not None else queryset, many=True).data
+        students, subjects = self.related_querysets(grades)
+        data = self.side_load(grades, students, subjects)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    async def acompact_list(self):
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None)
+        if self.wants_stream():
+            return StreamingHttpResponse(self.astream_compact(queryset), content_type='application/json')
+        if self.paginator is not None:
+            rows = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        else:
+            rows = [grade async for grade in queryset]
+        grades = CompactGradeSerializer(rows, many=True).data
+        students, subjects = self.related_querysets(grades)
+        data = self.side_load(grades, [student async for student in students], [subject async for subject in subjects])
+
+        if self.paginator is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def stream_compact(self, queryset):
+        """
+        Yields the unpaginated compact payload (`?paginate=false`): the grade rows as they
+        are read, then the students and subjects they reference.
+        """
+        student_ids, subject_ids = set(), set()
+        first = True
+        yield b'{"grades":['
+        for chunk in iter_chunks(queryset.iterator(chunk_size=DEFAULT_CHUNK_SIZE), DEFAULT_CHUNK_SIZE):
+            for grade in CompactGradeSerializer(chunk, many=True).data:
+                student_ids.add(grade['student_id'])
+                subject_ids.add(grade['subject_id'])
+                yield (b'' if first else b',') + dumps(grade)
+                first = False
+        # The referenced rows are read in chunks of ids, which keeps every IN list short
+        students = [
+            student for ids in iter_chunks(student_ids, DEFAULT_CHUNK_SIZE)
+            for student in Student.objects.filter(pk__in=ids)
+        ]
+        subjects = [
+            subject for ids in iter_chunks(subject_ids, DEFAULT_CHUNK_SIZE)
+            for subject in Subject.objects.filter(pk__in=ids)
+        ]
+        yield b']' + self.side_loaded_tail(students, subjects)
+
+    async def astream_compact(self, queryset):
+        """Async counterpart of stream_compact."""
+        student_ids, subject_ids = set(), set()
+        first = True
+        chunk = []
+        yield b'{"grades":['
+        async for row in queryset.aiterator(chunk_size=DEFAULT_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) < DEFAULT_CHUNK_SIZE:
+                continue
+            for grade in CompactGradeSerializer(chunk, many=True).data:
+                student_ids.add(grade['student_id'])
+                subject_ids.add(grade['subject_id'])
+                yield (b'' if first else b',') + dumps(grade)
+                first = False
+            chunk = []
+        for grade in CompactGradeSerializer(chunk, many=True).data:
+            student_ids.add(grade['student_id'])
+            subject_ids.add(grade['subject_id'])
+            yield (b'' if first else b',') + dumps(grade)
+            first = False
+        students = [
+            student for ids in iter_chunks(student_ids, DEFAULT_CHUNK_SIZE)
+            async for student in Student.objects.filter(pk__in=ids)
+        ]
+        subjects = [
+            subject for ids in iter_chunks(subject_ids, DEFAULT_CHUNK_SIZE)
+            async for subject in Subject.objects.filter(pk__in=ids)
+        ]
+        yield b']' + self.side_loaded_tail(students, subjects)
+
+    def side_loaded_tail(self, students, subjects):
+        """The `students` and `subjects` members closing a streamed compact payload."""
+        related = self.side_load([], students, subjects)
+        return b',"students":' + dumps(related['students']) + b',"subjects":' + dumps(related['subjects']) + b'}'
+
+    def related_querysets(self, grades):
+        """Returns the students and subjects referenced by compact grade rows (one `IN` query each)."""
+        student_ids = {grade['student_id'] for grade in grades}
+        subject_ids = {grade['subject_id'] for grade in grades}
+        return Student.objects.filter(pk__in=student_ids), Subject.objects.filter(pk__in=subject_ids)
+
+    def side_load(self, grades, students, subjects):
+        """
+        Wraps compact grade rows with a single copy of each referenced student and subject,
+        keyed by primary key.
+        """
+        students = StudentSerializer(students, many=True).data
+        subjects = SubjectSerializer(subjects, many=True).data
+        return {
+            'grades': grades,
+            'students': {student['id']: student for student in students},
+            'subjects': {subject['id']: subject for subject in subjects},
+        }
+
+    # (CSV column, queryset lookup) pairs written by the export action, in order
+    export_fields = GRADE_EXPORT_FIELDS
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVStreamRenderer, NDJSONStreamRenderer])
+    def export(self, request):
+        """
+        Streams grades as CSV (default) or NDJSON (`?format=ndjson`).
+        Accepts the same `student_id`/`subject_id`, date range and `term` filters as the list endpoint.
+        """
+        header = [column for column, _ in self.export_fields]
+        return export_response(request, grade_export_rows(self.get_queryset()), header, 'grades')
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Creates many grades in one request and one transaction.
+        Accepts a list of grade objects (`student_id`, `subject_id`, `grade_type`, `score`, `notes`)
+        or `{"grades": [...], "upsert": true}`. With `upsert`, grades that already exist for the
+        same student, subject, grade_type and date have their score and notes overwritten.
+        Nothing is written if any row is invalid; errors are reported per row index.
+        """
+        payload = request.data
+        upsert = request.query_params.get('upsert', '').lower() in TRUE_VALUES
+        if isinstance(payload, dict):
+            upsert = upsert or payload.get('upsert') is True
+            payload = payload.get('grades')
+        if not isinstance(payload, list):
+            raise ValidationError({'grades': 'Expected a list of grades.'})
+        if len(payload) > MAX_BULK_GRADES:
+            raise ValidationError({'grades': f'At most {MAX_BULK_GRADES} grades can be sent per request.'})
+
+        result, errors = bulk_save_grades(payload, upsert=upsert)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Returns per-student, per-subject and overall averages with pass/fail status.
+        Accepts the same `student_id`/`subject_id` filters as the list endpoint and an
+        optional `passing_threshold` (defaults to settings.GRADE_PASSING_THRESHOLD).
+        """
+        statistics, passing_threshold = self.summary_params(request)
+        return self.cached_response(request, lambda: Response(summarize_statistics(statistics, passing_threshold)))
+
+    async def asummary(self, request):
+        statistics, passing_threshold = self.summary_params(request)
+
+        async def compute():
+            return Response(await asummarize_statistics(statistics, passing_threshold))
+        return await self.acached_response(request, compute)
+
+    def summary_params(self, request):
+        """Validates the summary query parameters; returns the statistics queryset and threshold."""
+        threshold_param = request.query_params.get('passing_threshold', None)
+        passing_threshold = None
+        if threshold_param is not None:
+            try:
+                passing_threshold = Decimal(threshold_param)
+            except InvalidOperation:
+                passing_threshold = None
+            if passing_threshold is None or not passing_threshold.is_finite():
+                raise ValidationError({'passing_threshold': 'A valid number is required.'})
+
+        # Read the pre-aggregated statistics table instead of scanning Grade rows
+        statistics = GradeStatistic.objects.all()
+        student_id_param = request.query_params.get('student_id', None)
+        subject_id_param = request.query_params.get('subject_id', None)
+        if student_id_param is not None:
+            statistics = statistics.filter(student__id=student_id_param)
+        if subject_id_param is not None:
+            statistics = statistics.filter(subject__id=subject_id_param)
+        return statistics, passing_threshold
+
+
+class TermViewSet(ConditionalCacheMixin, AsyncReadMixin, viewsets.ModelViewSet):
+    """
+    A ViewSet for viewing and editing academic terms.
+    `current/` returns the term containing today's date (404 between terms).
+    """
+    queryset = Term.objects.all()
+    serializer_class = TermSerializer
+    cache_dependencies = (Term,)
+    pagination_class = None # A handful of rows
+
+    @action(detail=False, methods=['get'])
+    def current(self, request):
+        term = term_calendar.current()
+        if term is None:
+            return Response({'detail': 'No term contains today\'s date.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(TermSerializer(term).data)
+
+    def perform_destroy(self, instance):
+        # ArchivedGrade.term is PROTECT: the archive would otherwise lose its grades
+        if instance.archived_at is not None:
+            raise ValidationError('An archived term cannot be deleted.')
+        instance.delete()
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """
+    Delta sync for clients that keep local copies of the students, subjects and grades.
+    `GET /api/sync/` returns a starting cursor (take it before a full download);
+    `GET /api/sync/?since=<cursor>` returns the rows changed and the ids deleted since
+    then, and the next cursor. See students/sync.py.
+    """
+    # A cursor taken on the primary must not be applied to lagging replica data
+    read_from_replica = False
+
+    def list(self, request):
+        since_param = request.query_params.get('since', None)
+        if since_param is None:
+            return Response({'cursor': current_cursor()})
+        since = parse_cursor(since_param)
+        if since is None:
+            raise ValidationError({'since': 'A cursor returned by this endpoint is required.'})
+        return Response(changes_since(since))
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Background jobs, run by `manage.py run_worker` instead of inside the request (see students/jobs.py).
+    `POST /api/jobs/` with `{"kind": "grade_export", "params": {...}}` queues a job and returns
+    202 (or 200 with the identical job already queued or running); `GET /api/jobs/{id}/`
+    reports its status and `{id}/result/` downloads its output once it has succeeded.
+    """
+    queryset = Job.objects.defer('result') # The output is only read by `result/`
+    serializer_class = JobSerializer
+    # Clients poll right after queueing; a lagging replica would not know the job yet
+    read_from_replica = False
+
+    def create(self, request):
+        serializer = JobRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job, created = enqueue(serializer.validated_data['kind'], serializer.validated_data['params'])
+        data = JobSerializer(job, context=self.get_serializer_context()).data
+        headers = {'Location': reverse('job-detail', args=[job.pk], request=request)}
+        return Response(data, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK, headers=headers)
+
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED:
+            return Response(
+                {'detail': f'The job has no result ({job.status}).', 'status': job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        job.refresh_from_db(fields=['result'])
+        return result_response(request, job)